@@ -1,8 +1,10 @@
 import sys
 import os
+import sqlite3
 from getpass import getpass
-from repository.user_db import UserDatabase
+from repository.factory import ENGINES
 from services.user_service import UserService
+from utils.metrics import serve_metrics
 
 BASE_DIR = os.path.dirname(__file__)
 STORAGE_PATH = os.path.join(BASE_DIR, "storage")
@@ -16,15 +18,16 @@ class AuthSimulator:
 
     __running = True
 
-    def __init__(self):
+    def __init__(self, file: str = FILE_PATH, engine: str = None):
         self.db = None
         self.service = UserService()
-        self.__initialize_db()
+        self.__initialize_db(file, engine)
 
-    def __initialize_db(self):
+    def __initialize_db(self, file: str, engine: str = None):
         try:
-            self.db = UserDatabase(file_to_connect_to=FILE_PATH)
-        except (ValueError, TypeError, FileNotFoundError) as e:
+            self.db = self.service.open_database(
+                file=file, engine=engine, journal=True)
+        except (ValueError, TypeError, FileNotFoundError, sqlite3.Error) as e:
             print(f"Error initializing database: {e}")
             self.__exiting()
 
@@ -62,9 +65,15 @@ class AuthSimulator:
         """Private method to exit application"""
         print("Exiting...\nThank you for your time spent with us.")
         self.__running = False
+        self.service.close()
         sys.exit()
 
-    def __user_menu(self, user):
+    def __user_info(self, user) -> dict:
+        """Private method to get user info with the session login state"""
+        return dict(user.get_user(), is_logged_in=self.service.is_logged_in(user.id))
+
+    def __user_menu(self, session):
+        user = session.user
         while True:
             self.__display_menu("""
 ===========================================
@@ -75,7 +84,7 @@ class AuthSimulator:
 """)
             choice = self.__get_user_choice()
             if choice == '1':
-                print(user.get_user())
+                print(self.__user_info(user))
             elif choice == '2':
                 print("You can only update your name.")
                 name = input("New name: ")
@@ -84,13 +93,13 @@ class AuthSimulator:
                         user = self.service.update_user(
                             db=self.db, id=user.id, item={"name": name})
                         print("User updated successfully.")
-                        print(user.get_user())
+                        print(self.__user_info(user))
                     except Exception as e:
                         print(f"Failed to update user: {e}")
             elif choice == '3':
                 try:
-                    user = self.service.logout_user(db=self.db, user=user)
-                    print(f"User {user.id} logged out.")
+                    session = self.service.logout_user(db=self.db, session=session)
+                    print(f"User {session.user_id} logged out.")
                     break
                 except Exception as e:
                     print(f"Failed to logout: {e}")
@@ -135,10 +144,10 @@ Login Form
 """)
                 email, password = self.__get_login_info()
                 try:
-                    user = self.service.login_user(
+                    session = self.service.login_user(
                         db=self.db, email=email, password=password)
                     print("Logged in successfully!")
-                    self.__user_menu(user)
+                    self.__user_menu(session)
                 except Exception as e:
                     print(f"Login failed: {e}")
             elif choice == '3':
@@ -147,6 +156,30 @@ Login Form
                 print("Invalid choice. Try again.")
 
 
+def parse_args(args: list[str]) -> tuple[str, str, int]:
+    """Parse command line arguments:
+    [data_file] [--engine csv|sqlite] [--metrics-port PORT]"""
+    file, engine, metrics_port = FILE_PATH, None, None
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if arg == "--engine" and args:
+            engine = args.pop(0)
+            if engine not in ENGINES:
+                sys.exit(f"--engine must be one of {', '.join(ENGINES)}")
+        elif arg == "--metrics-port" and args:
+            value = args.pop(0)
+            if not value.isdigit():
+                sys.exit("--metrics-port must be a port number")
+            metrics_port = int(value)
+        else:
+            file = arg
+    return file, engine, metrics_port
+
+
 if __name__ == '__main__':
-    app = AuthSimulator()
+    file, engine, metrics_port = parse_args(sys.argv[1:])
+    if metrics_port is not None:
+        serve_metrics(port=metrics_port)
+    app = AuthSimulator(file=file, engine=engine)
     app.run()
@@ -0,0 +1,79 @@
+"""Benchmark for parsing the csv file with more processes.
+
+Run from the project root:
+
+    python -m benchmarks.bench_load [--size 1000000] [--workers 1 2 4 8]
+
+A csv file of `size` users is generated once and read with every number
+of worker processes, always in parallel chunks, even for one worker, so
+the column for one worker shows the overhead of the chunked path. The
+serial csv.DictReader time is printed first for comparison. Speedups
+are bounded by the CPUs of the machine, which are printed too.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from benchmarks.dataset import generate_dataset
+from repository.csv_loader import read_range, read_rows, split_records
+from repository.user_db import UserDatabase
+
+
+def load_time(path: str, workers: int) -> float:
+    """Time reading every row of the file
+
+    Args:
+        path (str): csv file
+        workers (int): processes parsing the file, 0 for the serial
+            csv.DictReader path
+
+    Returns:
+        float: elapsed time in seconds
+    """
+    start = time.perf_counter()
+    if workers == 0:
+        read_rows(path, workers=1)
+    elif workers == 1:
+        fieldnames, ranges = split_records(path, 1)
+        for begin, end in ranges:
+            read_range(path, begin, end, fieldnames)
+    else:
+        read_rows(path, workers=workers, min_bytes=0)
+    return time.perf_counter() - start
+
+
+def database_time(path: str, workers: int) -> float:
+    """Time opening a UserDatabase on the file"""
+    start = time.perf_counter()
+    UserDatabase(file_to_connect_to=path, load_workers=workers)
+    return time.perf_counter() - start
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_load",
+                                     description="Time the chunked csv loader")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    return parser.parse_args(args)
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.csv")
+        generate_dataset(path, args.size)
+        megabytes = os.path.getsize(path) / 1024 / 1024
+        print(f"{args.size} users, {megabytes:.1f} MiB, {os.cpu_count()} CPUs")
+
+        serial = load_time(path, 0)
+        print(f"{'workers':>8} {'parse (s)':>10} {'speedup':>8} {'open db (s)':>12}")
+        print(f"{'serial':>8} {serial:>10.3f} {1:>8.2f} {database_time(path, 1):>12.3f}")
+        for workers in args.workers:
+            elapsed = load_time(path, workers)
+            print(f"{workers:>8} {elapsed:>10.3f} {serial / elapsed:>8.2f} "
+                  f"{database_time(path, workers):>12.3f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,54 @@
+"""Benchmark for login lookups in the UserDatabase.
+
+Run from the project root:
+
+    python -m benchmarks.bench_login [sizes...]
+
+For every dataset size a csv file is generated, loaded into a
+UserDatabase and the login path (email lookup + password check) is
+timed against random existing users. The passwords are stored in
+plaintext so the lookup is not hidden behind the cost of a hash.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from benchmarks.dataset import PASSWORD, email_of, generate_dataset
+from repository.user_db import UserDatabase
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUPS = 10_000
+
+
+def bench_login(size: int) -> float:
+    """Time the login path against a database of `size` users
+
+    Args:
+        size (int): number of users in the database
+
+    Returns:
+        float: mean latency of one login in microseconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.csv")
+        generate_dataset(path, size, password_hash=PASSWORD)
+        db = UserDatabase(file_to_connect_to=path)
+        sample = [email_of(random.randrange(size)) for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for email in sample:
+            user = db.get_user_by_email(email=email)
+            user.check_password_is_same(password=PASSWORD)
+        elapsed = time.perf_counter() - start
+    return elapsed / LOOKUPS * 1_000_000
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    print(f"{'users':>10} {'login (us)':>12}")
+    for size in sizes:
+        print(f"{size:>10} {bench_login(size):>12.2f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
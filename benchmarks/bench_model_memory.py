@@ -0,0 +1,72 @@
+"""Measure the memory used by User model instances.
+
+Run from the project root:
+
+    python -m benchmarks.bench_model_memory [count]
+
+Builds `count` User objects the way the database materializes them and
+reports the bytes allocated per instance, measured with tracemalloc.
+"""
+import sys
+import tracemalloc
+import uuid
+from models.base import Base
+from models.user import User
+
+DEFAULT_COUNT = 100_000
+
+
+def build_users(count: int) -> list[User]:
+    """Build `count` User objects with stored timestamps
+
+    Args:
+        count (int): number of users to build
+
+    Returns:
+        list[User]: the users
+    """
+    users = []
+    for index in range(count):
+        user = User(email=f"user{index}@example.com", name=f"User {index}",
+                    id=str(uuid.UUID(int=index)),
+                    created_at="11 June 2024 : 10:29:47",
+                    updated_at="11 June 2024 : 10:51:05")
+        user.password = "Password1234"
+        users.append(user)
+    return users
+
+
+def bytes_per_user(count: int) -> float:
+    """Bytes allocated per User object, excluding the field strings
+
+    Args:
+        count (int): number of users to build
+
+    Returns:
+        float: bytes per instance
+    """
+    ids = [str(uuid.UUID(int=index)) for index in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    users = build_users(count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # the id, email and name strings are the raw data, not model overhead
+    raw = sum(sys.getsizeof(ids[i]) + sys.getsizeof(user.email)
+              + sys.getsizeof(user.name) for i, user in enumerate(users))
+    return (total - raw) / count
+
+
+def main(argv: list[str]) -> None:
+    count = int(argv[0]) if argv else DEFAULT_COUNT
+    print(f"{'timestamps':>12} {'bytes/user':>12}")
+    print(f"{'datetime':>12} {bytes_per_user(count):>12.1f}")
+    if hasattr(Base, "store_epoch_timestamps"):
+        Base.store_epoch_timestamps(True)
+        print(f"{'epoch':>12} {bytes_per_user(count):>12.1f}")
+        Base.store_epoch_timestamps(False)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
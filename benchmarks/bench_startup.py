@@ -0,0 +1,68 @@
+"""Benchmark for the time to the first login.
+
+Run from the project root:
+
+    python -m benchmarks.bench_startup [sizes...]
+
+For every dataset size a csv file is generated and the time to open a
+UserDatabase and look up one user is measured, once parsing the csv file
+and once mapping a snapshot written by an earlier start.
+"""
+import os
+import sys
+import tempfile
+import time
+from benchmarks.dataset import PASSWORD, email_of, generate_dataset
+from repository.user_db import UserDatabase
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def first_login(path: str, email: str, snapshot: bool) -> float:
+    """Time opening the database and looking up one email
+
+    Args:
+        path (str): csv file
+        email (str): email to look up
+        snapshot (bool): open the database in snapshot mode
+
+    Returns:
+        float: elapsed time in milliseconds
+    """
+    start = time.perf_counter()
+    db = UserDatabase(file_to_connect_to=path, snapshot=snapshot)
+    user = db.get_user_by_email(email=email)
+    user.check_password_is_same(password=PASSWORD)
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_startup(size: int) -> tuple[float, float]:
+    """Time the first login against a database of `size` users
+
+    Args:
+        size (int): number of users in the database
+
+    Returns:
+        tuple[float, float]: milliseconds with the csv file and with the
+            snapshot
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.csv")
+        generate_dataset(path, size, password_hash=PASSWORD)
+        email = email_of(size // 2)
+        csv_time = first_login(path, email, snapshot=False)
+        UserDatabase(file_to_connect_to=path, snapshot=True)
+        snapshot_time = first_login(path, email, snapshot=True)
+    return csv_time, snapshot_time
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+    print(f"{'users':>10} {'csv (ms)':>12} {'snapshot (ms)':>14}")
+    for size in sizes:
+        csv_time, snapshot_time = bench_startup(size)
+        print(f"{size:>10} {csv_time:>12.2f} {snapshot_time:>14.2f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
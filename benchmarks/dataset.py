@@ -0,0 +1,66 @@
+"""Synthetic user datasets for the benchmarks.
+
+Run from the project root:
+
+    python -m benchmarks.dataset size path
+
+Writes a csv file in the UserDatabase layout with `size` users. Every
+user has the email user<n>@example.com and the password PASSWORD.
+"""
+import csv
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from utils.passwords import hash_password
+from utils.timestamps import ISO, format_timestamp
+
+FIELDNAMES = ["id", "email", "name", "password",
+              "is_logged_in", "created_at", "updated_at"]
+PASSWORD = "Password1234"
+DOMAINS = ["example.com", "example.org", "example.net"]
+
+
+def email_of(index: int) -> str:
+    """Email of the `index`-th generated user"""
+    return f"user{index}@{DOMAINS[index % len(DOMAINS)]}"
+
+
+def generate_dataset(path: str, size: int, password_hash: str = None,
+                     timestamp_format: str = ISO) -> None:
+    """Write a csv file with `size` users
+
+    Hashing is the slowest part of creating a user, so every user shares
+    one password hash.
+
+    Args:
+        path (str): file to write
+        size (int): number of users
+        password_hash (str, optional): stored password of every user.
+            Defaults to a scrypt hash of PASSWORD.
+        timestamp_format (str, optional): format of the timestamps.
+            Defaults to iso.
+    """
+    if password_hash is None:
+        password_hash = hash_password(PASSWORD)
+
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        for index in range(size):
+            created_at = format_timestamp(start + timedelta(seconds=index * 60),
+                                          timestamp_format)
+            writer.writerow([str(uuid.UUID(int=index, version=4)),
+                             email_of(index), f"User {index}", password_hash,
+                             False, created_at, created_at])
+
+
+def main(argv: list[str]) -> None:
+    if len(argv) != 2:
+        print("usage: python -m benchmarks.dataset size path")
+        sys.exit(2)
+    generate_dataset(argv[1], int(argv[0]))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,339 @@
+"""Synthetic traffic for capacity planning.
+
+Run from the project root:
+
+    python -m benchmarks.load_driver [--processes 4] [--duration 30]
+        [--mix register=10,login=40,bad_login=10,update=25,logout=15]
+        [--url http://127.0.0.1:8080 | --data-file users.csv [--engine sqlite]]
+        [--interval 1] [--output report.json]
+
+Every worker process replays the operation mix as fast as it can, either
+against a UserService in the process (the default, on a temporary csv
+file unless --data-file is given) or against the HTTP front end at --url.
+Each worker registers its own users, so runs can start on an empty file.
+Every interval the aggregate throughput, error rate and p50/p99 latency
+are printed; a per-operation summary follows at the end.
+
+Failed logins with a wrong password are expected and not counted as
+errors.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.parse
+from benchmarks.suite import summarize
+from services.user_service import UserService
+from utils.passwords import PasswordHasher
+
+OPERATIONS = ("register", "login", "bad_login", "update", "logout")
+DEFAULT_MIX = "register=10,login=40,bad_login=10,update=25,logout=15"
+PASSWORD = "Password1234"
+
+
+def parse_mix(mix: str) -> dict:
+    """Parse an operation mix such as "register=10,login=90"
+
+    Args:
+        mix (str): comma separated operation=weight pairs
+
+    Raises:
+        ValueError: If an operation is unknown or a weight is invalid
+
+    Returns:
+        dict: weight of every operation in the mix
+    """
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation {name}, expected one of {', '.join(OPERATIONS)}")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"weight of {name} must be a number")
+        if weights[name] < 0:
+            raise ValueError(f"weight of {name} cannot be negative")
+    if not any(weights.values()):
+        raise ValueError("the mix needs at least one operation with a weight")
+    return weights
+
+
+class ServiceTarget:
+    """Sends the operations to a UserService in this process"""
+
+    def __init__(self, data_file: str, engine: str = None, scrypt_n: int = None) -> None:
+        hasher = PasswordHasher() if scrypt_n is None else PasswordHasher(n=scrypt_n)
+        self.service = UserService(hasher=hasher)
+        self.db = self.service.open_database(file=data_file, engine=engine,
+                                             journal=True, concurrent=True)
+        self.sessions = {}
+
+    def register(self, email: str, name: str, password: str) -> None:
+        self.service.create_user(db=self.db, email=email, name=name, password=password)
+
+    def login(self, email: str, password: str) -> tuple[str, str]:
+        session = self.service.login_user(db=self.db, email=email, password=password)
+        self.sessions[session.id] = session
+        return session.id, session.user_id
+
+    def update(self, user_id: str, session_id: str, name: str) -> None:
+        if self.service.update_user(db=self.db, id=user_id, item={"name": name}) is None:
+            raise ValueError(f"user {user_id} does not exist")
+
+    def logout(self, session_id: str) -> None:
+        self.service.logout_user(db=self.db, session=self.sessions.pop(session_id))
+
+    def close(self) -> None:
+        self.service.close()
+        if hasattr(self.db, "close"):
+            self.db.close()
+
+
+class HttpTarget:
+    """Sends the operations to the HTTP front end over one kept-alive
+    connection"""
+
+    def __init__(self, url: str) -> None:
+        parts = urllib.parse.urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80,
+                                                     timeout=30)
+
+    def __request(self, method: str, path: str, body: dict = None,
+                  session_id: str = None) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if session_id is not None:
+            headers["Authorization"] = f"Bearer {session_id}"
+        data = None if body is None else json.dumps(body)
+        try:
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (ConnectionError, http.client.HTTPException):
+            self.connection.close()
+            raise
+        if response.status >= 400:
+            raise ValueError(f"{method} {path}: {response.status} {payload[:200]!r}")
+        return json.loads(payload or b"null")
+
+    def register(self, email: str, name: str, password: str) -> None:
+        self.__request("POST", "/users", {"email": email, "name": name, "password": password})
+
+    def login(self, email: str, password: str) -> tuple[str, str]:
+        body = self.__request("POST", "/sessions", {"email": email, "password": password})
+        return body["session_id"], body["user_id"]
+
+    def update(self, user_id: str, session_id: str, name: str) -> None:
+        self.__request("PATCH", f"/users/{user_id}", {"name": name}, session_id=session_id)
+
+    def logout(self, session_id: str) -> None:
+        self.__request("DELETE", f"/sessions/{session_id}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def worker(number: int, options: dict, results: multiprocessing.Queue) -> None:
+    """Replay the operation mix until the deadline
+
+    Latencies are grouped by reporting interval and sent to the parent at
+    the end of every interval, as (interval, operation, latencies, errors).
+
+    Args:
+        number (int): worker number, used to make unique emails
+        options (dict): parsed command line options
+        results (multiprocessing.Queue): where samples are sent
+    """
+    if options["url"]:
+        target = HttpTarget(options["url"])
+    else:
+        target = ServiceTarget(options["data_file"], options["engine"], options["scrypt_n"])
+
+    names = list(options["mix"])
+    weights = [options["mix"][name] for name in names]
+    users = []
+    sessions = []
+    start = options["start"]
+    samples = {}
+    interval = 0
+    registered = 0
+
+    while time.time() < options["deadline"]:
+        operation = random.choices(names, weights)[0]
+        if operation != "register" and not users:
+            operation = "register"
+        elif operation in ("update", "logout") and not sessions:
+            operation = "login"
+
+        began = time.perf_counter()
+        failed = False
+        try:
+            if operation == "register":
+                registered += 1
+                email = f"load{number}x{registered}x{os.getpid()}@example.com"
+                target.register(email, f"Load User {registered}", PASSWORD)
+                users.append(email)
+            elif operation == "login":
+                sessions.append(target.login(random.choice(users), PASSWORD))
+            elif operation == "bad_login":
+                try:
+                    target.login(random.choice(users), "WrongPass1234")
+                    failed = True
+                except ValueError:
+                    pass
+            elif operation == "update":
+                session_id, user_id = random.choice(sessions)
+                target.update(user_id, session_id, f"Renamed {random.randrange(10 ** 6)}")
+            else:
+                session_id, _ = sessions.pop(random.randrange(len(sessions)))
+                target.logout(session_id)
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - began
+
+        current = int((time.time() - start) // options["interval"])
+        if current != interval:
+            for name, (latencies, errors) in samples.items():
+                results.put((interval, name, latencies, errors))
+            samples = {}
+            interval = current
+        latencies, errors = samples.setdefault(operation, ([], 0))
+        latencies.append(elapsed)
+        samples[operation] = (latencies, errors + failed)
+
+    for name, (latencies, errors) in samples.items():
+        results.put((interval, name, latencies, errors))
+    results.put(None)
+    target.close()
+
+
+def report_line(interval: int, seconds: float, latencies: list[float], errors: int) -> str:
+    """One progress line for an interval"""
+    if not latencies:
+        return f"{interval * seconds:>7.1f}s {0:>9.1f} ops/s"
+    summary = summarize(latencies)
+    return (f"{interval * seconds:>7.1f}s {len(latencies) / seconds:>9.1f} ops/s "
+            f"{errors / len(latencies):>7.2%} errors "
+            f"p50 {summary['p50_ms']:>8.2f} ms p99 {summary['p99_ms']:>8.2f} ms")
+
+
+def run(options: dict) -> dict:
+    """Start the workers, print progress and build the report
+
+    Args:
+        options (dict): parsed command line options
+
+    Returns:
+        dict: per-interval and per-operation results
+    """
+    results = multiprocessing.Queue()
+    options["start"] = time.time()
+    options["deadline"] = options["start"] + options["duration"]
+    workers = [multiprocessing.Process(target=worker, args=(number, options, results))
+               for number in range(options["processes"])]
+    for process in workers:
+        process.start()
+
+    intervals = {}
+    operations = {}
+    finished = 0
+    printed = 0
+    while finished < len(workers):
+        sample = results.get()
+        if sample is None:
+            finished += 1
+            continue
+        interval, name, latencies, errors = sample
+        for bucket in (intervals.setdefault(interval, {"latencies": [], "errors": 0}),
+                       operations.setdefault(name, {"latencies": [], "errors": 0})):
+            bucket["latencies"].extend(latencies)
+            bucket["errors"] += errors
+
+        # workers flush an interval as soon as they leave it, so intervals
+        # two behind the newest sample are complete
+        while printed < interval - 1:
+            bucket = intervals.get(printed, {"latencies": [], "errors": 0})
+            print(report_line(printed, options["interval"], **bucket))
+            printed += 1
+
+    for process in workers:
+        process.join()
+    for interval in sorted(intervals):
+        if interval >= printed:
+            print(report_line(interval, options["interval"], **intervals[interval]))
+
+    report = {
+        "processes": options["processes"],
+        "duration": options["duration"],
+        "target": options["url"] or options["data_file"],
+        "intervals": [],
+        "operations": {},
+    }
+    for interval, bucket in sorted(intervals.items()):
+        latencies = bucket["latencies"]
+        report["intervals"].append(dict(
+            summarize(latencies), second=interval * options["interval"],
+            ops_per_sec=len(latencies) / options["interval"],
+            error_rate=bucket["errors"] / len(latencies)))
+    for name, bucket in sorted(operations.items()):
+        latencies = bucket["latencies"]
+        report["operations"][name] = dict(
+            summarize(latencies), ops_per_sec=len(latencies) / options["duration"],
+            errors=bucket["errors"], error_rate=bucket["errors"] / len(latencies))
+    return report
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_driver",
+                                     description="Replay synthetic auth traffic")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--interval", type=float, default=1)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--url", help="HTTP front end to send the traffic to")
+    parser.add_argument("--data-file", help="data file of the in-process service")
+    parser.add_argument("--engine", choices=("csv", "sqlite"))
+    parser.add_argument("--scrypt-n", type=int, help="scrypt cost of new passwords")
+    parser.add_argument("--output", help="write the report to this file")
+    return parser.parse_args(args)
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.processes < 1 or args.duration <= 0 or args.interval <= 0:
+        sys.exit("--processes, --duration and --interval must be positive")
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = args.data_file
+        if data_file is None and args.url is None:
+            data_file = os.path.join(directory, "users.csv")
+            with open(data_file, mode="w") as file:
+                file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+
+        report = run({
+            "processes": args.processes, "duration": args.duration,
+            "interval": args.interval, "mix": mix, "url": args.url,
+            "data_file": data_file, "engine": args.engine,
+            "scrypt_n": args.scrypt_n,
+        })
+
+    print(f"{'operation':>10} {'ops/s':>9} {'errors':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, summary in report["operations"].items():
+        print(f"{name:>10} {summary['ops_per_sec']:>9.1f} {summary['error_rate']:>8.2%} "
+              f"{summary['p50_ms']:>9.2f} {summary['p99_ms']:>9.2f}")
+    if args.output:
+        with open(args.output, mode="w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
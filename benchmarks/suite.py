@@ -0,0 +1,232 @@
+"""Benchmark suite for the UserService operations.
+
+Run from the project root:
+
+    python -m benchmarks.suite [--sizes 1000 100000 1000000]
+                               [--output results.json]
+                               [--compare baseline.json] [--threshold 0.2]
+
+For every dataset size a csv file is generated and, in a fresh process,
+startup (loading the file), create_user, login_user, logout_user,
+update_user, get_all_users and compact are timed. Mutations use the
+default commit policy, so each is saved to the journal before it
+returns and its latency includes persistence. The report is JSON with
+ops/s and p50/p99 latency for every operation and the peak RSS of the
+process. With --compare, operations whose throughput dropped or whose
+p99 latency grew by more than the threshold against a stored report are
+listed and the exit status is 1.
+
+Password hashing dominates create and login; --scrypt-n lowers its cost
+to look at the storage path on its own.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+from benchmarks.dataset import PASSWORD, email_of, generate_dataset
+from repository.user_db import UserDatabase
+from services.user_service import UserService
+from utils.passwords import SCRYPT_N, PasswordHasher, hash_password
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_OPERATIONS = 200
+DEFAULT_THRESHOLD = 0.2
+REPEATS = 3
+
+
+def summarize(latencies: list[float]) -> dict:
+    """Throughput and latency percentiles of one operation
+
+    Args:
+        latencies (list[float]): seconds taken by every call
+
+    Returns:
+        dict: calls, ops/s and p50/p99 latency in milliseconds
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "ops": len(ordered),
+        "ops_per_sec": len(ordered) / total if total else 0.0,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def timed(calls: int, operation: Callable[[int], None]) -> dict:
+    """Time `calls` calls of an operation
+
+    Args:
+        calls (int): number of calls
+        operation (Callable[[int], None]): called with the call number
+
+    Returns:
+        dict: summary of the latencies
+    """
+    latencies = []
+    for number in range(calls):
+        start = time.perf_counter()
+        operation(number)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def run_size(size: int, operations: int, scrypt_n: int) -> dict:
+    """Benchmark every operation against a dataset of `size` users
+
+    Runs in its own process, so the peak RSS belongs to this size alone.
+
+    Args:
+        size (int): number of users in the dataset
+        operations (int): calls per operation
+        scrypt_n (int): scrypt cost of the stored and new passwords
+
+    Returns:
+        dict: summary of every operation and the peak RSS in bytes
+    """
+    results = {}
+    hasher = PasswordHasher(n=scrypt_n)
+    service = UserService(hasher=hasher)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.csv")
+        generate_dataset(path, size, hash_password(PASSWORD, n=scrypt_n))
+
+        databases = []
+        results["startup"] = timed(REPEATS, lambda _: databases.append(
+            UserDatabase(file_to_connect_to=path, journal=True)))
+        db = databases[-1]
+        del databases[:-1]
+
+        emails = [email_of(random.randrange(size)) for _ in range(operations)]
+        results["create_user"] = timed(operations, lambda number: service.create_user(
+            db, f"new{number}@example.com", f"New User {number}", PASSWORD))
+
+        sessions = []
+        results["login_user"] = timed(operations, lambda number: sessions.append(
+            service.login_user(db, emails[number], PASSWORD)))
+        results["logout_user"] = timed(operations, lambda number: service.logout_user(
+            db, sessions[number]))
+        results["update_user"] = timed(operations, lambda number: service.update_user(
+            db, sessions[number].user_id, {"name": f"Renamed {number}"}))
+        results["get_all_users"] = timed(REPEATS, lambda _: service.get_all_users(db))
+        results["compact"] = timed(REPEATS, lambda _: db.compact())
+    service.close()
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() != "Darwin":
+        peak *= 1024
+    return {"size": size, "peak_rss_bytes": peak, "operations": results}
+
+
+def run(sizes: list[int], operations: int = DEFAULT_OPERATIONS,
+        scrypt_n: int = SCRYPT_N) -> dict:
+    """Benchmark every size, each in a fresh process
+
+    Args:
+        sizes (list[int]): dataset sizes
+        operations (int, optional): calls per operation.
+            Defaults to DEFAULT_OPERATIONS.
+        scrypt_n (int, optional): scrypt cost. Defaults to SCRYPT_N.
+
+    Returns:
+        dict: the report
+    """
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "operations": operations,
+        "scrypt_n": scrypt_n,
+        "sizes": {},
+    }
+    for size in sizes:
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(run_size, size, operations, scrypt_n).result()
+        report["sizes"][str(size)] = result
+    return report
+
+
+def compare(report: dict, baseline: dict,
+            threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """Find the operations that got slower than in a baseline report
+
+    Args:
+        report (dict): the new report
+        baseline (dict): a report saved earlier
+        threshold (float, optional): tolerated relative change.
+            Defaults to 0.2.
+
+    Returns:
+        list[str]: one line per regression
+    """
+    regressions = []
+    for size, result in report["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for name, summary in result["operations"].items():
+            old = base["operations"].get(name)
+            if old is None:
+                continue
+            if summary["ops_per_sec"] < old["ops_per_sec"] * (1 - threshold):
+                regressions.append(
+                    f"{size} users, {name}: {summary['ops_per_sec']:.1f} ops/s, "
+                    f"was {old['ops_per_sec']:.1f}")
+            if summary["p99_ms"] > old["p99_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{size} users, {name}: p99 {summary['p99_ms']:.3f} ms, "
+                    f"was {old['p99_ms']:.3f}")
+        if result["peak_rss_bytes"] > base["peak_rss_bytes"] * (1 + threshold):
+            regressions.append(
+                f"{size} users: peak RSS {result['peak_rss_bytes']} bytes, "
+                f"was {base['peak_rss_bytes']}")
+    return regressions
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite",
+                                     description="Benchmark the UserService operations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS,
+                        help="calls per operation")
+    parser.add_argument("--scrypt-n", type=int, default=SCRYPT_N,
+                        help="scrypt cost of the passwords")
+    parser.add_argument("--output", help="write the report to this file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="flag regressions against a stored report")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="tolerated relative slowdown")
+    return parser.parse_args(args)
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    report = run(args.sizes, args.operations, args.scrypt_n)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, mode="w") as file:
+            file.write(text + "\n")
+    print(text)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,11 +1,20 @@
 import uuid
 from datetime import datetime, timezone
+from utils.timestamps import parse_timestamp
 
 
 class Base:
-    """Base class for all models"""
-    
+    """Base class for all models
+
+    Instances keep their state in slots instead of a per-object __dict__.
+    Call `Base.store_epoch_timestamps(True)` to keep timestamps as integer
+    epoch seconds instead of datetime objects; the properties still
+    return datetimes.
+    """
+
+    __slots__ = ("__id", "__created_at", "__updated_at")
     __counter = 0
+    __epoch_timestamps = False
 
     def __init__(self, id: str = None, 
                  created_at: str = None, updated_at: str = None) -> None:
@@ -31,24 +40,46 @@ class Base:
             self.__id = id
 
         if created_at is None:
-            self.__created_at = datetime.now(tz=timezone.utc)
+            self.__created_at = self.__store(datetime.now(tz=timezone.utc))
         else:
             try:
-                self.__created_at = datetime.strptime(
-                    created_at, "%d %B %Y : %H:%M:%S")
+                self.__created_at = self.__store(parse_timestamp(created_at))
             except:
                 raise ValueError(
-                    f'{created_at} must be in the format: %d %B %Y : %H:%M:%S, day month year : hour:minute:second. Month must be in full.')
+                    f'{created_at} must be an ISO-8601 timestamp, epoch seconds or in the format: %d %B %Y : %H:%M:%S, day month year : hour:minute:second. Month must be in full.')
 
         if updated_at is None:
-            self.__updated_at = datetime.now(tz=timezone.utc)
+            self.__updated_at = self.__store(datetime.now(tz=timezone.utc))
         else:
             try:
-                self.__updated_at = datetime.strptime(
-                    updated_at, "%d %B %Y : %H:%M:%S")
+                self.__updated_at = self.__store(parse_timestamp(updated_at))
             except:
                 raise ValueError(
-                    f'{updated_at} must be in the format: %d %B %Y : %H:%M:%S, day month year : hour:minute:second. Month must be in full.')
+                    f'{updated_at} must be an ISO-8601 timestamp, epoch seconds or in the format: %d %B %Y : %H:%M:%S, day month year : hour:minute:second. Month must be in full.')
+
+    @classmethod
+    def store_epoch_timestamps(cls, enabled: bool) -> None:
+        """Choose how timestamps of new instances are kept in memory
+
+        Args:
+            enabled (bool): keep integer epoch seconds instead of datetimes.
+                Naive datetimes are taken to be UTC.
+        """
+        Base.__epoch_timestamps = enabled
+
+    def __store(self, value: datetime) -> datetime | int:
+        """Private method to convert a timestamp to its in-memory form"""
+        if value is None or not Base.__epoch_timestamps:
+            return value
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+
+    def __load(self, value: datetime | int) -> datetime:
+        """Private method to convert an in-memory timestamp to a datetime"""
+        if isinstance(value, int):
+            return datetime.fromtimestamp(value, tz=timezone.utc)
+        return value
 
     @property
     def id(self) -> str:
@@ -58,12 +89,12 @@ class Base:
     @property
     def created_at(self) -> datetime:
         """Getter for the created_at attribute"""
-        return self.__created_at
+        return self.__load(self.__created_at)
 
     @property
     def updated_at(self) -> datetime:
         """Getter for the updated_at attribute"""
-        return self.__updated_at
+        return self.__load(self.__updated_at)
 
     @updated_at.setter
     def updated_at(self, updated_at: datetime) -> None:
@@ -72,4 +103,4 @@ class Base:
         Args:
             updated_at (str): The updated_at to set
         """
-        self.__updated_at = updated_at
+        self.__updated_at = self.__store(updated_at)
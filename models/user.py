@@ -1,9 +1,13 @@
 from utils.validators import email_validator, password_validator
+from utils.timestamps import LEGACY, format_timestamp
+from utils.passwords import is_password_hash, verify_password
 from .base import Base
 
 class User(Base):
     """User model class"""
 
+    __slots__ = ("__email", "__name", "__password", "__is_logged_in")
+
     def __init__(self, email: str, name: str,
                  id: str = None, created_at: str = None, updated_at: str = None):
         """Constructor for the User class
@@ -24,6 +28,26 @@ class User(Base):
         self.__password = None
         self.__is_logged_in = False
 
+    @classmethod
+    def with_valid_email(cls, email: str, name: str) -> "User":
+        """Build a new user whose email has already been validated, eg by
+        utils.validators.validate_emails, without checking it again
+
+        Args:
+            email (str): valid email of the user
+            name (str): Full name of the user
+
+        Returns:
+            User: the user object
+        """
+        user = cls.__new__(cls)
+        Base.__init__(user)
+        user.__email = email
+        user.__name = name
+        user.__password = None
+        user.__is_logged_in = False
+        return user
+
     @property
     def email(self) -> str:
         """Getter for the email attribute"""
@@ -39,6 +63,12 @@ class User(Base):
         """Getter for the password attribute"""
         raise AttributeError("Password is not accessible")
 
+    @property
+    def password_hash(self) -> str:
+        """Getter for the stored password: a KDF hash, or the plaintext
+        password of a user that has not been hashed yet"""
+        return self.__password
+
     @property
     def is_logged_in(self) -> bool:
         """Getter for is_logged_in attribute"""
@@ -77,6 +107,17 @@ class User(Base):
         except ValueError as e:
             raise ValueError(e)
 
+    @password_hash.setter
+    def password_hash(self, password_hash: str) -> None:
+        """Setter for the password_hash attribute
+
+        Args:
+            password_hash (str): hash made by utils.passwords.hash_password
+        """
+        if not is_password_hash(password_hash):
+            raise ValueError("password_hash must be a password hash")
+        self.__password = password_hash
+
     @is_logged_in.setter
     def is_logged_in(self, value: bool) -> None:
         """Setter for is_logged_in attribute
@@ -95,11 +136,15 @@ class User(Base):
         Returns:
             bool: True or False
         """
-        return self.__password == password
+        return verify_password(self.__password, password)
 
-    def to_dict(self) -> dict:
+    def to_dict(self, timestamp_format: str = LEGACY) -> dict:
         """Method to convert object to a python dictionary
 
+        Args:
+            timestamp_format (str, optional): legacy, iso or epoch.
+                Defaults to legacy.
+
         Returns:
             dict: Dictionary representation of object
         """
@@ -109,13 +154,17 @@ class User(Base):
             "password": self.__password,
             "name": self.name,
             "is_logged_in": self.is_logged_in,
-            "created_at": self.created_at.strftime("%d %B %Y : %H:%M:%S"),
-            "updated_at": None if self.updated_at == None else self.updated_at.strftime("%d %B %Y : %H:%M:%S")
+            "created_at": format_timestamp(self.created_at, timestamp_format),
+            "updated_at": None if self.updated_at == None else format_timestamp(self.updated_at, timestamp_format)
         }
 
-    def get_user(self) -> dict:
+    def get_user(self, timestamp_format: str = LEGACY) -> dict:
         """Method to return the user object
 
+        Args:
+            timestamp_format (str, optional): legacy, iso or epoch.
+                Defaults to legacy.
+
         Returns:
             dict: Dictionary representation of object
         """
@@ -124,8 +173,8 @@ class User(Base):
             "email": self.email,
             "name": self.name,
             "is_logged_in": self.is_logged_in,
-            "created_at": self.created_at.strftime("%d %B %Y : %H:%M:%S"),
-            "updated_at": None if self.updated_at == None else self.updated_at.strftime("%d %B %Y : %H:%M:%S")
+            "created_at": format_timestamp(self.created_at, timestamp_format),
+            "updated_at": None if self.updated_at == None else format_timestamp(self.updated_at, timestamp_format)
         }
 
     def __repr__(self) -> str:
@@ -0,0 +1,158 @@
+from datetime import datetime
+from utils.timestamps import convert_timestamp, parse_timestamp
+from utils.passwords import is_password_hash, verify_password
+from .user import User
+
+
+class UserView(User):
+    """Read-only view of a stored user row.
+
+    Rows in storage were validated when they were written, so a view
+    skips validation and only parses timestamps when they are accessed.
+    Use `to_user` to get a full, mutable User object.
+    """
+
+    __slots__ = ("__row", "__created_at", "__updated_at")
+
+    def __init__(self, row: dict) -> None:
+        """Constructor for the UserView class
+
+        Args:
+            row (dict): stored user row. The row must not be mutated while
+                views of it are in use.
+        """
+        self.__row = row
+        self.__created_at = None
+        self.__updated_at = None
+
+    def __parse(self, value: str) -> datetime:
+        """Private method to parse a stored timestamp
+
+        Args:
+            value (str): stored timestamp
+
+        Returns:
+            datetime: the parsed timestamp or None
+        """
+        if not value:
+            return None
+        return parse_timestamp(value)
+
+    @property
+    def id(self) -> str:
+        """Getter for the id attribute"""
+        return self.__row.get("id")
+
+    @property
+    def email(self) -> str:
+        """Getter for the email attribute"""
+        return self.__row.get("email")
+
+    @property
+    def name(self) -> str:
+        """Getter for the name attribute"""
+        return self.__row.get("name")
+
+    @property
+    def password(self) -> None:
+        """Getter for the password attribute"""
+        raise AttributeError("Password is not accessible")
+
+    @property
+    def password_hash(self) -> str:
+        """Getter for the stored password"""
+        return self.__row.get("password")
+
+    @property
+    def is_logged_in(self) -> bool:
+        """Getter for is_logged_in attribute"""
+        return self.__row.get("is_logged_in") in (True, "True")
+
+    @property
+    def created_at(self) -> datetime:
+        """Getter for the created_at attribute"""
+        if self.__created_at is None:
+            self.__created_at = self.__parse(self.__row.get("created_at"))
+        return self.__created_at
+
+    @property
+    def updated_at(self) -> datetime:
+        """Getter for the updated_at attribute"""
+        if self.__updated_at is None:
+            self.__updated_at = self.__parse(self.__row.get("updated_at"))
+        return self.__updated_at
+
+    def check_password_is_same(self, password: str) -> bool:
+        """Check if the password provided is the same
+
+        Args:
+            password (str): password to check
+
+        Returns:
+            bool: True or False
+        """
+        return verify_password(self.__row.get("password"), password)
+
+    def to_dict(self, timestamp_format: str = None) -> dict:
+        """Method to convert object to a python dictionary
+
+        Args:
+            timestamp_format (str, optional): legacy, iso or epoch.
+                Defaults to None, which keeps the stored timestamps.
+
+        Returns:
+            dict: Dictionary representation of object
+        """
+        if timestamp_format is not None:
+            user = self.to_dict()
+            user["created_at"] = convert_timestamp(user["created_at"], timestamp_format)
+            user["updated_at"] = convert_timestamp(user["updated_at"], timestamp_format)
+            return user
+
+        return {
+            "id": self.id,
+            "email": self.email,
+            "password": self.__row.get("password"),
+            "name": self.name,
+            "is_logged_in": self.is_logged_in,
+            "created_at": self.__row.get("created_at"),
+            "updated_at": self.__row.get("updated_at") or None
+        }
+
+    def get_user(self, timestamp_format: str = None) -> dict:
+        """Method to return the user object
+
+        Args:
+            timestamp_format (str, optional): legacy, iso or epoch.
+                Defaults to None, which keeps the stored timestamps.
+
+        Returns:
+            dict: Dictionary representation of object
+        """
+        user = self.to_dict(timestamp_format=timestamp_format)
+        user.pop("password")
+        return user
+
+    def to_user(self) -> User:
+        """Method to build a full, mutable User object from the row
+
+        Returns:
+            User: the user object
+        """
+        user = User(
+            email=self.email,
+            name=self.name,
+            id=self.id,
+            created_at=self.__row.get("created_at"),
+            updated_at=self.__row.get("updated_at") or None
+        )
+        if is_password_hash(self.password_hash):
+            user.password_hash = self.password_hash
+        else:
+            user.password = self.password_hash
+        user.is_logged_in = self.is_logged_in
+        return user
+
+    def __str__(self) -> str:
+        """String representation of the UserView object"""
+        return f"User: {self.name} <{self.email}>"
@@ -0,0 +1,125 @@
+import hashlib
+import math
+import struct
+from typing import Iterable
+
+_HEADER = struct.Struct("<IQQd")
+
+
+class BloomFilter:
+    """Probabilistic set of strings with no false negatives.
+
+    `item in filter` is False only if the item was never added, so a miss
+    is a definite answer that saves a real lookup. Hits are wrong with a
+    probability close to the configured error rate as long as no more
+    than `capacity` items are added. The bit positions come from a
+    blake2b digest, so a filter written to disk gives the same answers in
+    another process.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        """Constructor for the BloomFilter class
+
+        Args:
+            capacity (int): number of items the filter is sized for
+            error_rate (float, optional): false positive rate at capacity.
+                Defaults to 0.01.
+
+        Raises:
+            ValueError: If the capacity or error rate is out of range
+        """
+        if capacity < 0:
+            raise ValueError("capacity cannot be negative")
+
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        capacity = max(capacity, 1)
+        self.__size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.__hashes = max(1, round(self.__size / capacity * math.log(2)))
+        self.__bits = bytearray((self.__size + 7) // 8)
+        self.__count = 0
+        self.__error_rate = error_rate
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int,
+                   error_rate: float = 0.01) -> "BloomFilter":
+        """Build a filter holding `items`"""
+        bloom = cls(capacity, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """Load a filter written by `to_bytes`
+
+        Raises:
+            ValueError: If the data is not a filter
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("data is not a bloom filter")
+
+        hashes, size, count, error_rate = _HEADER.unpack_from(data, 0)
+        bits = bytearray(data[_HEADER.size:])
+        if len(bits) != (size + 7) // 8 or hashes < 1:
+            raise ValueError("data is not a bloom filter")
+
+        bloom = cls.__new__(cls)
+        bloom.__size = size
+        bloom.__hashes = hashes
+        bloom.__bits = bits
+        bloom.__count = count
+        bloom.__error_rate = error_rate
+        return bloom
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter"""
+        return _HEADER.pack(self.__hashes, self.__size, self.__count,
+                            self.__error_rate) + bytes(self.__bits)
+
+    def __hash(self, item: str) -> tuple[int, int]:
+        """Private method to get the two hashes the bit positions of an
+        item are derived from, by double hashing"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), \
+            int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, item: str) -> None:
+        """Add an item
+
+        Args:
+            item (str): item to add
+        """
+        position, step = self.__hash(item)
+        bits = self.__bits
+        for _ in range(self.__hashes):
+            position %= self.__size
+            bits[position >> 3] |= 1 << (position & 7)
+            position += step
+        self.__count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """False if the item was definitely never added"""
+        position, step = self.__hash(item)
+        bits = self.__bits
+        for _ in range(self.__hashes):
+            position %= self.__size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position += step
+        return True
+
+    def __len__(self) -> int:
+        """Number of items added"""
+        return self.__count
+
+    @property
+    def error_rate(self) -> float:
+        """False positive rate the filter was sized for"""
+        return self.__error_rate
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Expected false positive rate with the items added so far"""
+        return (1 - math.exp(-self.__hashes * self.__count / self.__size)) ** self.__hashes
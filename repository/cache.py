@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from utils.metrics import REGISTRY
+
+_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total", "Cache lookups by result", ("cache", "result"))
+_EVICTIONS = REGISTRY.counter(
+    "cache_evictions_total", "Entries dropped to make room", ("cache",))
+
+
+class LRUCache:
+    """Bounded map that drops the least recently used entry when full.
+
+    Hits, misses and evictions are counted on the cache and, while the
+    metrics registry is enabled, in the cache_lookups_total and
+    cache_evictions_total counters labelled with the cache name.
+    """
+
+    def __init__(self, capacity: int, name: str = "cache") -> None:
+        """Constructor for the LRUCache class
+
+        Args:
+            capacity (int): most entries kept, 0 to keep none
+            name (str, optional): label of the cache in the metrics.
+                Defaults to cache.
+
+        Raises:
+            ValueError: If the capacity is negative
+        """
+        if not isinstance(capacity, int) or capacity < 0:
+            raise ValueError("capacity must be a non-negative integer")
+
+        self.capacity = capacity
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key):
+        """Get an entry and mark it as the most recently used
+
+        Args:
+            key: key of the entry
+
+        Returns:
+            the value, or None on a miss
+        """
+        with self.__lock:
+            value = self.__entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+        if REGISTRY.enabled:
+            _LOOKUPS.inc(self.name, "miss" if value is None else "hit")
+        return value
+
+    def put(self, key, value) -> None:
+        """Add or replace an entry, evicting the least recently used one
+        if the cache is full
+
+        Args:
+            key: key of the entry
+            value: value to keep, not None
+        """
+        if self.capacity == 0:
+            return
+
+        evicted = 0
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.capacity:
+                self.__entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted and REGISTRY.enabled:
+            _EVICTIONS.inc(self.name, amount=evicted)
+
+    def pop(self, key) -> None:
+        """Drop an entry if it is cached
+
+        Args:
+            key: key of the entry
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry. The counts are kept."""
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> dict:
+        """Counts of the cache
+
+        Returns:
+            dict: hits, misses, evictions, size and capacity
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self.__entries),
+                "capacity": self.capacity}
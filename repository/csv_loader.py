@@ -0,0 +1,138 @@
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Iterable
+
+PARALLEL_LOAD_MIN_BYTES = 8 * 1024 * 1024
+_BLOCK_SIZE = 1024 * 1024
+# workers are started from a clean server process rather than forked from
+# the caller, which may have other threads holding locks
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() \
+    else "spawn"
+
+
+def _as_row(fieldnames: list[str], record: list[str]) -> dict:
+    """Turn a csv record into a row the way csv.DictReader does: missing
+    fields are None and extra fields are listed under the None key"""
+    row = dict(zip(fieldnames, record))
+    if len(record) > len(fieldnames):
+        row[None] = record[len(fieldnames):]
+    elif len(record) < len(fieldnames):
+        for name in fieldnames[len(record):]:
+            row[name] = None
+    return row
+
+
+def split_records(path: str, chunks: int) -> tuple[list[str], list[tuple[int, int]]]:
+    """Split a csv file into byte ranges that start and end on record
+    boundaries
+
+    A newline only ends a record when an even number of quotes comes
+    before it; quoted fields can hold newlines, and quotes inside them
+    are doubled. The file is scanned in blocks, so memory does not grow
+    with its size.
+
+    Args:
+        path (str): csv file with a header line
+        chunks (int): number of ranges wanted. Fewer are returned for
+            files with fewer records.
+
+    Returns:
+        tuple[list[str], list[tuple[int, int]]]: field names of the
+            header and the (start, end) offsets of the ranges
+    """
+    size = os.path.getsize(path)
+    with open(path, mode='rb') as file:
+        header = file.readline()
+        fieldnames = next(csv.reader([header.decode()]), [])
+        start = len(header)
+        targets = iter([start + (size - start) * number // chunks
+                        for number in range(1, chunks)])
+        target = next(targets, None)
+        starts = [start]
+        offset = start
+        quotes = 0
+        while target is not None:
+            block = file.read(_BLOCK_SIZE)
+            if not block:
+                break
+
+            position = max(target - offset, 0)
+            while target is not None:
+                newline = block.find(b'\n', position)
+                if newline < 0:
+                    break
+                position = newline + 1
+                if (quotes + block.count(b'"', 0, newline)) % 2:
+                    continue
+
+                starts.append(offset + position)
+                while target is not None and target < offset + position:
+                    target = next(targets, None)
+                if target is not None:
+                    position = max(target - offset, position)
+            quotes += block.count(b'"')
+            offset += len(block)
+
+    ends = starts[1:] + [size]
+    return fieldnames, [(begin, end) for begin, end in zip(starts, ends) if begin < end]
+
+
+def read_range(path: str, start: int, end: int, fieldnames: list[str]) -> list[dict]:
+    """Parse the records in a byte range of a csv file
+
+    Args:
+        path (str): csv file
+        start (int): offset of the first record
+        end (int): offset just past the last record
+        fieldnames (list[str]): field names of the header
+
+    Returns:
+        list[dict]: the rows, as csv.DictReader would return them
+    """
+    with open(path, mode='rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    reader = csv.reader(io.StringIO(data.decode(), newline=''))
+    return [_as_row(fieldnames, record) for record in reader if record]
+
+
+def read_rows(path: str, workers: int = None,
+              min_bytes: int = PARALLEL_LOAD_MIN_BYTES) -> Iterable[dict]:
+    """Read every row of a csv file, parsing chunks of large files in
+    worker processes
+
+    Files smaller than `min_bytes`, or a single worker, are read by
+    csv.DictReader in this process, since starting processes costs more
+    than it saves on them. Rows come back in file order either way. The
+    workers are not forked from this process, so it is safe to call from
+    any thread.
+
+    Args:
+        path (str): csv file with a header line
+        workers (int, optional): processes parsing the file.
+            Defaults to the number of CPUs.
+        min_bytes (int, optional): smallest file parsed in parallel.
+            Defaults to 8 MiB.
+
+    Returns:
+        Iterable[dict]: the rows
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or os.path.getsize(path) < min_bytes:
+        with open(path, mode='r', newline='') as file:
+            return list(csv.DictReader(f=file))
+
+    fieldnames, ranges = split_records(path, workers)
+    if len(ranges) < 2:
+        return read_range(path, *ranges[0], fieldnames) if ranges else []
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                             mp_context=multiprocessing.get_context(_START_METHOD)) as pool:
+        chunks = pool.map(read_range, [path] * len(ranges),
+                          *zip(*ranges), [fieldnames] * len(ranges))
+        return list(chain.from_iterable(chunks))
@@ -0,0 +1,62 @@
+from interfaces.db import Database
+from repository.sharded_user_db import ShardedUserDatabase
+from repository.user_db import UserDatabase
+from repository.sqlite_user_db import SqliteUserDatabase
+
+CSV_ENGINE = "csv"
+SQLITE_ENGINE = "sqlite"
+ENGINES = (CSV_ENGINE, SQLITE_ENGINE)
+
+
+def resolve_engine(file: str, engine: str = None) -> str:
+    """Work out which storage engine to use for a file
+
+    Args:
+        file (str): file where data is stored
+        engine (str, optional): engine to force. Defaults to None, which
+            picks the engine from the file extension.
+
+    Raises:
+        ValueError: If the engine is unknown
+
+    Returns:
+        str: name of the engine
+    """
+    if engine is not None:
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+        return engine
+
+    if file is not None and file.endswith(SqliteUserDatabase.EXTENSIONS):
+        return SQLITE_ENGINE
+    return CSV_ENGINE
+
+
+def open_database(file: str, engine: str = None,
+                  journal: bool = False, shards: int = None,
+                  concurrent: bool = False) -> Database:
+    """Open a user database with the right storage engine
+
+    Args:
+        file (str): file where data is stored
+        engine (str, optional): "csv" or "sqlite". Defaults to None, which
+            picks the engine from the file extension.
+        journal (bool, optional): Use the journaled persistence mode of
+            the csv engine. Ignored by SQLite, which has its own
+            write-ahead log. Defaults to False.
+        shards (int, optional): Split a csv database over this many shard
+            files. Defaults to None, a single file.
+        concurrent (bool, optional): Make a csv database safe to share
+            between threads and processes. SQLite databases always are.
+            Defaults to False.
+
+    Returns:
+        Database: the opened database
+    """
+    if resolve_engine(file, engine) == SQLITE_ENGINE:
+        return SqliteUserDatabase(file_to_connect_to=file)
+    if shards is not None:
+        return ShardedUserDatabase(file_to_connect_to=file, shards=shards,
+                                   journal=journal, concurrent=concurrent)
+    return UserDatabase(file_to_connect_to=file, journal=journal,
+                        concurrent=concurrent)
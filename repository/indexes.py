@@ -0,0 +1,117 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable
+from utils.timestamps import timestamp_key
+
+ORDER_BY_ID = "id"
+ORDER_BY_CREATED_AT = "created_at"
+ORDERS = (ORDER_BY_ID, ORDER_BY_CREATED_AT)
+# not a paging order: only used to search users by name prefix
+BY_NAME = "name"
+INDEXES = ORDERS + (BY_NAME,)
+
+
+def name_key(name: str) -> str:
+    """Case-folded form of a name, as kept in the name index
+
+    Args:
+        name (str): name or prefix of a name, None for no name
+
+    Returns:
+        str: the folded name
+    """
+    return (name or "").casefold()
+
+
+def sort_key(order_by: str, row: dict) -> str | tuple[int, str]:
+    """Key of a row in a sorted index
+
+    Rows ordered by id are keyed by their id. Rows ordered by creation
+    time are keyed by (epoch seconds, id), so rows created in the same
+    second still have a unique, stable position. Rows in the name index
+    are keyed by (case-folded name, id) for the same reason.
+
+    Args:
+        order_by (str): id, created_at or name
+        row (dict): stored row
+
+    Raises:
+        ValueError: If the order is unknown
+
+    Returns:
+        str | tuple: the key
+    """
+    if order_by == ORDER_BY_ID:
+        return row.get('id')
+    if order_by == ORDER_BY_CREATED_AT:
+        return timestamp_key(row.get('created_at')), row.get('id')
+    if order_by == BY_NAME:
+        return name_key(row.get('name')), row.get('id')
+    raise ValueError(f"order_by must be one of {', '.join(INDEXES)}")
+
+
+class SortedIndex:
+    """Sorted list of unique keys, maintained with binary search.
+
+    Used for keyset pagination: the keys that follow a given key are
+    found with one bisection, whatever the size of the index.
+    """
+
+    def __init__(self, keys: Iterable[Any] = ()) -> None:
+        """Constructor for the SortedIndex class
+
+        Args:
+            keys (Iterable[Any], optional): keys to start with. Defaults to
+                no keys.
+        """
+        self.__keys = sorted(set(keys))
+
+    def __len__(self) -> int:
+        """Number of keys in the index"""
+        return len(self.__keys)
+
+    def insert(self, key: Any) -> None:
+        """Add a key, unless it is already in the index
+
+        Args:
+            key (Any): key to add
+        """
+        position = bisect_left(self.__keys, key)
+        if position == len(self.__keys) or self.__keys[position] != key:
+            self.__keys.insert(position, key)
+
+    def remove(self, key: Any) -> None:
+        """Remove a key if it is in the index
+
+        Args:
+            key (Any): key to remove
+        """
+        position = bisect_left(self.__keys, key)
+        if position < len(self.__keys) and self.__keys[position] == key:
+            del self.__keys[position]
+
+    def after(self, key: Any = None, limit: int = 100) -> list[Any]:
+        """Get the keys that follow a key
+
+        Args:
+            key (Any, optional): key to start after. Defaults to None,
+                which starts at the first key.
+            limit (int, optional): maximum number of keys. Defaults to 100.
+
+        Returns:
+            list[Any]: up to `limit` keys, in order
+        """
+        start = 0 if key is None else bisect_right(self.__keys, key)
+        return self.__keys[start:start + limit]
+
+    def starting_at(self, key: Any, limit: int = 100) -> list[Any]:
+        """Get a key, if it is in the index, and the keys that follow it
+
+        Args:
+            key (Any): key to start at
+            limit (int, optional): maximum number of keys. Defaults to 100.
+
+        Returns:
+            list[Any]: up to `limit` keys, in order
+        """
+        start = bisect_left(self.__keys, key)
+        return self.__keys[start:start + limit]
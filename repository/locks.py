@@ -0,0 +1,149 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class ReadWriteLock:
+    """Reader-writer lock for threads.
+
+    Any number of threads can hold the lock for reading at the same time;
+    a writer holds it alone. Waiting writers block new readers so writes
+    are not starved. Both sides are reentrant, and a thread holding the
+    write lock may also take the read lock.
+    """
+
+    def __init__(self) -> None:
+        """Constructor for the ReadWriteLock class"""
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__writes = 0
+        self.__waiting_writers = 0
+        self.__local = threading.local()
+
+    def acquire_read(self) -> None:
+        """Acquire the lock for reading"""
+        depth = getattr(self.__local, "reads", 0)
+        if depth > 0 or self.__writer == threading.get_ident():
+            self.__local.reads = depth + 1
+            return
+
+        with self.__condition:
+            while self.__writer is not None or self.__waiting_writers:
+                self.__condition.wait()
+            self.__readers += 1
+        self.__local.reads = 1
+
+    def release_read(self) -> None:
+        """Release the lock after reading"""
+        self.__local.reads -= 1
+        if self.__local.reads > 0 or self.__writer == threading.get_ident():
+            return
+
+        with self.__condition:
+            self.__readers -= 1
+            if self.__readers == 0:
+                self.__condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """Acquire the lock for writing"""
+        me = threading.get_ident()
+        with self.__condition:
+            if self.__writer == me:
+                self.__writes += 1
+                return
+
+            self.__waiting_writers += 1
+            while self.__writer is not None or self.__readers:
+                self.__condition.wait()
+            self.__waiting_writers -= 1
+            self.__writer = me
+            self.__writes = 1
+
+    def release_write(self) -> None:
+        """Release the lock after writing"""
+        with self.__condition:
+            self.__writes -= 1
+            if self.__writes == 0:
+                self.__writer = None
+                self.__condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Context manager holding the lock for reading"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Context manager holding the lock for writing"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class NullLock:
+    """Lock with the ReadWriteLock and FileLock API that does nothing.
+    Used when a database is not shared between threads or processes."""
+
+    @contextmanager
+    def read(self):
+        yield
+
+    @contextmanager
+    def write(self):
+        yield
+
+    @contextmanager
+    def shared(self):
+        yield
+
+    @contextmanager
+    def exclusive(self):
+        yield
+
+
+class FileLock:
+    """Advisory lock on a file shared between processes, using fcntl.flock
+    on a separate lock file. On platforms without fcntl it does nothing.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Constructor for the FileLock class
+
+        Args:
+            path (str): lock file. It is created if it does not exist.
+        """
+        self.__path = path
+
+    @contextmanager
+    def __lock(self, operation: int):
+        if fcntl is None:
+            yield
+            return
+
+        descriptor = os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(descriptor, operation)
+            yield
+        finally:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+            os.close(descriptor)
+
+    def shared(self):
+        """Context manager holding a shared lock, for reading files"""
+        return self.__lock(fcntl.LOCK_SH if fcntl else 0)
+
+    def exclusive(self):
+        """Context manager holding an exclusive lock, for writing files"""
+        return self.__lock(fcntl.LOCK_EX if fcntl else 0)
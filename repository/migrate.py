@@ -0,0 +1,128 @@
+"""One-shot migration of stored timestamps to another format.
+
+Run from the project root:
+
+    python -m repository.migrate storage/data.csv [--format iso|epoch|legacy]
+
+CSV files are rewritten through a temporary file together with their
+journal, if one exists. SQLite databases are updated in a single
+transaction. Rows that are already in the target format are left as
+they are, so the migration can be run more than once.
+"""
+import csv
+import os
+import sqlite3
+import sys
+from repository.sqlite_user_db import SqliteUserDatabase
+from utils.timestamps import FORMATS, ISO, convert_timestamp
+
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+
+def migrate_csv(file: str, timestamp_format: str = ISO) -> int:
+    """Rewrite the timestamps of a csv user file and its journal
+
+    Args:
+        file (str): csv file to migrate
+        timestamp_format (str, optional): format to convert to.
+            Defaults to iso.
+
+    Returns:
+        int: number of rows rewritten
+    """
+    count = 0
+    temp_file = f"{file}.tmp"
+    with open(file, mode='r', newline='') as source, \
+            open(temp_file, mode='w', newline='') as target:
+        reader = csv.DictReader(f=source)
+        writer = csv.DictWriter(f=target, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        for row in reader:
+            for field in TIMESTAMP_FIELDS:
+                row[field] = convert_timestamp(row.get(field), timestamp_format)
+            writer.writerow(row)
+            count += 1
+    os.replace(temp_file, file)
+
+    journal_file = f"{file}.journal"
+    if os.path.exists(journal_file):
+        # put records are the op code followed by the row fields, with the
+        # timestamps in the last two columns
+        with open(journal_file, mode='r', newline='') as source, \
+                open(temp_file, mode='w', newline='') as target:
+            writer = csv.writer(target)
+            for record in csv.reader(source):
+                if record and record[0] == "P":
+                    record[-2] = convert_timestamp(record[-2], timestamp_format)
+                    record[-1] = convert_timestamp(record[-1], timestamp_format)
+                    count += 1
+                writer.writerow(record)
+        os.replace(temp_file, journal_file)
+    return count
+
+
+def migrate_sqlite(file: str, timestamp_format: str = ISO) -> int:
+    """Rewrite the timestamps of a SQLite user database
+
+    Args:
+        file (str): SQLite file to migrate
+        timestamp_format (str, optional): format to convert to.
+            Defaults to iso.
+
+    Returns:
+        int: number of rows rewritten
+    """
+    connection = sqlite3.connect(file)
+    try:
+        rows = [
+            (convert_timestamp(created_at, timestamp_format),
+             convert_timestamp(updated_at, timestamp_format), id)
+            for id, created_at, updated_at in connection.execute(
+                "SELECT id, created_at, updated_at FROM users")
+        ]
+        with connection:
+            connection.executemany(
+                "UPDATE users SET created_at = ?, updated_at = ? WHERE id = ?",
+                rows)
+    finally:
+        connection.close()
+    return len(rows)
+
+
+def migrate(file: str, timestamp_format: str = ISO) -> int:
+    """Rewrite the timestamps of a user csv file or SQLite database
+
+    Args:
+        file (str): file to migrate
+        timestamp_format (str, optional): format to convert to.
+            Defaults to iso.
+
+    Raises:
+        ValueError: If the format is unknown
+        FileNotFoundError: If the file does not exist
+
+    Returns:
+        int: number of rows rewritten
+    """
+    if timestamp_format not in FORMATS:
+        raise ValueError(f"timestamp_format must be one of {', '.join(FORMATS)}")
+
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"File {file} was not found.")
+
+    if file.endswith(SqliteUserDatabase.EXTENSIONS):
+        return migrate_sqlite(file, timestamp_format)
+    return migrate_csv(file, timestamp_format)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    timestamp_format = ISO
+    if "--format" in args:
+        index = args.index("--format")
+        timestamp_format = args[index + 1]
+        del args[index:index + 2]
+    if len(args) != 1:
+        sys.exit("usage: python -m repository.migrate FILE [--format iso|epoch|legacy]")
+    count = migrate(args[0], timestamp_format)
+    print(f"Migrated {count} rows of {args[0]} to {timestamp_format} timestamps.")
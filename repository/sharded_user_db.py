@@ -0,0 +1,306 @@
+import heapq
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Generator, Iterable
+from interfaces.db import Database
+from models.user import User
+from repository.indexes import name_key
+from repository.user_db import UserDatabase
+
+HEADER = "id,email,name,password,is_logged_in,created_at,updated_at\n"
+
+
+def shard_files(file: str, shards: int) -> list[str]:
+    """Names of the shard files of a sharded database
+
+    The shard count is part of every name, so opening the files with a
+    different count, which would route ids to the wrong shard, finds no
+    files instead.
+
+    Args:
+        file (str): csv file the shards are named after, eg data.csv
+        shards (int): number of shards
+
+    Returns:
+        list[str]: eg data.0-of-4.csv ... data.3-of-4.csv
+    """
+    base = file[:-len('.csv')]
+    return [f"{base}.{number}-of-{shards}.csv" for number in range(shards)]
+
+
+def shard_of(id: str, shards: int) -> int:
+    """Shard a user id belongs to
+
+    crc32 is used instead of `hash`, which is salted per process.
+
+    Args:
+        id (str): user id
+        shards (int): number of shards
+
+    Returns:
+        int: shard number
+    """
+    return zlib.crc32(id.encode()) % shards
+
+
+class ShardedUserDatabase(Database):
+    """User database split over several csv files by a hash of the id.
+
+    Every shard is a UserDatabase of its own, so a save only rewrites the
+    shards changed since the last save, and shards are loaded and saved
+    in parallel. An email to shard index keeps lookups by email to a
+    single shard. Each shard file can only be used by one process at a
+    time.
+
+    Args:
+        Database: Database interface
+    """
+
+    def __init__(self, file_to_connect_to: str, shards: int = 4,
+                 workers: int = None, **options) -> None:
+        """Constructor for ShardedUserDatabase class
+
+        Args:
+            file_to_connect_to (str): csv file the shard files are named
+                after. Missing shard files are created.
+            shards (int, optional): number of shards. Defaults to 4.
+            workers (int, optional): threads loading and saving shards.
+                Defaults to one per shard.
+            **options: passed to the UserDatabase of every shard, eg
+                journal=True
+
+        Raises:
+            ValueError: If the file is None or the shard count is not
+                positive
+            TypeError: If the file is not a csv file
+        """
+        if file_to_connect_to is None:
+            raise ValueError('File cannot be None')
+
+        if not file_to_connect_to.endswith('.csv'):
+            raise TypeError('File type must be a csv. Eg abc.csv')
+
+        if not isinstance(shards, int) or shards < 1:
+            raise ValueError("shards must be a positive integer")
+
+        self._file = file_to_connect_to
+        self.__files = shard_files(file_to_connect_to, shards)
+        self.__lock = threading.RLock()
+        self.__dirty = set()
+        self.__pool = ThreadPoolExecutor(max_workers=workers or shards,
+                                         thread_name_prefix="shard")
+
+        for file in self.__files:
+            if not os.path.exists(file):
+                with open(file, mode='w', newline='') as handle:
+                    handle.write(HEADER)
+
+        self.__shards = list(self.__pool.map(
+            lambda file: UserDatabase(file, **options), self.__files))
+        self.__emails = {}
+        for number, shard in enumerate(self.__shards):
+            for row in shard.users:
+                self.__emails[row.get('email')] = number
+
+    @property
+    def shard_files(self) -> list[str]:
+        """Files of the shards"""
+        return list(self.__files)
+
+    @property
+    def timestamp_format(self) -> str:
+        """Format of the timestamps written to the files"""
+        return self.__shards[0].timestamp_format
+
+    @property
+    def users(self) -> list:
+        """Property to get the users
+
+        Returns:
+            list: List of users
+        """
+        return list(chain.from_iterable(shard.users for shard in self.__shards))
+
+    def __shard(self, id: str) -> int:
+        """Private method to get the shard number of an id"""
+        return shard_of(id, len(self.__shards))
+
+    def get_user_by_email(self, email: str) -> User:
+        """Method to check if email already exists
+
+        Args:
+            email (str): email to check
+
+        Returns:
+            bool: true or false
+        """
+        number = self.__emails.get(email)
+        if number is None:
+            return False
+        return self.__shards[number].get_user_by_email(email)
+
+    def add(self, item: User) -> User:
+        """Adds a user object to the shard of its id
+
+        Args:
+            item (User): User object to add to the database
+
+        Raises:
+            ValueError: If the user already exists
+
+        Returns:
+            User: the user object added to the database
+        """
+        if item is None:
+            raise ValueError("Item cannot be None")
+
+        if not isinstance(item, User):
+            raise TypeError("item must be of type User")
+
+        with self.__lock:
+            if item.email in self.__emails:
+                raise ValueError(f"email {item.email} already exists")
+
+            number = self.__shard(item.id)
+            self.__shards[number].add(item)
+            self.__emails[item.email] = number
+            self.__dirty.add(number)
+        return item
+
+    def add_many(self, items: Iterable[User]) -> list[tuple[int, str]]:
+        """Adds many user objects to the database
+
+        Args:
+            items (Iterable[User]): User objects to add to the database
+
+        Returns:
+            list[tuple[int, str]]: position in `items` and error message of
+                every user that was not added
+        """
+        errors = []
+        with self.__lock:
+            for position, item in enumerate(items):
+                try:
+                    self.add(item)
+                except (ValueError, TypeError) as e:
+                    errors.append((position, str(e)))
+        return errors
+
+    def update(self, id: str, item: dict) -> User:
+        """Updates a user object in the shard of its id
+
+        Args:
+            id (str): unique identity of user to update
+            item (dict): item to update the user with
+
+        Returns:
+            User: the updated user object
+        """
+        if item is None:
+            raise ValueError("item cannot be None")
+
+        if not isinstance(item, dict):
+            raise TypeError("item must be of type dict")
+
+        if not isinstance(id, str):
+            return None
+
+        with self.__lock:
+            number = self.__shard(id)
+            email = item.get('email')
+            if email is not None and self.__emails.get(email, number) != number:
+                raise ValueError(f"email {email} already exists")
+
+            current = self.__shards[number].get(id)
+            user = self.__shards[number].update(id, item)
+            if user is None:
+                return None
+
+            self.__emails.pop(current[0].email, None)
+            self.__emails[user.email] = number
+            self.__dirty.add(number)
+        return user
+
+    def all(self) -> Generator[User, None, None]:
+        """Method to get all users from the database, shard after shard
+
+        Returns:
+            Generator[User, None, None]: A generator of all users in the database
+        """
+        for shard in self.__shards:
+            yield from shard.all()
+
+    def scan(self, order_by: str, after: str | tuple = None,
+             chunk_size: int = 256) -> Generator[tuple, None, None]:
+        """Method to walk the users in id or creation order, merging the
+        scans of the shards. See UserDatabase.scan.
+
+        Returns:
+            Generator[tuple, None, None]: (key, user) pairs, in key order
+        """
+        return heapq.merge(*(shard.scan(order_by, after, chunk_size)
+                             for shard in self.__shards),
+                           key=lambda pair: pair[0])
+
+    def search_by_name(self, prefix: str, limit: int = 20) -> list[User]:
+        """Method to find the users whose name starts with a prefix,
+        ignoring case, merging the matches of every shard. See
+        UserDatabase.search_by_name.
+
+        Returns:
+            list[User]: matching users, ordered by name
+        """
+        return heapq.nsmallest(
+            limit, chain.from_iterable(shard.search_by_name(prefix, limit)
+                                       for shard in self.__shards),
+            key=lambda user: (name_key(user.name), user.id))
+
+    def delete(self, id: str):
+        """Method to delete a user from the database
+
+        Args:
+            id (str): The id of the user to delete
+        """
+        if not isinstance(id, str):
+            raise ValueError(f"User with id {id} does not exist")
+
+        with self.__lock:
+            number = self.__shard(id)
+            current = self.__shards[number].get(id)
+            self.__shards[number].delete(id)
+            self.__emails.pop(current[0].email, None)
+            self.__dirty.add(number)
+
+    def get(self, id: str) -> tuple[User, dict]:
+        """Method to get a user object from the database
+
+        Args:
+            id (str): The id of the user to get
+
+        Returns:
+            User: The user object
+        """
+        if not isinstance(id, str):
+            return None
+        return self.__shards[self.__shard(id)].get(id)
+
+    def save(self) -> None:
+        """Method to save the shards changed since the last save, in
+        parallel
+        """
+        with self.__lock:
+            saves = {number: self.__pool.submit(self.__shards[number].save)
+                     for number in sorted(self.__dirty)}
+            self.__dirty = {number for number, save in saves.items()
+                            if save.exception() is not None}
+            for save in saves.values():
+                save.result()
+
+    def close(self) -> None:
+        """Method to save pending changes and stop the worker threads
+        """
+        self.save()
+        self.__pool.shutdown()
@@ -0,0 +1,271 @@
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator
+from repository.bloom import BloomFilter
+from utils.metrics import REGISTRY
+
+MAGIC = b"AUTHSNAP"
+VERSION = 2
+
+# magic, version, field count, record count, csv mtime_ns, csv size,
+# offset of the record offset table, of the id index, of the email index,
+# offset and length of the email filter
+_HEADER = struct.Struct("<8sIIIqqQQQQQ")
+_OFFSET = struct.Struct("<Q")
+_NUMBER = struct.Struct("<I")
+_LENGTH = struct.Struct("<I")
+
+_FILTER_CHECKS = REGISTRY.counter(
+    "email_filter_checks_total",
+    "Snapshot email lookups by what the email filter answered", ("result",))
+_FILTER_FALSE_POSITIVES = REGISTRY.counter(
+    "email_filter_false_positives_total",
+    "Snapshot email lookups the filter let through that found nothing")
+_FILTER_RATE = REGISTRY.gauge(
+    "email_filter_false_positive_rate",
+    "Expected false positive rate of the loaded email filter")
+
+
+def normalize_email(email: str) -> str:
+    """Form of an email kept in the email filter"""
+    return email.strip().lower()
+
+
+def write_snapshot(path: str, rows: Iterable[dict], fieldnames: list[str],
+                   source: tuple[int, int] = (0, 0),
+                   error_rate: float = 0.01) -> None:
+    """Write rows to a binary snapshot file
+
+    The file holds a header, a table with the offset of every record, the
+    record numbers sorted by id and by email, a bloom filter of the
+    normalized emails and the records themselves, each a sequence of
+    length-prefixed utf-8 fields. It is written to a temporary file first
+    and moved into place.
+
+    Args:
+        path (str): snapshot file
+        rows (Iterable[dict]): rows to write
+        fieldnames (list[str]): fields of a row, id and email first
+        source (tuple[int, int], optional): modification time in ns and
+            size of the csv file the rows come from, used to tell if the
+            snapshot is stale. Defaults to (0, 0).
+        error_rate (float, optional): false positive rate of the email
+            filter. Defaults to 0.01.
+    """
+    records = []
+    ids = []
+    emails = []
+    for row in rows:
+        values = ["" if row.get(name) is None else str(row.get(name))
+                  for name in fieldnames]
+        encoded = b"".join(_LENGTH.pack(len(data)) + data
+                           for data in (value.encode() for value in values))
+        records.append(encoded)
+        ids.append(values[0])
+        emails.append(values[1])
+
+    count = len(records)
+    email_filter = BloomFilter.from_items(
+        (normalize_email(email) for email in emails), count, error_rate).to_bytes()
+    offsets_at = _HEADER.size
+    id_index_at = offsets_at + count * _OFFSET.size
+    email_index_at = id_index_at + count * _NUMBER.size
+    filter_at = email_index_at + count * _NUMBER.size
+    position = filter_at + len(email_filter)
+
+    offsets = []
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    with open(temp_file, mode="wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, len(fieldnames), count,
+                                 source[0], source[1], offsets_at,
+                                 id_index_at, email_index_at, filter_at,
+                                 len(email_filter)))
+        file.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+        for keys in (ids, emails):
+            order = sorted(range(count), key=keys.__getitem__)
+            file.write(b"".join(_NUMBER.pack(number) for number in order))
+        file.write(email_filter)
+        for record in records:
+            file.write(record)
+    os.replace(temp_file, path)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Opening a snapshot only reads its header. Records are decoded when
+    they are accessed, and lookups by id or email binary search the
+    sorted indexes, so the cost of opening and of a lookup does not
+    depend on the number of users. Emails that are not in the snapshot
+    are usually turned away by the email filter without a search.
+    """
+
+    def __init__(self, path: str, fieldnames: list[str]) -> None:
+        """Constructor for the Snapshot class
+
+        Args:
+            path (str): snapshot file
+            fieldnames (list[str]): fields of a row, id and email first
+
+        Raises:
+            ValueError: If the file is not a snapshot with these fields
+        """
+        self.__fieldnames = fieldnames
+        with open(path, mode="rb") as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self.__read_header(path)
+        except (ValueError, struct.error):
+            self.__map.close()
+            raise ValueError(f"{path} is not a compatible snapshot file")
+        _FILTER_RATE.set(self.__email_filter.false_positive_rate)
+
+    def __read_header(self, path: str) -> None:
+        """Private method to read the header and check that the tables it
+        points to fit in the file
+
+        Args:
+            path (str): snapshot file
+
+        Raises:
+            ValueError: If the header is not valid or the file is too short
+        """
+        size = len(self.__map)
+        if size < _HEADER.size:
+            raise ValueError(f"{path} is shorter than a snapshot header")
+
+        (magic, version, fields, self.__count, mtime, csv_size, self.__offsets_at,
+         self.__id_index_at, self.__email_index_at, filter_at,
+         filter_length) = _HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC or version != VERSION or fields != len(self.__fieldnames):
+            raise ValueError(f"{path} is not a compatible snapshot file")
+
+        tables = ((self.__offsets_at, self.__count * _OFFSET.size),
+                  (self.__id_index_at, self.__count * _NUMBER.size),
+                  (self.__email_index_at, self.__count * _NUMBER.size),
+                  (filter_at, filter_length))
+        if any(start + length > size for start, length in tables):
+            raise ValueError(f"{path} is truncated")
+        if self.__count and _OFFSET.unpack_from(
+                self.__map, self.__offsets_at + (self.__count - 1) * _OFFSET.size)[0] \
+                + len(self.__fieldnames) * _LENGTH.size > size:
+            raise ValueError(f"{path} is truncated")
+
+        self.__source = (mtime, csv_size)
+        self.__email_filter = BloomFilter.from_bytes(
+            self.__map[filter_at:filter_at + filter_length])
+
+    @property
+    def source(self) -> tuple[int, int]:
+        """Modification time in ns and size of the csv file the snapshot
+        was made from"""
+        return self.__source
+
+    @property
+    def email_filter(self) -> BloomFilter:
+        """Bloom filter of the normalized emails in the snapshot"""
+        return self.__email_filter
+
+    def __len__(self) -> int:
+        """Number of records in the snapshot"""
+        return self.__count
+
+    def __field(self, number: int, field: int) -> str:
+        """Private method to decode one field of a record
+
+        Args:
+            number (int): record number
+            field (int): position of the field
+
+        Returns:
+            str: the field
+        """
+        position = _OFFSET.unpack_from(
+            self.__map, self.__offsets_at + number * _OFFSET.size)[0]
+        for _ in range(field):
+            position += _LENGTH.size + _LENGTH.unpack_from(self.__map, position)[0]
+        length = _LENGTH.unpack_from(self.__map, position)[0]
+        start = position + _LENGTH.size
+        return self.__map[start:start + length].decode()
+
+    def row(self, number: int) -> dict:
+        """Decode a record
+
+        Args:
+            number (int): record number
+
+        Returns:
+            dict: the row
+        """
+        position = _OFFSET.unpack_from(
+            self.__map, self.__offsets_at + number * _OFFSET.size)[0]
+        row = {}
+        for name in self.__fieldnames:
+            length = _LENGTH.unpack_from(self.__map, position)[0]
+            start = position + _LENGTH.size
+            row[name] = self.__map[start:start + length].decode()
+            position = start + length
+        return row
+
+    def __search(self, index_at: int, field: int, key: str) -> dict | None:
+        """Private method to binary search a sorted index
+
+        Args:
+            index_at (int): offset of the index
+            field (int): position of the indexed field
+            key (str): value to look for
+
+        Returns:
+            dict | None: the matching row or None
+        """
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            number = _NUMBER.unpack_from(
+                self.__map, index_at + middle * _NUMBER.size)[0]
+            value = self.__field(number, field)
+            if value == key:
+                return self.row(number)
+            if value < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def find_by_id(self, id: str) -> dict | None:
+        """Find a row by id"""
+        if not isinstance(id, str):
+            return None
+        return self.__search(self.__id_index_at, 0, id)
+
+    def find_by_email(self, email: str) -> dict | None:
+        """Find a row by email"""
+        if not isinstance(email, str):
+            return None
+
+        if normalize_email(email) not in self.__email_filter:
+            if REGISTRY.enabled:
+                _FILTER_CHECKS.inc("definite_miss")
+            return None
+
+        row = self.__search(self.__email_index_at, 1, email)
+        if REGISTRY.enabled:
+            _FILTER_CHECKS.inc("maybe")
+            if row is None:
+                _FILTER_FALSE_POSITIVES.inc()
+        return row
+
+    def rows(self) -> Iterator[dict]:
+        """Decode every record, in the order they were written"""
+        for number in range(self.__count):
+            yield self.row(number)
+
+    def close(self) -> None:
+        """Unmap the snapshot file"""
+        self.__map.close()
@@ -0,0 +1,468 @@
+import sqlite3
+import string
+import threading
+from datetime import datetime, timezone
+from typing import Generator, Iterable
+from interfaces.db import Database
+from repository.indexes import ORDER_BY_ID, ORDERS
+from models.user import User
+from models.user_view import UserView
+from utils.metrics import timed
+from utils.passwords import is_password_hash
+from utils.timestamps import EPOCH, FORMATS, ISO, detect_format, \
+    format_timestamp, timestamp_key
+
+
+class SqliteUserDatabase(Database):
+    """SqliteUserDatabase class.
+
+    Stores users in a SQLite database file instead of a csv file. Rows
+    are only read when they are asked for, so lookups and writes do not
+    depend on the number of users and the dataset does not have to fit
+    in memory.
+
+    Args:
+        Database: Database interface
+    """
+
+    EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+    __FIELDNAMES = ["id", "email", "name", "password",
+                    "is_logged_in", "created_at", "updated_at"]
+    __UPDATABLE_FIELDS = ["email", "name", "password", "is_logged_in"]
+
+    __SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS users (
+            id TEXT NOT NULL PRIMARY KEY,
+            email TEXT NOT NULL,
+            name TEXT,
+            password TEXT,
+            is_logged_in TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        ) WITHOUT ROWID""",
+        # the primary key already indexes id; drop the copy older files have
+        "DROP INDEX IF EXISTS users_id",
+        "CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (email)",
+        "CREATE INDEX IF NOT EXISTS users_name_nocase ON users (name COLLATE NOCASE, id)",
+    )
+    __SELECT_BY_ID = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users WHERE id = ?"
+    __SELECT_BY_EMAIL = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users WHERE email = ?"
+    __SELECT_ALL = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users"
+    __SELECT_AFTER_ID = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users WHERE id > ? ORDER BY id LIMIT ?"
+    __SELECT_AFTER_ISO = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users WHERE (created_at, id) > (?, ?) " \
+        "ORDER BY created_at, id LIMIT ?"
+    __SELECT_AFTER_EPOCH = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users " \
+        "WHERE (CAST(created_at AS INTEGER), id) > (?, ?) " \
+        "ORDER BY CAST(created_at AS INTEGER), id LIMIT ?"
+    __CREATED_INDEXES = {
+        ISO: "CREATE INDEX IF NOT EXISTS users_created_at "
+             "ON users (created_at, id)",
+        EPOCH: "CREATE INDEX IF NOT EXISTS users_created_at_epoch "
+               "ON users (CAST(created_at AS INTEGER), id)",
+    }
+    __SELECT_FROM_NAME = "SELECT id, email, name, password, is_logged_in, " \
+        "created_at, updated_at FROM users WHERE name >= ? COLLATE NOCASE " \
+        "ORDER BY name COLLATE NOCASE, id"
+    __ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+    __SELECT_FIRST_CREATED_AT = "SELECT created_at FROM users LIMIT 1"
+    __INSERT = "INSERT INTO users (id, email, name, password, is_logged_in, " \
+        "created_at, updated_at) VALUES (:id, :email, :name, :password, " \
+        ":is_logged_in, :created_at, :updated_at)"
+    __UPDATE = "UPDATE users SET email = :email, name = :name, " \
+        "password = :password, is_logged_in = :is_logged_in, " \
+        "updated_at = :updated_at WHERE id = :id"
+    __DELETE = "DELETE FROM users WHERE id = ?"
+    __BATCH_SIZE = 500
+
+    def __init__(self, file_to_connect_to: str,
+                 timestamp_format: str = None) -> None:
+        """Constructor for SqliteUserDatabase class
+
+        Args:
+            file_to_connect_to (string): SQLite file where data is stored.
+                The file is created if it does not exist.
+            timestamp_format (str, optional): legacy, iso or epoch format
+                for timestamps written from now on. Defaults to None, which
+                keeps the format of the stored rows, or iso for a new file.
+
+        Returns:
+            None
+        """
+        if file_to_connect_to is None:
+            raise ValueError('File cannot be None')
+
+        if not file_to_connect_to.endswith(SqliteUserDatabase.EXTENSIONS):
+            raise TypeError('File type must be a SQLite database. Eg abc.db')
+
+        if timestamp_format is not None and timestamp_format not in FORMATS:
+            raise ValueError(f"timestamp_format must be one of {', '.join(FORMATS)}")
+
+        self._file = file_to_connect_to
+        # one connection is shared by every thread of the service
+        self.__lock = threading.RLock()
+        self.__connection = sqlite3.connect(self._file, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SqliteUserDatabase.__SCHEMA:
+            self.__connection.execute(statement)
+        self.__connection.commit()
+
+        if timestamp_format is None:
+            first = self.__connection.execute(
+                SqliteUserDatabase.__SELECT_FIRST_CREATED_AT).fetchone()
+            timestamp_format = detect_format(first and first[0]) or ISO
+        self.__timestamp_format = timestamp_format
+
+    @property
+    def timestamp_format(self) -> str:
+        """Format of the timestamps written to the database"""
+        return self.__timestamp_format
+
+    def __fetch_one(self, query: str, value: str) -> dict:
+        """Private method to fetch a single row as a dictionary
+
+        Args:
+            query (str): query to run
+            value (str): value bound to the query
+
+        Returns:
+            dict: the row or None
+        """
+        with self.__lock:
+            row = self.__connection.execute(query, (value,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(SqliteUserDatabase.__FIELDNAMES, row))
+
+    def __integrity_error(self, error: sqlite3.IntegrityError,
+                          row: dict) -> ValueError:
+        """Private method to turn a constraint violation into a ValueError
+
+        Args:
+            error (sqlite3.IntegrityError): error raised by sqlite
+            row (dict): row that was written
+
+        Returns:
+            ValueError: the error to raise
+        """
+        if "email" in str(error):
+            return ValueError(f"email {row.get('email')} already exists")
+        return ValueError(f"user with id {row.get('id')} already exists")
+
+    @timed("database", "Database operations", engine="sqlite", operation="get_user_by_email")
+    def get_user_by_email(self, email: str) -> User:
+        """Method to check if email already exists
+
+        Args:
+            email (str): email to check
+
+        Returns:
+            bool: true or false
+        """
+        user = self.__fetch_one(SqliteUserDatabase.__SELECT_BY_EMAIL, email)
+        if user is None:
+            return False
+        return UserView(user)
+
+    def add(self, item: User) -> User:
+        """Adds a user object to the database
+
+        Args:
+            item (User): User object to add to the database
+
+        Raises:
+            ValueError: If the user already exists
+
+        Returns:
+            User: the user object added to the database
+        """
+        if item is None:
+            raise ValueError("Item cannot be None")
+
+        if not isinstance(item, User):
+            raise TypeError("item must be of type User")
+
+        row = item.to_dict(timestamp_format=self.__timestamp_format)
+        try:
+            with self.__lock:
+                self.__connection.execute(SqliteUserDatabase.__INSERT, row)
+        except sqlite3.IntegrityError as e:
+            raise self.__integrity_error(e, row)
+        return item
+
+    def __existing(self, column: str, values: list[str]) -> set[str]:
+        """Private method to find which values of a column are already stored
+
+        Args:
+            column (str): "id" or "email"
+            values (list[str]): values to look for
+
+        Returns:
+            set[str]: the values that are already stored
+        """
+        placeholders = ", ".join("?" * len(values))
+        query = f"SELECT {column} FROM users WHERE {column} IN ({placeholders})"
+        return {row[0] for row in self.__connection.execute(query, values)}
+
+    def add_many(self, items: Iterable[User]) -> list[tuple[int, str]]:
+        """Adds many user objects to the database in one pass
+
+        Users that fail (duplicate id or email, invalid item) are skipped
+        and reported instead of stopping the whole batch.
+
+        Args:
+            items (Iterable[User]): User objects to add to the database
+
+        Returns:
+            list[tuple[int, str]]: position in `items` and error message of
+                every user that was not added
+        """
+        errors = []
+        batch = []
+        with self.__lock:
+            for position, item in enumerate(items):
+                if item is None:
+                    errors.append((position, "Item cannot be None"))
+                elif not isinstance(item, User):
+                    errors.append((position, "item must be of type User"))
+                else:
+                    batch.append((position, item.to_dict(timestamp_format=self.__timestamp_format)))
+
+                if len(batch) == SqliteUserDatabase.__BATCH_SIZE:
+                    errors.extend(self.__insert_batch(batch))
+                    batch = []
+            errors.extend(self.__insert_batch(batch))
+        errors.sort()
+        return errors
+
+    def __insert_batch(self, batch: list[tuple[int, dict]]) -> list[tuple[int, str]]:
+        """Private method to insert a batch of rows, skipping duplicates
+
+        Args:
+            batch (list[tuple[int, dict]]): positions and rows to insert
+
+        Returns:
+            list[tuple[int, str]]: positions and errors of skipped rows
+        """
+        # callers hold the lock
+        if not batch:
+            return []
+
+        ids = self.__existing("id", [row.get("id") for _, row in batch])
+        emails = self.__existing("email", [row.get("email") for _, row in batch])
+        errors = []
+        rows = []
+        for position, row in batch:
+            if row.get("id") in ids:
+                errors.append((position, f"user with id {row.get('id')} already exists"))
+            elif row.get("email") in emails:
+                errors.append((position, f"email {row.get('email')} already exists"))
+            else:
+                ids.add(row.get("id"))
+                emails.add(row.get("email"))
+                rows.append(row)
+        self.__connection.executemany(SqliteUserDatabase.__INSERT, rows)
+        return errors
+
+    def update(self, id: str, item: dict) -> User:
+        """Updates a user object in the database
+
+        Args:
+            id (str): unique identity of user to update
+            item (dict): item to update the user with
+
+        Returns:
+            User: the updated user object
+        """
+        if item is None:
+            raise ValueError("item cannot be None")
+
+        if not isinstance(item, dict):
+            raise TypeError("item must be of type dict")
+
+        with self.__lock:
+            return self.__update(id, item)
+
+    def __update(self, id: str, item: dict) -> User:
+        """Private method to update a user. Callers hold the lock."""
+        found = self.get(id)
+        if found is None:
+            return None
+
+        user_dict = dict(found[1])
+        user_obj = found[0].to_user()
+        for key, value in item.items():
+            if key in SqliteUserDatabase.__UPDATABLE_FIELDS and value is not None:
+                if key == 'password' and is_password_hash(value):
+                    user_obj.password_hash = value
+                else:
+                    setattr(user_obj, key, value)
+                user_dict.update({key: value})
+        setattr(user_obj, 'updated_at', datetime.now(tz=timezone.utc))
+        user_dict.update({'updated_at': format_timestamp(
+            user_obj.updated_at, self.__timestamp_format)})
+        try:
+            self.__connection.execute(SqliteUserDatabase.__UPDATE, user_dict)
+        except sqlite3.IntegrityError as e:
+            raise self.__integrity_error(e, user_dict)
+        return user_obj
+
+    def all(self) -> Generator[User, None, None]:
+        """Method to get all users from the database
+
+        Returns:
+            Generator[User, None, None]: A generator of all users in the database
+        """
+        with self.__lock:
+            rows = self.__connection.execute(SqliteUserDatabase.__SELECT_ALL).fetchall()
+        for row in rows:
+            user = dict(zip(SqliteUserDatabase.__FIELDNAMES, row))
+            yield UserView(user)
+
+    def delete(self, id: str):
+        """Method to delete a user from the database
+
+        Args:
+            id (str): The id of the user to delete
+        """
+        with self.__lock:
+            cursor = self.__connection.execute(SqliteUserDatabase.__DELETE, (id,))
+        if cursor.rowcount == 0:
+            raise ValueError(f"User with id {id} does not exist")
+        return
+
+    @timed("database", "Database operations", engine="sqlite", operation="get")
+    def get(self, id: str) -> tuple[User, dict]:
+        """Method to get a user object from the database
+
+        Args:
+            id (str): The id of the user to get
+
+        Returns:
+            User: The user object
+        """
+        user = self.__fetch_one(SqliteUserDatabase.__SELECT_BY_ID, id)
+        if user is None:
+            return None
+        return UserView(user), user
+
+    def scan(self, order_by: str, after: str | tuple = None,
+             chunk_size: int = 256) -> Generator[tuple, None, None]:
+        """Method to walk the users in id or creation order
+
+        Every chunk is one keyset query on an index, so pages deep into
+        the table cost as much as the first one. Ordering by creation
+        time needs iso or epoch timestamps; legacy files can be converted
+        with `python -m repository.migrate`.
+
+        Args:
+            order_by (str): id or created_at
+            after (str | tuple, optional): key to start after, as yielded
+                by an earlier scan. Defaults to None, which starts at the
+                first user.
+            chunk_size (int, optional): users read per query.
+                Defaults to 256.
+
+        Raises:
+            ValueError: If the order is unknown, or creation order is asked
+                of a database with legacy timestamps
+
+        Returns:
+            Generator[tuple, None, None]: (key, user) pairs, in key order
+        """
+        if order_by not in ORDERS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDERS)}")
+
+        if order_by == ORDER_BY_ID:
+            query = SqliteUserDatabase.__SELECT_AFTER_ID
+        elif self.__timestamp_format in SqliteUserDatabase.__CREATED_INDEXES:
+            with self.__lock:
+                self.__connection.execute(
+                    SqliteUserDatabase.__CREATED_INDEXES[self.__timestamp_format])
+            if self.__timestamp_format == ISO:
+                query = SqliteUserDatabase.__SELECT_AFTER_ISO
+            else:
+                query = SqliteUserDatabase.__SELECT_AFTER_EPOCH
+        else:
+            raise ValueError("ordering by created_at needs iso or epoch "
+                             "timestamps, migrate the database first")
+
+        while True:
+            if order_by == ORDER_BY_ID:
+                parameters = ("" if after is None else after, chunk_size)
+            elif after is None:
+                parameters = ("", "", chunk_size) \
+                    if self.__timestamp_format == ISO else (-1, "", chunk_size)
+            elif self.__timestamp_format == ISO:
+                created_at = format_timestamp(
+                    datetime.fromtimestamp(after[0], tz=timezone.utc), ISO)
+                parameters = (created_at, after[1], chunk_size)
+            else:
+                parameters = (after[0], after[1], chunk_size)
+
+            with self.__lock:
+                rows = self.__connection.execute(query, parameters).fetchall()
+            if not rows:
+                return
+
+            for row in rows:
+                user = dict(zip(SqliteUserDatabase.__FIELDNAMES, row))
+                if order_by == ORDER_BY_ID:
+                    after = user.get('id')
+                else:
+                    after = timestamp_key(user.get('created_at')), user.get('id')
+                yield after, UserView(user)
+
+    def search_by_name(self, prefix: str, limit: int = 20) -> list[User]:
+        """Method to find the users whose name starts with a prefix,
+        ignoring case
+
+        Names are read in order from an index on the case-insensitive
+        name, starting at the prefix, until a name no longer matches.
+        SQLite only folds the case of ASCII letters.
+
+        Args:
+            prefix (str): start of the name
+            limit (int, optional): maximum number of users. Defaults to 20.
+
+        Returns:
+            list[User]: matching users, ordered by name
+        """
+        folded = (prefix or "").translate(SqliteUserDatabase.__ASCII_LOWER)
+        users = []
+        with self.__lock:
+            cursor = self.__connection.execute(
+                SqliteUserDatabase.__SELECT_FROM_NAME, (prefix or "",))
+            while len(users) < limit:
+                row = cursor.fetchone()
+                if row is None:
+                    break
+                user = dict(zip(SqliteUserDatabase.__FIELDNAMES, row))
+                if not (user.get('name') or "").translate(
+                        SqliteUserDatabase.__ASCII_LOWER).startswith(folded):
+                    break
+                users.append(UserView(user))
+            cursor.close()
+        return users
+
+    @timed("database", "Database operations", engine="sqlite", operation="save")
+    def save(self) -> None:
+        """Method to commit pending changes to the database file
+        """
+        with self.__lock:
+            self.__connection.commit()
+        return
+
+    def close(self) -> None:
+        """Method to commit pending changes and close the connection
+        """
+        with self.__lock:
+            self.__connection.commit()
+            self.__connection.close()
@@ -2,9 +2,19 @@ import csv
 import os
 import io
 from datetime import datetime, timezone
-from typing import Generator
+from typing import Generator, Iterable
 from interfaces.db import Database
 from models.user import User
+from models.user_view import UserView
+from repository.cache import LRUCache
+from repository.csv_loader import read_rows
+from repository.indexes import BY_NAME, ORDER_BY_CREATED_AT, ORDERS, SortedIndex, \
+    name_key, sort_key
+from repository.locks import FileLock, NullLock, ReadWriteLock
+from repository.snapshot import Snapshot, write_snapshot
+from utils.metrics import timed
+from utils.passwords import is_password_hash
+from utils.timestamps import FORMATS, ISO, detect_format, format_timestamp
 
 
 class UserDatabase(Database):
@@ -17,13 +27,59 @@ class UserDatabase(Database):
     __FIELDNAMES = ["id", "email", "name", "password",
                     "is_logged_in", "created_at", "updated_at"]
     __UPDATABLE_FIELDS = ["email", "name", "password", "is_logged_in"]
-    __users = []
-
-    def __init__(self, file_to_connect_to: str) -> None:
+    __JOURNAL_PUT = "P"
+    __JOURNAL_DELETE = "D"
+
+    def __init__(self, file_to_connect_to: str, journal: bool = False,
+                 compact_after_records: int = 1000,
+                 compact_after_bytes: int = 1024 * 1024,
+                 timestamp_format: str = None,
+                 concurrent: bool = False,
+                 snapshot: bool = False,
+                 email_filter_error_rate: float = 0.01,
+                 load_workers: int = None,
+                 cache_size: int = 1024) -> None:
         """Constructor for UserDatabase class
 
         Args:
             file_to_connect_to (string): File where data is going to be stored
+            journal (bool, optional): Append mutations to a journal file
+                instead of rewriting the csv file on every save.
+                Defaults to False.
+            compact_after_records (int, optional): Number of journal records
+                after which the journal is folded into the csv file.
+                Defaults to 1000.
+            compact_after_bytes (int, optional): Journal size in bytes after
+                which the journal is folded into the csv file.
+                Defaults to 1 MiB.
+            timestamp_format (str, optional): legacy, iso or epoch format
+                for timestamps written from now on. Defaults to None, which
+                keeps the format of the stored rows, or iso for a new file.
+            concurrent (bool, optional): Make the database safe to share
+                between threads, and the file safe to share between
+                processes. Reads take a shared in-process lock, writes an
+                exclusive one; saves hold an fcntl lock on <file>.lock and
+                changes made by other processes are picked up before every
+                operation. Defaults to False.
+            snapshot (bool, optional): Keep a binary snapshot of the csv
+                file in <file>.snap and memory-map it on startup instead of
+                parsing the csv file. Rows are decoded when they are looked
+                up, so startup time does not grow with the number of users.
+                The snapshot is rewritten whenever the csv file is.
+                Defaults to False.
+            email_filter_error_rate (float, optional): false positive rate
+                of the bloom filter of emails stored in the snapshot. Email
+                lookups the filter rules out skip the snapshot search.
+                Defaults to 0.01.
+            load_workers (int, optional): processes parsing the csv file
+                on load. Files of 8 MiB and more are split into chunks on
+                record boundaries and parsed in parallel; smaller files
+                are parsed in this process. Defaults to None, the number
+                of CPUs.
+            cache_size (int, optional): users looked up by id or email
+                that are kept ready to return, least recently used first
+                out. Changes to a user drop it from the cache. 0 turns the
+                cache off. Defaults to 1024.
 
         Returns:
             None
@@ -37,10 +93,56 @@ class UserDatabase(Database):
         if not os.path.exists(file_to_connect_to):
             raise FileNotFoundError("File does not exist!")
 
+        if timestamp_format is not None and timestamp_format not in FORMATS:
+            raise ValueError(f"timestamp_format must be one of {', '.join(FORMATS)}")
+
+        if not 0 < email_filter_error_rate < 1:
+            raise ValueError("email_filter_error_rate must be between 0 and 1")
+
+        if load_workers is not None and (not isinstance(load_workers, int) or load_workers < 1):
+            raise ValueError("load_workers must be a positive integer")
+
         self._file = file_to_connect_to
+        self._journal_file = f"{file_to_connect_to}.journal"
+        self.__journal = journal
+        self.__compact_after_records = compact_after_records
+        self.__compact_after_bytes = compact_after_bytes
+        self.__concurrent = concurrent
+        self._snapshot_file = f"{file_to_connect_to}.snap"
+        self.__snapshot = snapshot
+        self.__email_filter_error_rate = email_filter_error_rate
+        self.__load_workers = load_workers
+        self.__cache = LRUCache(cache_size, name="users")
+        self.__base = None
+        self.__shadowed = set()
+        self.__users = {}
+        self.__emails = {}
+        self.__sorted = {}
+        self.__journal_records = 0
+        self.__journal_offset = 0
+        self.__pending = []
+        self.__rejected = []
+        self.__signature = None
+
+        if concurrent:
+            self.__lock = ReadWriteLock()
+            self.__file_lock = FileLock(f"{file_to_connect_to}.lock")
+        else:
+            self.__lock = NullLock()
+            self.__file_lock = NullLock()
 
-        if os.path.getsize(self._file) > 0:
-            self.__load()
+        with self.__file_lock.shared():
+            self.__reload()
+
+        if timestamp_format is None:
+            first = next(self.__rows(), {})
+            timestamp_format = detect_format(first.get('created_at')) or ISO
+        self.__timestamp_format = timestamp_format
+
+    @property
+    def timestamp_format(self) -> str:
+        """Format of the timestamps written to the file"""
+        return self.__timestamp_format
 
     @property
     def users(self) -> list:
@@ -49,13 +151,21 @@ class UserDatabase(Database):
         Returns:
             list: List of users
         """
-        return UserDatabase.__users
+        self.__sync()
+        with self.__lock.read():
+            return list(self.__rows())
 
-    def __open_file(self, mode: str = None) -> io.TextIOWrapper:
+    @property
+    def cache_stats(self) -> dict:
+        """Hits, misses, evictions, size and capacity of the user cache"""
+        return self.__cache.stats()
+
+    def __open_file(self, mode: str = None, path: str = None) -> io.TextIOWrapper:
         """Private method to open the database file with a mode
 
         Args:
             mode (str, optional): Mode to open file in. Defaults to None.
+            path (str, optional): File to open. Defaults to the database file.
 
         Raises:
             FileNotFoundError: If the file does not exist
@@ -66,10 +176,13 @@ class UserDatabase(Database):
         if mode is None:
             mode = 'r'
 
+        if path is None:
+            path = self._file
+
         try:
-            file = open(self._file, mode=mode, newline='')
+            file = open(path, mode=mode, newline='')
         except FileNotFoundError as e:
-            raise FileNotFoundError(f'File {self._file} was not found.')
+            raise FileNotFoundError(f'File {path} was not found.')
 
         return file
 
@@ -91,11 +204,330 @@ class UserDatabase(Database):
         Returns:
             None
         """
-        file = self.__open_file(mode="r")
-        reader = csv.DictReader(f=file)
-        UserDatabase.__users = [row for row in reader]
-        self.__close_file(file)
+        if not os.path.exists(self._file):
+            raise FileNotFoundError(f'File {self._file} was not found.')
+
+        for row in read_rows(self._file, workers=self.__load_workers):
+            self.__index(row)
+
+    @timed("database", "Database operations", engine="csv", operation="load")
+    def __reload(self) -> None:
+        """Private method to rebuild the store from the csv file and the
+        journal. Unsaved mutations are applied again on top, except the
+        ones that would give a saved email to another user, which are
+        rejected and reported by the next save.
+
+        Returns:
+            None
+        """
+        self.__users = {}
+        self.__emails = {}
+        self.__sorted = {}
+        self.__journal_records = 0
+        self.__journal_offset = 0
+        self.__cache.clear()
+        self.__close_snapshot()
+
+        mapped = self.__snapshot and self.__open_snapshot()
+        if not mapped and os.path.getsize(self._file) > 0:
+            self.__load()
+            if self.__snapshot:
+                self.__rebase(list(self.__users.values()))
+
+        if self.__journal and os.path.exists(self._journal_file):
+            self.__replay()
+
+        self.__reapply()
+        self.__signature = self.__stat()
+
+    def __reapply(self) -> None:
+        """Private method to apply the unsaved mutations again on top of
+        the store. The ones whose email was saved for another user in the
+        meantime are moved to the rejected records.
+        """
+        pending, self.__pending = self.__pending, []
+        for record in pending:
+            if self.__apply(record):
+                self.__pending.append(record)
+            else:
+                self.__rejected.append(record)
+
+    def __raise_rejected(self) -> None:
+        """Private method to report the mutations that were dropped
+        because another process saved their email first
+
+        Raises:
+            ValueError: If any mutation was dropped
+        """
+        if not self.__rejected:
+            return
+
+        rows = [dict(zip(UserDatabase.__FIELDNAMES, record[1:]))
+                for record in self.__rejected]
+        self.__rejected = []
+        users = ", ".join(f"{row.get('email')} (id {row.get('id')})" for row in rows)
+        raise ValueError(f"email already exists, saved by another process first; "
+                         f"not saved: {users}")
+
+    def __open_snapshot(self) -> bool:
+        """Private method to map the snapshot file if it was made from the
+        current csv file
+
+        Returns:
+            bool: true if the snapshot is used as the base of the store
+        """
+        if not os.path.exists(self._snapshot_file):
+            return False
+
+        try:
+            snapshot = Snapshot(self._snapshot_file, UserDatabase.__FIELDNAMES)
+        except (ValueError, OSError):
+            return False
+
+        stat = os.stat(self._file)
+        if snapshot.source != (stat.st_mtime_ns, stat.st_size):
+            snapshot.close()
+            return False
+
+        self.__base = snapshot
+        return True
+
+    def __close_snapshot(self) -> None:
+        """Private method to drop the mapped snapshot and the ids it hides
+        """
+        if self.__base is not None:
+            self.__base.close()
+        self.__base = None
+        self.__shadowed = set()
+
+    def __rebase(self, rows: list[dict]) -> None:
+        """Private method to write the rows of the csv file to the snapshot
+        file and use it as the base of the store
+
+        Args:
+            rows (list[dict]): rows just written to the csv file
+        """
+        stat = os.stat(self._file)
+        write_snapshot(self._snapshot_file, rows, UserDatabase.__FIELDNAMES,
+                       (stat.st_mtime_ns, stat.st_size),
+                       self.__email_filter_error_rate)
+        self.__close_snapshot()
+        self.__users = {}
+        self.__emails = {}
+        self.__cache.clear()
+        self.__open_snapshot()
+
+    def __replay(self) -> bool:
+        """Private method to apply the journal records that were appended
+        since the last replay on top of the loaded rows
+
+        Returns:
+            bool: true if every record was applied, false if some were
+                skipped because their email belonged to another user
+        """
+        applied = True
+        with open(self._journal_file, mode='rb') as file:
+            file.seek(self.__journal_offset)
+            data = file.read()
+
+        end = data.rfind(b'\n') + 1
+        while data.count(b'"', 0, end) % 2:
+            # that newline is inside a quoted field of a partial record
+            end = data.rfind(b'\n', 0, end - 1) + 1
+        self.__journal_offset += end
+        for record in csv.reader(io.StringIO(data[:end].decode(), newline='')):
+            if record:
+                applied = self.__apply(record) and applied
+                self.__journal_records += 1
+        return applied
+
+    def __apply(self, record: list[str]) -> bool:
+        """Private method to apply one journal record to the store
+
+        Processes only check that an email is free in their own store, so
+        two of them can add the same email between syncs. The record
+        written to the journal first wins: a put whose email belongs to
+        another user is skipped.
+
+        Args:
+            record (list[str]): journal record
+
+        Returns:
+            bool: false if the record was skipped
+        """
+        if record[0] == UserDatabase.__JOURNAL_PUT:
+            row = dict(zip(UserDatabase.__FIELDNAMES, record[1:]))
+            owner = self.__find_by_email(row.get('email'))
+            if owner is not None and owner.get('id') != row.get('id'):
+                return False
+            self.__unindex(row.get('id'))
+            self.__index(row)
+        elif record[0] == UserDatabase.__JOURNAL_DELETE:
+            self.__unindex(record[1])
+        return True
+
+    def __stat(self) -> tuple:
+        """Private method to get a signature of the files on disk, used to
+        notice writes made by other processes
+
+        Returns:
+            tuple: modification time, size and inode of the csv file and
+                modification time and size of the journal
+        """
+        base = os.stat(self._file)
+        journal = (0, 0)
+        if self.__journal and os.path.exists(self._journal_file):
+            stat = os.stat(self._journal_file)
+            journal = (stat.st_mtime_ns, stat.st_size)
+        return (base.st_mtime_ns, base.st_size, base.st_ino), journal
+
+    def __refresh(self) -> None:
+        """Private method to pick up changes other processes made to the
+        files. Callers hold the write lock and a file lock.
+
+        Returns:
+            None
+        """
+        signature = self.__stat()
+        if signature == self.__signature:
+            return
+
+        if signature[0] != self.__signature[0] \
+                or signature[1][1] < self.__journal_offset:
+            self.__reload()
+            return
+
+        if not self.__replay():
+            # an unsaved row holds an email that was just saved by another
+            # process; rebuild so the saved one is kept
+            self.__reload()
+            return
+
+        self.__reapply()
+        self.__signature = signature
+
+    def __sync(self) -> None:
+        """Private method to reload the store if another process changed
+        the files. Does nothing unless the database is concurrent.
+
+        Returns:
+            None
+        """
+        if not self.__concurrent or self.__stat() == self.__signature:
+            return
+
+        with self.__lock.write(), self.__file_lock.shared():
+            self.__refresh()
+
+    def __record(self, operation: str, *rows: dict) -> None:
+        """Private method to queue journal records for the next save
 
+        Args:
+            operation (str): journal operation
+            *rows (dict): rows the operation applies to
+        """
+        if not self.__journal and not self.__concurrent:
+            return
+
+        if operation == UserDatabase.__JOURNAL_DELETE:
+            self.__pending.extend([operation, row.get('id')] for row in rows)
+        else:
+            fieldnames = UserDatabase.__FIELDNAMES
+            self.__pending.extend([operation] + [row.get(key) for key in fieldnames]
+                                  for row in rows)
+
+    def __unindex(self, id: str) -> dict:
+        """Private method to remove a row from the store and the indexes
+
+        Args:
+            id (str): id of the row to remove
+
+        Returns:
+            dict: the removed row or None
+        """
+        row = self.__users.pop(id, None)
+        if row is not None:
+            self.__emails.pop(row.get('email'), None)
+        elif self.__base is not None and id not in self.__shadowed:
+            row = self.__base.find_by_id(id)
+
+        if row is not None:
+            self.__forget(row)
+            if self.__base is not None:
+                self.__shadowed.add(id)
+            for order_by, index in self.__sorted.items():
+                index.remove(sort_key(order_by, row))
+        return row
+
+    def __index(self, row: dict) -> None:
+        """Private method to store a row and register it in the indexes
+
+        Args:
+            row (dict): row to store
+        """
+        self.__forget(row)
+        self.__users[row.get('id')] = row
+        self.__emails[row.get('email')] = row
+        if self.__base is not None:
+            self.__shadowed.add(row.get('id'))
+        for order_by, index in self.__sorted.items():
+            index.insert(sort_key(order_by, row))
+
+    def __forget(self, row: dict) -> None:
+        """Private method to drop the cached lookups of a row
+
+        Args:
+            row (dict): row that is replaced or removed
+        """
+        self.__cache.pop(('id', row.get('id')))
+        self.__cache.pop(('email', row.get('email')))
+
+    def __find(self, id: str) -> dict:
+        """Private method to look a row up by id, in memory first and then
+        in the snapshot
+
+        Args:
+            id (str): id of the row
+
+        Returns:
+            dict: the row or None
+        """
+        row = self.__users.get(id)
+        if row is None and self.__base is not None and id not in self.__shadowed:
+            row = self.__base.find_by_id(id)
+        return row
+
+    def __find_by_email(self, email: str) -> dict:
+        """Private method to look a row up by email, in memory first and
+        then in the snapshot
+
+        Args:
+            email (str): email of the row
+
+        Returns:
+            dict: the row or None
+        """
+        row = self.__emails.get(email)
+        if row is None and self.__base is not None:
+            row = self.__base.find_by_email(email)
+            if row is not None and row.get('id') in self.__shadowed:
+                row = None
+        return row
+
+    def __rows(self) -> Generator[dict, None, None]:
+        """Private method to iterate over every row, the snapshot rows
+        that were not changed since it was written first
+
+        Returns:
+            Generator[dict, None, None]: A generator of all rows
+        """
+        if self.__base is not None:
+            for row in self.__base.rows():
+                if row.get('id') not in self.__shadowed:
+                    yield row
+        yield from self.__users.values()
+
+    @timed("database", "Database operations", engine="csv", operation="get_user_by_email")
     def get_user_by_email(self, email: str) -> User:
         """Method to check if email already exists
 
@@ -105,19 +537,16 @@ class UserDatabase(Database):
         Returns:
             bool: true or false
         """
-        for user in UserDatabase.__users:
-            if user.get('email') == email:
-                result = User(
-                    email=user.get("email"),
-                    name=user.get("name"),
-                    id=user.get("id"),
-                    created_at=user.get("created_at"),
-                    updated_at=user.get("updated_at")
-                )
-                result.password = user.get("password")
-                result.is_logged_in = user.get("is_logged_in")
-                return result
-        return False
+        self.__sync()
+        with self.__lock.read():
+            entry = self.__cache.get(('email', email))
+            if entry is None:
+                row = self.__find_by_email(email)
+                if row is None:
+                    return False
+                entry = (UserView(row), row)
+                self.__cache.put(('email', email), entry)
+        return entry[0]
 
     def add(self, item: User) -> User:
         """Adds a user object to the database
@@ -137,15 +566,59 @@ class UserDatabase(Database):
         if not isinstance(item, User):
             raise TypeError("item must be of type User")
 
-        if self.get(item.id) is not None:
-            raise ValueError(f"user with id {item.id} already exists")
+        self.__sync()
+        with self.__lock.write():
+            if self.__find(item.id) is not None:
+                raise ValueError(f"user with id {item.id} already exists")
 
-        if self.get_user_by_email(item.email):
-            raise ValueError(f"email {item.email} already exists")
+            if self.__find_by_email(item.email) is not None:
+                raise ValueError(f"email {item.email} already exists")
 
-        UserDatabase.__users.append(item.to_dict())
+            row = item.to_dict(timestamp_format=self.__timestamp_format)
+            self.__index(row)
+            self.__record(UserDatabase.__JOURNAL_PUT, row)
         return item
 
+    def add_many(self, items: Iterable[User]) -> list[tuple[int, str]]:
+        """Adds many user objects to the database in one pass
+
+        Users that fail (duplicate id or email, invalid item) are skipped
+        and reported instead of stopping the whole batch. The batch is
+        checked against the stored users and itself first, then indexed
+        and queued for the journal in one go.
+
+        Args:
+            items (Iterable[User]): User objects to add to the database
+
+        Returns:
+            list[tuple[int, str]]: position in `items` and error message of
+                every user that was not added
+        """
+        errors = []
+        rows = []
+        ids = set()
+        emails = set()
+        self.__sync()
+        with self.__lock.write():
+            for position, item in enumerate(items):
+                if item is None:
+                    errors.append((position, "Item cannot be None"))
+                elif not isinstance(item, User):
+                    errors.append((position, "item must be of type User"))
+                elif item.id in ids or self.__find(item.id) is not None:
+                    errors.append((position, f"user with id {item.id} already exists"))
+                elif item.email in emails or self.__find_by_email(item.email) is not None:
+                    errors.append((position, f"email {item.email} already exists"))
+                else:
+                    ids.add(item.id)
+                    emails.add(item.email)
+                    rows.append(item.to_dict(timestamp_format=self.__timestamp_format))
+
+            for row in rows:
+                self.__index(row)
+            self.__record(UserDatabase.__JOURNAL_PUT, *rows)
+        return errors
+
     def update(self, id: str, item: dict) -> User:
         """Updates a user object in the database
 
@@ -162,16 +635,33 @@ class UserDatabase(Database):
         if not isinstance(item, dict):
             raise TypeError("item must be of type dict")
 
-        if self.get(id) is None:
-            return None
-
-        user_obj, user_dict = self.get(id)
-        for key, value in item.items():
-            if key in UserDatabase.__UPDATABLE_FIELDS and value is not None:
-                setattr(user_obj, key, value)
-                user_dict.update({key: value})
-        setattr(user_obj, 'updated_at', datetime.now(tz=timezone.utc))
-        user_dict.update({'updated_at': user_obj.to_dict().get('updated_at')})
+        self.__sync()
+        with self.__lock.write():
+            user_dict = self.__find(id)
+            if user_dict is None:
+                return None
+
+            email = item.get('email')
+            if email is not None and email != user_dict.get('email') \
+                    and self.__find_by_email(email) is not None:
+                raise ValueError(f"email {email} already exists")
+
+            user_obj = UserView(user_dict).to_user()
+            new_dict = dict(user_dict)
+            for key, value in item.items():
+                if key in UserDatabase.__UPDATABLE_FIELDS and value is not None:
+                    if key == 'password' and is_password_hash(value):
+                        user_obj.password_hash = value
+                    else:
+                        setattr(user_obj, key, value)
+                    new_dict.update({key: value})
+            setattr(user_obj, 'updated_at', datetime.now(tz=timezone.utc))
+            new_dict.update({'updated_at': format_timestamp(
+                user_obj.updated_at, self.__timestamp_format)})
+
+            self.__unindex(id)
+            self.__index(new_dict)
+            self.__record(UserDatabase.__JOURNAL_PUT, new_dict)
         return user_obj
 
     def all(self) -> Generator[User, None, None]:
@@ -180,19 +670,11 @@ class UserDatabase(Database):
         Returns:
             Generator[User, None, None]: A generator of all users in the database
         """
-        if len(UserDatabase.__users) != 0:
-            for user in UserDatabase.__users:
-                result = User(
-                    email=user.get('email'),
-                    name=user.get('name'),
-                    id=user.get('id'),
-                    created_at=user.get('created_at'),
-                    updated_at=user.get('updated_at')
-                )
-                result.password = user.get('password')
-                yield result
-        else:
-            return []
+        self.__sync()
+        with self.__lock.read():
+            users = list(self.__rows())
+        for user in users:
+            yield UserView(user)
 
     def delete(self, id: str):
         """Method to delete a user from the database
@@ -200,14 +682,16 @@ class UserDatabase(Database):
         Args:
             id (str): The id of the user to delete
         """
-        if self.get(id) is None:
-            raise ValueError(f"User with id {id} does not exist")
+        self.__sync()
+        with self.__lock.write():
+            user_dict = self.__unindex(id)
+            if user_dict is None:
+                raise ValueError(f"User with id {id} does not exist")
 
-        _, user_dict = self.get(id)
-
-        UserDatabase.__users.remove(user_dict)
+            self.__record(UserDatabase.__JOURNAL_DELETE, user_dict)
         return
 
+    @timed("database", "Database operations", engine="csv", operation="get")
     def get(self, id: str) -> tuple[User, dict]:
         """Method to get a user object from the database
 
@@ -215,28 +699,190 @@ class UserDatabase(Database):
             id (str): The id of the user to get
 
         Returns:
-            User: The user object
+            tuple[User, dict]: The read-only user object and a copy of
+                its stored row
+        """
+        self.__sync()
+        with self.__lock.read():
+            entry = self.__cache.get(('id', id))
+            if entry is None:
+                row = self.__find(id)
+                if row is None:
+                    return None
+                entry = (UserView(row), row)
+                self.__cache.put(('id', id), entry)
+        return entry[0], dict(entry[1])
+
+    def scan(self, order_by: str, after: str | tuple = None,
+             chunk_size: int = 256) -> Generator[tuple, None, None]:
+        """Method to walk the users in id or creation order
+
+        The first scan in an order builds a sorted index of the users,
+        which is then kept up to date by every mutation. Users are read
+        in chunks under the lock, so other operations can run between
+        chunks and memory use does not depend on the number of users.
+
+        Args:
+            order_by (str): id or created_at
+            after (str | tuple, optional): key to start after, as yielded
+                by an earlier scan. Defaults to None, which starts at the
+                first user.
+            chunk_size (int, optional): users read under the lock at a
+                time. Defaults to 256.
+
+        Raises:
+            ValueError: If the order is unknown
+
+        Returns:
+            Generator[tuple, None, None]: (key, user) pairs, in key order
         """
-        for user in UserDatabase.__users:
-            if user.get('id') == id:
-                result = User(
-                    email=user.get("email"),
-                    name=user.get("name"),
-                    id=user.get("id"),
-                    created_at=user.get("created_at"),
-                    updated_at=user.get("updated_at")
-                )
-                result.password = user.get("password")
-                result.is_logged_in = user.get("is_logged_in")
-                return result, user
-        return None
+        if order_by not in ORDERS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDERS)}")
+
+        self.__sync()
+        while True:
+            index = self.__sorted_index(order_by)
+            with self.__lock.read():
+                keys = index.after(after, chunk_size)
+                rows = [self.__find(key[1] if order_by == ORDER_BY_CREATED_AT
+                                    else key) for key in keys]
+            if not keys:
+                return
+
+            for key, row in zip(keys, rows):
+                if row is not None:
+                    yield key, UserView(row)
+            after = keys[-1]
+
+    def __sorted_index(self, order_by: str) -> SortedIndex:
+        """Private method to get a sorted index, building it on first use.
+        Every mutation keeps the built indexes up to date.
+
+        Args:
+            order_by (str): id, created_at or name
 
+        Returns:
+            SortedIndex: the index
+        """
+        with self.__lock.read():
+            index = self.__sorted.get(order_by)
+        if index is None:
+            with self.__lock.write():
+                index = self.__sorted.get(order_by)
+                if index is None:
+                    index = SortedIndex(sort_key(order_by, row)
+                                        for row in self.__rows())
+                    self.__sorted[order_by] = index
+        return index
+
+    def search_by_name(self, prefix: str, limit: int = 20) -> list[User]:
+        """Method to find the users whose name starts with a prefix,
+        ignoring case
+
+        The first search builds an index of the case-folded names, so a
+        search costs one bisection plus the users it returns.
+
+        Args:
+            prefix (str): start of the name
+            limit (int, optional): maximum number of users. Defaults to 20.
+
+        Returns:
+            list[User]: matching users, ordered by name
+        """
+        folded = name_key(prefix)
+        self.__sync()
+        index = self.__sorted_index(BY_NAME)
+        users = []
+        with self.__lock.read():
+            for name, id in index.starting_at((folded, ""), limit):
+                if not name.startswith(folded):
+                    break
+                row = self.__find(id)
+                if row is not None:
+                    users.append(UserView(row))
+        return users
+
+    @timed("database", "Database operations", engine="csv", operation="save")
     def save(self) -> None:
         """Method to save the database to the file
+
+        In journal mode only the mutations made since the last save are
+        appended to the journal, and the journal is compacted once it
+        passes its record or size threshold. Otherwise the csv file is
+        rewritten through a temporary file, so a crash or a concurrent
+        reader never sees a truncated file.
+
+        Raises:
+            ValueError: If users added here were dropped because another
+                process saved their email first. The other mutations are
+                saved.
         """
-        file = self.__open_file(mode='w')
+        with self.__lock.write(), self.__file_lock.exclusive():
+            if self.__concurrent:
+                self.__refresh()
+
+            if not self.__journal:
+                self.__write_base()
+                self.__pending = []
+                self.__signature = self.__stat()
+            elif self.__pending:
+                file = self.__open_file(mode='a', path=self._journal_file)
+                if file.tell() > self.__journal_offset:
+                    # a crash left part of a record after the last one
+                    # replayed; drop it so the next record starts a line
+                    file.truncate(self.__journal_offset)
+                writer = csv.writer(file)
+                writer.writerows(self.__pending)
+                self.__close_file(file)
+                self.__journal_records += len(self.__pending)
+                self.__pending = []
+                self.__journal_offset = os.path.getsize(self._journal_file)
+                self.__signature = self.__stat()
+
+                if self.__journal_records >= self.__compact_after_records \
+                        or self.__journal_offset >= self.__compact_after_bytes:
+                    self.__compact()
+            self.__raise_rejected()
+
+    @timed("database", "Database operations", engine="csv", operation="compact")
+    def compact(self) -> None:
+        """Method to fold the journal into the csv file and truncate it
+
+        Raises:
+            ValueError: If users added here were dropped because another
+                process saved their email first
+        """
+        with self.__lock.write(), self.__file_lock.exclusive():
+            if self.__concurrent:
+                self.__refresh()
+            self.__compact()
+            self.__raise_rejected()
+
+    def __write_base(self) -> None:
+        """Private method to write every row to the csv file through a
+        temporary file
+        """
+        rows = list(self.__rows())
+        temp_file = f"{self._file}.tmp"
+        file = self.__open_file(mode='w', path=temp_file)
         writer = csv.DictWriter(f=file, fieldnames=UserDatabase.__FIELDNAMES)
         writer.writeheader()
-        writer.writerows(UserDatabase.__users)
+        writer.writerows(rows)
+        self.__close_file(file)
+        os.replace(temp_file, self._file)
+
+        if self.__snapshot:
+            self.__rebase(rows)
+
+    def __compact(self) -> None:
+        """Private method to fold the journal into the csv file. Callers
+        hold the write lock and the exclusive file lock.
+        """
+        self.__write_base()
+        file = self.__open_file(mode='w', path=self._journal_file)
         self.__close_file(file)
+        self.__journal_records = 0
+        self.__journal_offset = 0
+        self.__pending = []
+        self.__signature = self.__stat()
         return
@@ -0,0 +1,374 @@
+import argparse
+import json
+import logging
+import math
+import signal
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from app import FILE_PATH
+from interfaces.db import Database
+from repository.factory import ENGINES
+from services.rate_limiter import LoginLimiter, ThrottledError
+from services.user_service import UserService
+from utils.timestamps import ISO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 8
+IDLE_TIMEOUT = 5
+MAX_BODY = 64 * 1024
+
+
+class HttpError(Exception):
+    """Error answered with an HTTP status and a JSON message"""
+
+    def __init__(self, status: HTTPStatus, message: str,
+                 headers: dict = None) -> None:
+        """Constructor for the HttpError class
+
+        Args:
+            status (HTTPStatus): response status
+            message (str): error message for the client
+            headers (dict, optional): extra response headers.
+                Defaults to None.
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers
+
+
+class AuthRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over UserService.
+
+    POST   /users           register: {"email", "name", "password"}
+    POST   /sessions        login: {"email", "password"}
+    DELETE /sessions/<id>   logout
+    GET    /users/<id>      get a user, needs its session
+    PATCH  /users/<id>      update the name: {"name"}, needs its session
+
+    Requests that need a session send `Authorization: Bearer <session id>`.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "AuthSimulator/1.0"
+    timeout = IDLE_TIMEOUT
+    # headers and body are written separately; without TCP_NODELAY the
+    # second write waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.__dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.__dispatch("POST")
+
+    def do_PATCH(self) -> None:
+        self.__dispatch("PATCH")
+
+    def do_DELETE(self) -> None:
+        self.__dispatch("DELETE")
+
+    def __dispatch(self, method: str) -> None:
+        """Private method to route a request and write its response"""
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        routes = {
+            ("POST", "users", 1): self.__register,
+            ("GET", "users", 2): self.__get_user,
+            ("PATCH", "users", 2): self.__update_name,
+            ("POST", "sessions", 1): self.__login,
+            ("DELETE", "sessions", 2): self.__logout,
+        }
+        headers = None
+        try:
+            resource = parts[0] if parts else None
+            handler = routes.get((method, resource, len(parts)))
+            if handler is None:
+                known = any(key[1:] == (resource, len(parts)) for key in routes)
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED if known
+                                else HTTPStatus.NOT_FOUND,
+                                f"{method} {self.path} is not supported")
+            status, body = handler(*parts[1:])
+        except HttpError as e:
+            status, body, headers = e.status, {"error": e.message}, e.headers
+        except Exception:
+            logger.exception("%s %s failed", method, self.path)
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+
+        if self.server.closing:
+            self.close_connection = True
+        self.__respond(status, body, headers)
+
+    def __respond(self, status: HTTPStatus, body: dict = None,
+                  headers: dict = None) -> None:
+        """Private method to write a JSON response"""
+        data = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __read_json(self) -> dict:
+        """Private method to read the JSON object in the request body
+
+        Raises:
+            HttpError: If the body is missing, too large or not an object
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > MAX_BODY:
+            self.close_connection = True
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "body is too large")
+
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except (UnicodeDecodeError, ValueError):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "body must be JSON")
+        if not isinstance(body, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+        return body
+
+    def __session(self, user_id: str):
+        """Private method to get the live session of the user a request is
+        about
+
+        Raises:
+            HttpError: If there is no session, or it belongs to another user
+        """
+        header = self.headers.get("Authorization", "")
+        scheme, _, session_id = header.partition(" ")
+        session = None
+        if scheme.lower() == "bearer" and session_id:
+            session = self.server.service.get_session(session_id.strip())
+        if session is None:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "a live session is required")
+        if session.user_id != user_id:
+            raise HttpError(HTTPStatus.FORBIDDEN, "session belongs to another user")
+        return session
+
+    def __user_info(self, user) -> dict:
+        """Private method to get user info with the session login state"""
+        return dict(user.get_user(timestamp_format=ISO),
+                    is_logged_in=self.server.service.is_logged_in(user.id))
+
+    def __strings(self, body: dict, *fields: str) -> list[str]:
+        """Private method to get string fields of a request body
+
+        Raises:
+            HttpError: If a field is missing or not a string
+        """
+        values = [body.get(field) for field in fields]
+        for field, value in zip(fields, values):
+            if not isinstance(value, str):
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"{field} must be a string")
+        return values
+
+    def __register(self) -> tuple[HTTPStatus, dict]:
+        body = self.__read_json()
+        email, name, password = self.__strings(body, "email", "name", "password")
+        if not name.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "name must be a non-empty string")
+        try:
+            user = self.server.service.create_user(
+                db=self.server.db, email=email, name=name, password=password)
+        except ValueError as e:
+            status = HTTPStatus.CONFLICT if "already exists" in str(e) \
+                else HTTPStatus.BAD_REQUEST
+            raise HttpError(status, str(e))
+        except TypeError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        return HTTPStatus.CREATED, self.__user_info(user)
+
+    def __login(self) -> tuple[HTTPStatus, dict]:
+        body = self.__read_json()
+        email, password = self.__strings(body, "email", "password")
+        try:
+            session = self.server.service.login_user(
+                db=self.server.db, email=email, password=password,
+                client_id=self.client_address[0])
+        except ThrottledError as e:
+            raise HttpError(HTTPStatus.TOO_MANY_REQUESTS, str(e),
+                            {"Retry-After": str(math.ceil(e.retry_after))})
+        except (ValueError, TypeError):
+            # the same answer for unknown emails and wrong passwords, so
+            # logins cannot be used to find out who has an account
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "invalid email or password")
+        return HTTPStatus.CREATED, {
+            "session_id": session.id,
+            "user_id": session.user_id,
+            "expires_at": session.expires_at,
+        }
+
+    def __logout(self, session_id: str) -> tuple[HTTPStatus, dict]:
+        session = self.server.service.get_session(session_id)
+        if session is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "session does not exist or has expired")
+        try:
+            self.server.service.logout_user(db=self.server.db, session=session)
+        except Exception as e:
+            raise HttpError(HTTPStatus.NOT_FOUND, str(e))
+        return HTTPStatus.OK, {"session_id": session.id, "user_id": session.user_id}
+
+    def __get_user(self, user_id: str) -> tuple[HTTPStatus, dict]:
+        self.__session(user_id)
+        result = self.server.service.get_one_user(db=self.server.db, id=user_id)
+        if result is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"user {user_id} does not exist")
+        return HTTPStatus.OK, self.__user_info(result[0])
+
+    def __update_name(self, user_id: str) -> tuple[HTTPStatus, dict]:
+        self.__session(user_id)
+        name = self.__read_json().get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "name must be a non-empty string")
+        user = self.server.service.update_user(
+            db=self.server.db, id=user_id, item={"name": name})
+        if user is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"user {user_id} does not exist")
+        return HTTPStatus.OK, self.__user_info(user)
+
+    def send_error(self, code: int, message: str = None, explain: str = None) -> None:
+        """Answer protocol errors, like unsupported methods, in JSON too"""
+        status = HTTPStatus(code)
+        self.close_connection = True
+        self.__respond(status, {"error": message or status.phrase})
+
+    def log_message(self, format: str, *args) -> None:
+        """Send the access log to the module logger instead of stderr"""
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class AuthServer(HTTPServer):
+    """HTTP server for the auth endpoints with a bounded worker pool.
+
+    Every connection is served by one worker thread for as long as it is
+    kept alive, and closed after IDLE_TIMEOUT seconds without a request.
+    Connections beyond the number of workers wait in the pool's queue.
+    """
+
+    def __init__(self, db: Database, service: UserService = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 workers: int = DEFAULT_WORKERS) -> None:
+        """Constructor for the AuthServer class
+
+        Args:
+            db (Database): database the service works on
+            service (UserService, optional): service to call. Defaults to a
+                UserService with its default settings.
+            host (str, optional): address to listen on.
+                Defaults to 127.0.0.1.
+            port (int, optional): port to listen on, 0 for any free port.
+                Defaults to 8080.
+            workers (int, optional): requests served at the same time.
+                Defaults to 8.
+
+        Raises:
+            ValueError: If the number of workers is not positive
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        super().__init__((host, port), AuthRequestHandler)
+        self.db = db
+        self.service = UserService() if service is None else service
+        self.closing = False
+        self.__workers = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="http-worker")
+
+    def process_request(self, request, client_address) -> None:
+        """Hand the connection to the worker pool"""
+        self.__workers.submit(self.__process, request, client_address)
+
+    def __process(self, request, client_address) -> None:
+        """Private method to serve one connection on a worker"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def serve_in_background(self) -> threading.Thread:
+        """Start serving from a daemon thread
+
+        Returns:
+            threading.Thread: the thread running the accept loop
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Stop gracefully
+
+        New connections are refused, requests in flight are answered with
+        `Connection: close`, and pending mutations are flushed before the
+        service is closed. Must not be called from the thread running
+        `serve_forever`.
+        """
+        self.closing = True
+        self.shutdown()
+        self.server_close()
+        self.__workers.shutdown(wait=True)
+        self.service.close()
+        if hasattr(self.db, "close"):
+            self.db.close()
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python server.py",
+                                     description="Serve the auth endpoints over HTTP")
+    parser.add_argument("data_file", nargs="?", default=None)
+    parser.add_argument("--engine", choices=ENGINES)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--throttle-logins", action="store_true",
+                        help="limit login attempts per email and per client address")
+    return parser.parse_args(args)
+
+
+def main(argv: list[str]) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    service = UserService(login_limiter=LoginLimiter() if args.throttle_logins else None)
+    try:
+        db = service.open_database(file=args.data_file or FILE_PATH,
+                                   engine=args.engine, journal=True,
+                                   concurrent=True)
+    except (ValueError, TypeError, FileNotFoundError, sqlite3.Error) as e:
+        service.close()
+        sys.exit(f"Error initializing database: {e}")
+
+    server = AuthServer(db, service=service, host=args.host, port=args.port,
+                        workers=args.workers)
+    stopped = threading.Event()
+
+    def stop(signum, frame):
+        if not stopped.is_set():
+            stopped.set()
+            threading.Thread(target=server.stop).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    logger.info("listening on http://%s:%d with %d workers",
+                *server.server_address[:2], args.workers)
+    server.serve_forever()
+    logger.info("stopped")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
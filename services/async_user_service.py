@@ -0,0 +1,184 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from interfaces.db import Database
+from models.user import User
+from repository.indexes import ORDER_BY_ID
+from repository.locks import ReadWriteLock
+from services.pagination import Page
+from services.session_store import Session
+from services.user_service import UserService
+from utils.validators import validate_passwords
+
+
+class AsyncUserService:
+    """Awaitable front end to UserService for asyncio applications.
+
+    Blocking storage work runs on a bounded thread pool so the event loop
+    never waits on disk. Mutations are put on a queue that a single
+    writer task drains in order, so at most one write touches storage at
+    a time however many coroutines are calling in. Reads on the pool
+    share a read lock that the writer takes for every write, so they
+    never see a write half done, even on a database that was not opened
+    concurrent.
+    """
+
+    __STOP = object()
+
+    def __init__(self, service: UserService = None, max_workers: int = 4,
+                 queue_size: int = 1000) -> None:
+        """Constructor for the AsyncUserService class
+
+        Args:
+            service (UserService, optional): service doing the work.
+                Defaults to a new UserService.
+            max_workers (int, optional): size of the thread pool.
+                Defaults to 4.
+            queue_size (int, optional): pending writes before callers have
+                to wait. Defaults to 1000.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        if service is None:
+            service = UserService()
+        self.__service = service
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers,
+                                             thread_name_prefix="user-service")
+        self.__queue_size = queue_size
+        self.__queue = None
+        self.__writer = None
+        self.__lock = ReadWriteLock()
+
+    async def __run(self, func, *args, **kwargs):
+        """Private method to run a blocking call on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__executor, functools.partial(func, *args, **kwargs))
+
+    async def __read(self, func, *args, **kwargs):
+        """Private method to run a blocking read on the thread pool while
+        no write is running"""
+        return await self.__run(AsyncUserService.__holding, self.__lock.read,
+                                functools.partial(func, *args, **kwargs))
+
+    @staticmethod
+    def __holding(lock, call):
+        """Private method to make a call while holding a lock"""
+        with lock():
+            return call()
+
+    async def __write(self, func, *args, **kwargs):
+        """Private method to queue a blocking mutation for the writer task"""
+        if self.__writer is None:
+            self.__queue = asyncio.Queue(maxsize=self.__queue_size)
+            self.__writer = asyncio.create_task(self.__drain())
+
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((functools.partial(func, *args, **kwargs), future))
+        return await future
+
+    async def __drain(self) -> None:
+        """Private method run by the writer task"""
+        while True:
+            item = await self.__queue.get()
+            if item is AsyncUserService.__STOP:
+                return
+
+            call, future = item
+            try:
+                result = await self.__run(AsyncUserService.__holding,
+                                          self.__lock.write, call)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def create_user(self, db: Database, email: str, name: str,
+                          password: str) -> User:
+        """Create a new user. See UserService.create_user.
+
+        The password is hashed on the hasher's pool before the insert is
+        queued, so registrations are hashed in parallel and the writer
+        only stores them. Invalid passwords and taken emails are left to
+        the queued call to report, without hashing.
+        """
+        password_hash = None
+        if validate_passwords([password])[0] is None \
+                and not await self.__read(db.get_user_by_email, email=email):
+            password_hash = await asyncio.wrap_future(
+                self.__service.hasher.hash_async(password))
+        return await self.__write(self.__service.create_user, db=db,
+                                  email=email, name=name, password=password,
+                                  password_hash=password_hash)
+
+    async def update_user(self, db: Database, id: str, item: dict) -> User:
+        """Update a user. See UserService.update_user."""
+        return await self.__write(self.__service.update_user, db=db,
+                                  id=id, item=item)
+
+    async def delete_user(self, db: Database, id: str) -> None:
+        """Delete a user. See UserService.delete_user."""
+        return await self.__write(self.__service.delete_user, db=db, id=id)
+
+    async def login_user(self, db: Database, email: str, password: str,
+                         client_id: str = None) -> Session:
+        """Log a user in. See UserService.login_user.
+
+        Logins mostly verify a password, so they run on the pool
+        concurrently instead of waiting behind queued writes. A legacy
+        password is hashed again on the pool and the new hash is stored
+        through the writer queue.
+        """
+        session = await self.__read(self.__service.login_user, db=db,
+                                   email=email, password=password,
+                                   client_id=client_id, rehash=False)
+        hasher = self.__service.hasher
+        if hasher.needs_rehash(session.user.password_hash):
+            password_hash = await asyncio.wrap_future(hasher.hash_async(password))
+            await self.__write(self.__service.set_password_hash, db=db,
+                               id=session.user_id, password_hash=password_hash)
+        return session
+
+    async def logout_user(self, db: Database, session: Session) -> Session:
+        """Log a user out. See UserService.logout_user."""
+        return await self.__run(self.__service.logout_user, db=db,
+                                session=session)
+
+    async def get_all_users(self, db: Database) -> list[User]:
+        """Get all users. See UserService.get_all_users."""
+        return await self.__read(self.__service.get_all_users, db=db)
+
+    async def list_users(self, db: Database, cursor: str = None,
+                         limit: int = 100, order_by: str = ORDER_BY_ID,
+                         filters: dict = None, max_scanned: int = 10000) -> Page:
+        """Get one page of users. See UserService.list_users."""
+        return await self.__read(self.__service.list_users, db=db,
+                                cursor=cursor, limit=limit,
+                                order_by=order_by, filters=filters,
+                                max_scanned=max_scanned)
+
+    async def search_users_by_name(self, db: Database, prefix: str,
+                                   limit: int = 20) -> list[User]:
+        """Find users by name prefix. See UserService.search_users_by_name."""
+        return await self.__read(self.__service.search_users_by_name, db=db,
+                                prefix=prefix, limit=limit)
+
+    async def get_one_user(self, db: Database, id: str) -> User | None:
+        """Get a user. See UserService.get_one_user."""
+        return await self.__read(self.__service.get_one_user, db=db, id=id)
+
+    async def flush(self, db: Database = None) -> None:
+        """Force pending mutations to storage after queued writes ran"""
+        await self.__write(self.__service.flush, db=db)
+
+    async def close(self) -> None:
+        """Wait for queued writes, then close the service and the pool"""
+        if self.__writer is not None:
+            await self.__queue.put(AsyncUserService.__STOP)
+            await self.__writer
+            self.__writer = None
+        await self.__run(self.__service.close)
+        self.__executor.shutdown(wait=True)
@@ -0,0 +1,58 @@
+import csv
+import io
+from typing import Iterable, Iterator
+
+
+class BulkImportResult:
+    """Outcome of a bulk user import"""
+
+    def __init__(self) -> None:
+        """Constructor for the BulkImportResult class"""
+        self.created = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def processed(self) -> int:
+        """Number of rows read from the source"""
+        return self.created + len(self.errors)
+
+    @property
+    def rate(self) -> float:
+        """Rows processed per second"""
+        if self.elapsed == 0:
+            return 0.0
+        return self.processed / self.elapsed
+
+    def add_error(self, row_number: int, message: str) -> None:
+        """Record why a row was not imported
+
+        Args:
+            row_number (int): 1-based number of the row in the source
+            message (str): reason the row was rejected
+        """
+        self.errors.append((row_number, message))
+
+    def __repr__(self) -> str:
+        """String representation of the BulkImportResult object"""
+        return f"{self.__class__.__name__}(created={self.created}, errors={len(self.errors)})"
+
+
+def read_rows(source: str | io.TextIOBase | Iterable[dict]) -> Iterator[dict]:
+    """Stream user rows from a csv file path, an open csv file or an
+    iterable of dictionaries
+
+    Args:
+        source: where the rows come from. CSV sources need a header with
+            email, name and password columns.
+
+    Returns:
+        Iterator[dict]: the rows, one at a time
+    """
+    if isinstance(source, str):
+        with open(source, mode='r', newline='') as file:
+            yield from csv.DictReader(f=file)
+    elif isinstance(source, io.TextIOBase):
+        yield from csv.DictReader(f=source)
+    else:
+        yield from source
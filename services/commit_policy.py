@@ -0,0 +1,127 @@
+import threading
+from interfaces.db import Database
+
+
+class CommitPolicy:
+    """CommitPolicy decides when the mutations made through UserService
+    are written to storage.
+
+    - immediate: every mutation is saved right away (the default)
+    - every_n: the database is saved once every N mutations
+    - interval: a background thread saves dirty databases every T ms
+
+    Mutations that land in the same window share a single save, which
+    trades a small durability window for write throughput. `flush`
+    forces a save at any time.
+    """
+
+    IMMEDIATE = "immediate"
+    EVERY_N = "every_n"
+    INTERVAL = "interval"
+    MODES = (IMMEDIATE, EVERY_N, INTERVAL)
+
+    def __init__(self, mode: str = IMMEDIATE, every: int = 1,
+                 interval_ms: int = 100) -> None:
+        """Constructor for the CommitPolicy class
+
+        Args:
+            mode (str, optional): one of immediate, every_n or interval.
+                Defaults to immediate.
+            every (int, optional): number of mutations per save in every_n
+                mode. Defaults to 1.
+            interval_ms (int, optional): milliseconds between saves in
+                interval mode. Defaults to 100.
+
+        Raises:
+            ValueError: If the mode or its setting is invalid
+        """
+        if mode not in CommitPolicy.MODES:
+            raise ValueError(f"mode must be one of {', '.join(CommitPolicy.MODES)}")
+
+        if every < 1:
+            raise ValueError("every must be at least 1")
+
+        if interval_ms <= 0:
+            raise ValueError("interval_ms must be greater than 0")
+
+        self.__mode = mode
+        self.__every = every
+        self.__interval = interval_ms / 1000
+        self.__dirty = {}
+        self.__stopped = threading.Event()
+        self.__flusher = None
+        self.lock = threading.RLock()
+
+        if mode == CommitPolicy.INTERVAL:
+            self.__flusher = threading.Thread(
+                target=self.__run, name="commit-flusher", daemon=True)
+            self.__flusher.start()
+
+    @classmethod
+    def immediate(cls) -> "CommitPolicy":
+        """Policy that saves after every mutation"""
+        return cls(mode=cls.IMMEDIATE)
+
+    @classmethod
+    def every_n(cls, every: int) -> "CommitPolicy":
+        """Policy that saves once every `every` mutations"""
+        return cls(mode=cls.EVERY_N, every=every)
+
+    @classmethod
+    def interval(cls, interval_ms: int) -> "CommitPolicy":
+        """Policy that saves dirty databases every `interval_ms` milliseconds"""
+        return cls(mode=cls.INTERVAL, interval_ms=interval_ms)
+
+    @property
+    def mode(self) -> str:
+        """Getter for the mode attribute"""
+        return self.__mode
+
+    def mutated(self, db: Database) -> None:
+        """Record a mutation made on a database and save it if the policy
+        says so. Callers hold `lock` around the mutation and this call.
+
+        Args:
+            db (Database): database that was mutated
+        """
+        with self.lock:
+            if self.__mode == CommitPolicy.IMMEDIATE:
+                db.save()
+                return
+
+            entry = self.__dirty.setdefault(id(db), [db, 0])
+            entry[1] += 1
+            if self.__mode == CommitPolicy.EVERY_N and entry[1] >= self.__every:
+                self.__dirty.pop(id(db))
+                db.save()
+
+    def flush(self, db: Database = None) -> None:
+        """Save pending mutations now
+
+        Args:
+            db (Database, optional): database to save. Defaults to None,
+                which saves every database with pending mutations.
+        """
+        with self.lock:
+            if db is not None:
+                self.__dirty.pop(id(db), None)
+                db.save()
+                return
+
+            dirty = [entry[0] for entry in self.__dirty.values()]
+            self.__dirty.clear()
+            for database in dirty:
+                database.save()
+
+    def close(self) -> None:
+        """Stop the background flusher and save pending mutations"""
+        self.__stopped.set()
+        if self.__flusher is not None:
+            self.__flusher.join()
+            self.__flusher = None
+        self.flush()
+
+    def __run(self) -> None:
+        """Private method run by the background flusher thread"""
+        while not self.__stopped.wait(self.__interval):
+            self.flush()
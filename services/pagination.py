@@ -0,0 +1,79 @@
+import base64
+import binascii
+import json
+from models.user import User
+from repository.indexes import ORDER_BY_CREATED_AT, ORDERS
+
+
+class Page:
+    """One page of a user listing"""
+
+    __slots__ = ("users", "next_cursor")
+
+    def __init__(self, users: list[User], next_cursor: str = None) -> None:
+        """Constructor for the Page class
+
+        Args:
+            users (list[User]): users on the page
+            next_cursor (str, optional): cursor of the next page, or None
+                if this is the last page
+        """
+        self.users = users
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self) -> bool:
+        """True if there is a page after this one"""
+        return self.next_cursor is not None
+
+    def __repr__(self) -> str:
+        """String representation of the Page object"""
+        return f"{self.__class__.__name__}(users={len(self.users)}, has_more={self.has_more})"
+
+
+def encode_cursor(order_by: str, key: str | tuple) -> str:
+    """Turn the key of the last user on a page into an opaque cursor
+
+    Args:
+        order_by (str): order of the listing
+        key (str | tuple): key of the last user on the page
+
+    Returns:
+        str: url-safe cursor
+    """
+    data = json.dumps([order_by, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str) -> str | tuple:
+    """Get the key back out of a cursor
+
+    Args:
+        cursor (str): cursor returned with an earlier page
+        order_by (str): order of the listing
+
+    Raises:
+        ValueError: If the cursor is malformed or from a listing in
+            another order
+
+    Returns:
+        str | tuple: key to continue after
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, key = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"cursor {cursor} is not valid")
+
+    if cursor_order != order_by or cursor_order not in ORDERS:
+        raise ValueError(f"cursor {cursor} is not valid for order {order_by}")
+
+    if order_by == ORDER_BY_CREATED_AT:
+        if not isinstance(key, list) or len(key) != 2 \
+                or not isinstance(key[0], int) or not isinstance(key[1], str):
+            raise ValueError(f"cursor {cursor} is not valid")
+        return tuple(key)
+
+    if not isinstance(key, str):
+        raise ValueError(f"cursor {cursor} is not valid")
+    return key
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from utils.metrics import REGISTRY
+
+_DECISIONS = REGISTRY.counter(
+    "rate_limit_decisions_total", "Rate limiter checks by outcome", ("limiter", "result"))
+_EVICTIONS = REGISTRY.counter(
+    "rate_limit_evictions_total", "Idle buckets dropped to bound memory", ("limiter",))
+
+
+class ThrottledError(ValueError):
+    """Raised when a request is refused by a rate limiter.
+
+    It is a ValueError so callers that only know about failed logins keep
+    treating it as one.
+    """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        """Constructor for the ThrottledError class
+
+        Args:
+            message (str): error message
+            retry_after (float): seconds until the request would be let in
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by a string, such as an email or a client
+    address.
+
+    Every key starts with `burst` tokens and earns `rate` tokens per
+    second up to `burst`. Buckets are refilled when they are checked, so
+    there is no background work, and a check is a dict lookup. At most
+    `max_keys` buckets are kept; the least recently checked one is dropped
+    when a new key arrives, which is the same as refilling it.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000,
+                 name: str = "limiter", clock: Callable[[], float] = time.monotonic) -> None:
+        """Constructor for the TokenBucketLimiter class
+
+        Args:
+            rate (float): tokens earned per second
+            burst (float): most tokens a bucket holds, at least 1
+            max_keys (int, optional): most buckets kept.
+                Defaults to 100000.
+            name (str, optional): label of the limiter in the metrics.
+                Defaults to limiter.
+            clock (Callable[[], float], optional): source of the time in
+                seconds. Defaults to time.monotonic.
+
+        Raises:
+            ValueError: If a setting is not positive, or burst is below 1
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.name = name
+        self.allowed = 0
+        self.throttled = 0
+        self.evictions = 0
+        self.__clock = clock
+        self.__buckets = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__buckets)
+
+    def acquire(self, key: str) -> float:
+        """Take a token from the bucket of a key if it has one
+
+        Args:
+            key (str): key of the bucket
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until
+                the bucket has one
+        """
+        now = self.__clock()
+        evicted = 0
+        with self.__lock:
+            bucket = self.__buckets.get(key)
+            if bucket is None:
+                bucket = self.__buckets[key] = [self.burst, now]
+                while len(self.__buckets) > self.max_keys:
+                    self.__buckets.popitem(last=False)
+                    evicted += 1
+                self.evictions += evicted
+            else:
+                self.__buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - bucket[0]) / self.rate
+                self.throttled += 1
+
+        if REGISTRY.enabled:
+            _DECISIONS.inc(self.name, "throttled" if wait else "allowed")
+            if evicted:
+                _EVICTIONS.inc(self.name, amount=evicted)
+        return wait
+
+    def stats(self) -> dict:
+        """Counts of the limiter
+
+        Returns:
+            dict: allowed, throttled, evictions and buckets
+        """
+        return {"allowed": self.allowed, "throttled": self.throttled,
+                "evictions": self.evictions, "buckets": len(self.__buckets)}
+
+
+class LoginLimiter:
+    """Admission control for logins, checked before the user is looked up
+    or a password is hashed.
+
+    Every attempt, successful or not, takes a token from the bucket of
+    its client, when the caller knows the client, and from the bucket of
+    its email. The client bucket is checked first, so a client sweeping
+    many emails is refused without using up the buckets of those emails.
+    """
+
+    def __init__(self, per_email: TokenBucketLimiter = None,
+                 per_client: TokenBucketLimiter = None) -> None:
+        """Constructor for the LoginLimiter class
+
+        Args:
+            per_email (TokenBucketLimiter, optional): buckets of the
+                emails. Defaults to 10 attempts at once, then one every
+                6 seconds.
+            per_client (TokenBucketLimiter, optional): buckets of the
+                clients. Defaults to 50 attempts at once, then 10 a second.
+        """
+        if per_email is None:
+            per_email = TokenBucketLimiter(rate=1 / 6, burst=10, name="login_email")
+        if per_client is None:
+            per_client = TokenBucketLimiter(rate=10, burst=50, name="login_client")
+        self.per_email = per_email
+        self.per_client = per_client
+
+    def check(self, email: str, client_id: str = None) -> None:
+        """Admit a login attempt or refuse it
+
+        Args:
+            email (str): email the attempt is for
+            client_id (str, optional): caller, eg its IP address.
+                Defaults to None, which only limits the email.
+
+        Raises:
+            ThrottledError: If the client or the email has no tokens left
+        """
+        if client_id is not None:
+            wait = self.per_client.acquire(client_id)
+            if wait:
+                raise ThrottledError("too many login attempts from this client", wait)
+
+        if isinstance(email, str):
+            wait = self.per_email.acquire(email.strip().lower())
+            if wait:
+                raise ThrottledError("too many login attempts for this email", wait)
+
+    def stats(self) -> dict:
+        """Counts of both limiters
+
+        Returns:
+            dict: stats of the email and the client limiters
+        """
+        return {"email": self.per_email.stats(), "client": self.per_client.stats()}
@@ -0,0 +1,299 @@
+import heapq
+import json
+import os
+import secrets
+import threading
+import time
+from models.user import User
+
+
+class Session:
+    """Session of a logged in user"""
+
+    __slots__ = ("__id", "__user_id", "__created_at", "__expires_at", "__user")
+
+    def __init__(self, id: str, user_id: str, created_at: float,
+                 expires_at: float, user: User = None) -> None:
+        """Constructor for the Session class
+
+        Args:
+            id (str): session id
+            user_id (str): id of the logged in user
+            created_at (float): epoch seconds when the session started
+            expires_at (float): epoch seconds when the session expires
+            user (User, optional): the logged in user. Not kept in snapshots.
+        """
+        self.__id = id
+        self.__user_id = user_id
+        self.__created_at = created_at
+        self.__expires_at = expires_at
+        self.__user = user
+
+    @property
+    def id(self) -> str:
+        """Getter for the id attribute"""
+        return self.__id
+
+    @property
+    def user_id(self) -> str:
+        """Getter for the user_id attribute"""
+        return self.__user_id
+
+    @property
+    def user(self) -> User:
+        """Getter for the user attribute"""
+        return self.__user
+
+    @property
+    def created_at(self) -> float:
+        """Getter for the created_at attribute"""
+        return self.__created_at
+
+    @property
+    def expires_at(self) -> float:
+        """Getter for the expires_at attribute"""
+        return self.__expires_at
+
+    def is_expired(self, now: float = None) -> bool:
+        """Check if the session has expired
+
+        Args:
+            now (float, optional): epoch seconds to check against.
+                Defaults to the current time.
+
+        Returns:
+            bool: True if the session has expired
+        """
+        if now is None:
+            now = time.time()
+        return now >= self.__expires_at
+
+    def to_dict(self) -> dict:
+        """Method to convert object to a python dictionary
+
+        Returns:
+            dict: Dictionary representation of object
+        """
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at
+        }
+
+    def __repr__(self) -> str:
+        """String representation of the Session object"""
+        return f"{self.__class__.__name__}('user_id={self.user_id}', 'expires_at={self.expires_at}')"
+
+
+class SessionStore:
+    """In-memory store of user sessions.
+
+    Sessions are indexed by session id and by user id, so checking if a
+    user is logged in never touches the user store. Expiry times are
+    kept in a heap that a background sweeper pops from; sessions that
+    expire between sweeps are also dropped lazily when they are looked
+    up. Sessions can optionally be snapshotted to a JSON file and are
+    restored from it on startup.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, sweep_interval: float = 60,
+                 snapshot_file: str = None, snapshot_interval: float = None) -> None:
+        """Constructor for the SessionStore class
+
+        Args:
+            ttl_seconds (float, optional): lifetime of a session.
+                Defaults to 3600.
+            sweep_interval (float, optional): seconds between sweeps of
+                expired sessions. None disables the sweeper thread.
+                Defaults to 60.
+            snapshot_file (str, optional): JSON file sessions are
+                snapshotted to and restored from. Defaults to None.
+            snapshot_interval (float, optional): seconds between snapshots.
+                Defaults to None, which only snapshots on close.
+        """
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be greater than 0")
+
+        self.__ttl = ttl_seconds
+        self.__sessions = {}
+        self.__by_user = {}
+        self.__expiry = []
+        self.__lock = threading.Lock()
+        self.__snapshot_file = snapshot_file
+        self.__stopped = threading.Event()
+        self.__threads = []
+
+        if snapshot_file is not None and os.path.exists(snapshot_file):
+            self.__restore()
+
+        if sweep_interval is not None:
+            self.__start(self.sweep, sweep_interval, "session-sweeper")
+        if snapshot_file is not None and snapshot_interval is not None:
+            self.__start(self.snapshot, snapshot_interval, "session-snapshot")
+
+    def __start(self, target, interval: float, name: str) -> None:
+        """Private method to run `target` every `interval` seconds"""
+        def run():
+            while not self.__stopped.wait(interval):
+                target()
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        thread.start()
+        self.__threads.append(thread)
+
+    def __add(self, session: Session) -> None:
+        """Private method to index a session. Caller holds the lock."""
+        self.__sessions[session.id] = session
+        self.__by_user.setdefault(session.user_id, set()).add(session.id)
+        heapq.heappush(self.__expiry, (session.expires_at, session.id))
+
+    def __remove(self, session_id: str) -> Session:
+        """Private method to drop a session. Caller holds the lock."""
+        session = self.__sessions.pop(session_id, None)
+        if session is not None:
+            ids = self.__by_user.get(session.user_id)
+            ids.discard(session_id)
+            if not ids:
+                del self.__by_user[session.user_id]
+        return session
+
+    def __len__(self) -> int:
+        """Number of sessions in the store, including unswept expired ones"""
+        return len(self.__sessions)
+
+    def create(self, user: User) -> Session:
+        """Start a session for a user
+
+        Args:
+            user (User): the logged in user
+
+        Returns:
+            Session: the new session
+        """
+        now = time.time()
+        session = Session(id=secrets.token_urlsafe(32), user_id=user.id,
+                          created_at=now, expires_at=now + self.__ttl,
+                          user=user)
+        with self.__lock:
+            self.__add(session)
+        return session
+
+    def get(self, session_id: str) -> Session | None:
+        """Get a live session
+
+        Args:
+            session_id (str): session id
+
+        Returns:
+            Session | None: the session, or None if it is unknown or expired
+        """
+        with self.__lock:
+            session = self.__sessions.get(session_id)
+            if session is not None and session.is_expired():
+                self.__remove(session_id)
+                return None
+            return session
+
+    def revoke(self, session_id: str) -> Session | None:
+        """End a session
+
+        Args:
+            session_id (str): session id
+
+        Returns:
+            Session | None: the ended session, or None if it was not live
+        """
+        with self.__lock:
+            session = self.__remove(session_id)
+        if session is None or session.is_expired():
+            return None
+        return session
+
+    def revoke_user(self, user_id: str) -> int:
+        """End every session of a user
+
+        Args:
+            user_id (str): id of the user
+
+        Returns:
+            int: number of sessions ended
+        """
+        with self.__lock:
+            ids = list(self.__by_user.get(user_id, ()))
+            for session_id in ids:
+                self.__remove(session_id)
+        return len(ids)
+
+    def is_logged_in(self, user_id: str) -> bool:
+        """Check if a user has a live session
+
+        Args:
+            user_id (str): id of the user
+
+        Returns:
+            bool: True if the user is logged in
+        """
+        now = time.time()
+        with self.__lock:
+            return any(not self.__sessions[session_id].is_expired(now)
+                       for session_id in self.__by_user.get(user_id, ()))
+
+    def sweep(self, now: float = None) -> int:
+        """Drop expired sessions
+
+        Args:
+            now (float, optional): epoch seconds to expire against.
+                Defaults to the current time.
+
+        Returns:
+            int: number of sessions dropped
+        """
+        if now is None:
+            now = time.time()
+
+        dropped = 0
+        with self.__lock:
+            while self.__expiry and self.__expiry[0][0] <= now:
+                _, session_id = heapq.heappop(self.__expiry)
+                session = self.__sessions.get(session_id)
+                if session is not None and session.is_expired(now):
+                    self.__remove(session_id)
+                    dropped += 1
+        return dropped
+
+    def snapshot(self) -> None:
+        """Write live sessions to the snapshot file"""
+        if self.__snapshot_file is None:
+            return
+
+        now = time.time()
+        with self.__lock:
+            sessions = [session.to_dict() for session in self.__sessions.values()
+                        if not session.is_expired(now)]
+        temp_file = f"{self.__snapshot_file}.tmp"
+        with open(temp_file, mode="w") as file:
+            json.dump(sessions, file)
+        os.replace(temp_file, self.__snapshot_file)
+
+    def __restore(self) -> None:
+        """Private method to load live sessions from the snapshot file"""
+        with open(self.__snapshot_file, mode="r") as file:
+            sessions = json.load(file)
+
+        now = time.time()
+        with self.__lock:
+            for item in sessions:
+                session = Session(id=item.get("id"), user_id=item.get("user_id"),
+                                  created_at=item.get("created_at"),
+                                  expires_at=item.get("expires_at"))
+                if not session.is_expired(now):
+                    self.__add(session)
+
+    def close(self) -> None:
+        """Stop the background threads and write a final snapshot"""
+        self.__stopped.set()
+        for thread in self.__threads:
+            thread.join()
+        self.__threads = []
+        self.snapshot()
@@ -1,10 +1,90 @@
+import io
+import logging
+import time
+from itertools import islice
+from typing import Iterable
+from interfaces.db import Database
 from repository.user_db import UserDatabase
+from repository.factory import open_database
+from repository.indexes import ORDER_BY_CREATED_AT, ORDER_BY_ID
+from services.commit_policy import CommitPolicy
+from services.rate_limiter import LoginLimiter
+from services.pagination import Page, decode_cursor, encode_cursor
+from services.bulk_import import BulkImportResult, read_rows
+from services.session_store import Session, SessionStore
 from models.user import User
+from utils.passwords import PasswordHasher
+from utils.metrics import timed
+from utils.timestamps import timestamp_key
+from utils.validators import password_validator, validate_emails, \
+    validate_passwords
+
+logger = logging.getLogger(__name__)
+
+LIST_FILTERS = ("created_from", "created_to", "logged_in", "email_domain")
 
 class UserService:
     """User servic class"""
 
-    def create_user(self, db: UserDatabase, email: str, name: str, password: str) -> User:
+    def __init__(self, commit_policy: CommitPolicy = None,
+                 hasher: PasswordHasher = None,
+                 sessions: SessionStore = None,
+                 login_limiter: LoginLimiter = None) -> None:
+        """Constructor for the UserService class
+
+        Args:
+            commit_policy (CommitPolicy, optional): when mutations are
+                saved. Defaults to saving after every mutation.
+            hasher (PasswordHasher, optional): hashes and verifies
+                passwords. Defaults to scrypt on a thread pool.
+            sessions (SessionStore, optional): where login sessions are
+                kept. Defaults to an in-memory store with a one hour TTL.
+            login_limiter (LoginLimiter, optional): throttles login
+                attempts per email and per client. Defaults to None,
+                no throttling.
+        """
+        if commit_policy is None:
+            commit_policy = CommitPolicy.immediate()
+        if hasher is None:
+            hasher = PasswordHasher()
+        if sessions is None:
+            sessions = SessionStore()
+        self.__commit_policy = commit_policy
+        self.__hasher = hasher
+        self.__sessions = sessions
+        self.__login_limiter = login_limiter
+
+    @property
+    def hasher(self) -> PasswordHasher:
+        """Hasher of the passwords"""
+        return self.__hasher
+
+    @staticmethod
+    def open_database(file: str, engine: str = None,
+                      journal: bool = False, shards: int = None,
+                      concurrent: bool = False) -> Database:
+        """Method to open the database the service should work on
+
+        Args:
+            file (str): file where data is stored
+            engine (str, optional): "csv" or "sqlite". Defaults to None,
+                which picks the engine from the file extension.
+            journal (bool, optional): Use the journaled mode of the csv
+                engine. Defaults to False.
+            shards (int, optional): Split a csv database over this many
+                shard files. Defaults to None, a single file.
+            concurrent (bool, optional): Make a csv database safe to share
+                between threads and processes. Defaults to False.
+
+        Returns:
+            Database: database instance
+        """
+        return open_database(file=file, engine=engine, journal=journal,
+                             shards=shards, concurrent=concurrent)
+
+    @timed("user_service", "UserService calls", operation="create_user")
+    def create_user(self, db: UserDatabase, email: str, name: str, password: str,
+                    password_hash: str = None) -> User:
         """Method to create a new user
 
         Args:
@@ -12,25 +92,154 @@ class UserService:
             email (str): email of the user
             name (str): name of the user
             password (str): password of the user
+            password_hash (str, optional): hash of `password` made earlier
+                with `hasher`, so it is not hashed again. Defaults to None.
 
         Returns:
             User: user object created
         """
+        new_user = self.__build_new_user(email=email, name=name,
+                                         password=password)
+        if db.get_user_by_email(email=email):
+            raise ValueError(f"email {email} already exists")
+
+        if password_hash is None:
+            password_hash = self.__hasher.hash(password)
+        new_user.password_hash = password_hash
+        with self.__commit_policy.lock:
+            saved_user = db.add(item=new_user)
+            self.__commit_policy.mutated(db)
+        return saved_user
+
+    @timed("user_service", "UserService calls", operation="create_users_bulk")
+    def create_users_bulk(self, db: UserDatabase,
+                          rows: str | io.TextIOBase | Iterable[dict],
+                          batch_size: int = 1000,
+                          progress_every: int = 10000) -> BulkImportResult:
+        """Method to create many users from a stream of rows
+
+        Rows are validated and added in batches. Invalid or duplicate rows
+        are reported in the result and do not stop the import, and only
+        the passwords of rows that will be added are hashed. The
+        database is saved once, at the end.
+
+        Args:
+            db (UserDatabase): database instance
+            rows: csv file path, open csv file or iterable of dictionaries
+                with email, name and password keys
+            batch_size (int, optional): rows per batch. Defaults to 1000.
+            progress_every (int, optional): log progress every this many
+                rows. Defaults to 10000.
+
+        Returns:
+            BulkImportResult: number of users created and per-row errors
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        result = BulkImportResult()
+        start = time.perf_counter()
+        next_report = progress_every
+        source = enumerate(read_rows(rows), start=1)
+
+        while True:
+            batch = list(islice(source, batch_size))
+            if not batch:
+                break
+
+            users = []
+            row_numbers = []
+            hashes = []
+            emails = set()
+            email_errors = validate_emails(row.get("email") for _, row in batch)
+            password_errors = validate_passwords(
+                row.get("password") for _, row in batch)
+            for (row_number, row), email_error, password_error in zip(
+                    batch, email_errors, password_errors):
+                error = self.__missing_field(email=row.get("email"),
+                                             name=row.get("name"),
+                                             password=row.get("password")) \
+                    or email_error or password_error
+                if error is None and (row.get("email") in emails
+                                      or db.get_user_by_email(email=row.get("email"))):
+                    error = f"email {row.get('email')} already exists"
+                if error is not None:
+                    result.add_error(row_number, error)
+                    continue
+                emails.add(row.get("email"))
+                users.append(User.with_valid_email(row.get("email"), row.get("name")))
+                row_numbers.append(row_number)
+                hashes.append(self.__hasher.hash_async(row.get("password")))
+
+            for user, password_hash in zip(users, hashes):
+                user.password_hash = password_hash.result()
+
+            with self.__commit_policy.lock:
+                errors = db.add_many(users)
+            for position, message in errors:
+                result.add_error(row_numbers[position], message)
+            result.created += len(users) - len(errors)
+
+            if result.processed >= next_report:
+                next_report += progress_every
+                result.elapsed = time.perf_counter() - start
+                logger.info("bulk import: %d rows processed, %d created, "
+                            "%d errors, %.0f rows/s", result.processed,
+                            result.created, len(result.errors), result.rate)
+
+        self.__commit_policy.flush(db=db)
+        result.errors.sort()
+        result.elapsed = time.perf_counter() - start
+        logger.info("bulk import finished: %d created, %d errors in %.2fs "
+                    "(%.0f rows/s)", result.created, len(result.errors),
+                    result.elapsed, result.rate)
+        return result
+
+    def __missing_field(self, email: str, name: str, password: str) -> str | None:
+        """Private method to check that no field of a new user is missing
+
+        Args:
+            email (str): email of the user
+            name (str): name of the user
+            password (str): password of the user
+
+        Returns:
+            str | None: which field is missing, or None
+        """
         if email is None:
-            raise ValueError("email cannot be None")
+            return "email cannot be None"
 
         if password is None:
-            raise ValueError("password cannot be None")
+            return "password cannot be None"
 
         if name is None:
-            raise ValueError("name cannot be None")
+            return "name cannot be None"
+        return None
+
+    @timed("user_service", "UserService calls", operation="build_new_user")
+    def __build_new_user(self, email: str, name: str, password: str) -> User:
+        """Private method to validate the fields of a new user
+
+        Args:
+            email (str): email of the user
+            name (str): name of the user
+            password (str): password of the user
+
+        Raises:
+            ValueError: If a field is missing or invalid
+
+        Returns:
+            User: the new user object
+        """
+        missing = self.__missing_field(email=email, name=name, password=password)
+        if missing is not None:
+            raise ValueError(missing)
 
         new_user = User(email=email, name=name)
         new_user.password = password
-        saved_user = db.add(item=new_user)
-        db.save()
-        return saved_user
+        return new_user
 
+    @timed("user_service", "UserService calls", operation="update_user")
     def update_user(self, db: UserDatabase, id: str, item: dict) -> User:
         """Method to update a user object
 
@@ -42,20 +251,29 @@ class UserService:
         Returns:
             User: updated user object
         """
-        updated_user = db.update(id=id, item=item)
-        db.save()
+        if isinstance(item, dict) and item.get("password") is not None:
+            password = password_validator(item.get("password"))
+            item = dict(item, password=self.__hasher.hash(password))
+
+        with self.__commit_policy.lock:
+            updated_user = db.update(id=id, item=item)
+            self.__commit_policy.mutated(db)
         return updated_user
 
+    @timed("user_service", "UserService calls", operation="delete_user")
     def delete_user(self, db: UserDatabase, id: str) -> None:
-        """Method to delete a user from database
+        """Method to delete a user from database and end their sessions
 
         Args:
             db (UserDatabase): database instance
             id (str): id of user to delete
         """
-        db.delete(id=id)
-        db.save()
+        with self.__commit_policy.lock:
+            db.delete(id=id)
+            self.__commit_policy.mutated(db)
+        self.__sessions.revoke_user(id)
 
+    @timed("user_service", "UserService calls", operation="get_all_users")
     def get_all_users(self, db: UserDatabase) -> list[User]:
         """Method to get all users
 
@@ -67,6 +285,135 @@ class UserService:
         """
         return list(db.all())
 
+    @timed("user_service", "UserService calls", operation="list_users")
+    def list_users(self, db: Database, cursor: str = None, limit: int = 100,
+                   order_by: str = ORDER_BY_ID, filters: dict = None,
+                   max_scanned: int = 10000) -> Page:
+        """Method to page through the users
+
+        Pages are found with keyset pagination on a sorted index, so a
+        page costs the same whatever its position and only one page is in
+        memory at a time. Filters other than the creation range in
+        creation order are checked on the users walked through, so a call
+        stops after `max_scanned` users even if the page is not full. The
+        page then has fewer users, maybe none, and a cursor to go on from
+        where it stopped.
+
+        Args:
+            db (Database): database instance
+            cursor (str, optional): `next_cursor` of the previous page.
+                Defaults to None, which returns the first page.
+            limit (int, optional): maximum number of users on the page.
+                Defaults to 100.
+            order_by (str, optional): id or created_at. Defaults to id.
+            filters (dict, optional): any of
+                created_from (datetime | str): created at or after,
+                created_to (datetime | str): created before,
+                logged_in (bool): has, or has not, a live session,
+                email_domain (str): part of the email after the @.
+                Defaults to no filters.
+            max_scanned (int, optional): most users walked through per
+                call. Defaults to 10000.
+
+        Raises:
+            ValueError: If the limit, order, cursor, a filter or
+                max_scanned is invalid
+
+        Returns:
+            Page: the users and the cursor of the next page
+        """
+        if not isinstance(limit, int) or limit < 1:
+            raise ValueError("limit must be a positive integer")
+
+        if not isinstance(max_scanned, int) or max_scanned < 1:
+            raise ValueError("max_scanned must be a positive integer")
+
+        filters = dict(filters or {})
+        unknown = set(filters) - set(LIST_FILTERS)
+        if unknown:
+            raise ValueError(f"unknown filters {', '.join(sorted(unknown))}, "
+                             f"expected {', '.join(LIST_FILTERS)}")
+
+        created_from = filters.get("created_from")
+        created_to = filters.get("created_to")
+        if created_from is not None:
+            created_from = timestamp_key(created_from)
+        if created_to is not None:
+            created_to = timestamp_key(created_to)
+        logged_in = filters.get("logged_in")
+        email_domain = filters.get("email_domain")
+        if email_domain is not None:
+            email_domain = email_domain.lstrip("@").lower()
+
+        after = None if cursor is None else decode_cursor(cursor, order_by)
+        if order_by == ORDER_BY_CREATED_AT and created_from is not None:
+            start = (created_from, "")
+            after = start if after is None else max(after, start)
+
+        users = []
+        last_key = None
+        last_scanned = None
+        scanned = 0
+        for key, user in db.scan(order_by=order_by, after=after):
+            if scanned == max_scanned:
+                return Page(users, encode_cursor(order_by, last_scanned))
+            scanned += 1
+            last_scanned = key
+
+            if order_by == ORDER_BY_CREATED_AT:
+                created = key[0]
+                if created_to is not None and created >= created_to:
+                    break
+            elif created_from is not None or created_to is not None:
+                created = timestamp_key(user.created_at)
+                if (created_from is not None and created < created_from) \
+                        or (created_to is not None and created >= created_to):
+                    continue
+
+            if email_domain is not None \
+                    and user.email.rpartition("@")[2].lower() != email_domain:
+                continue
+            if logged_in is not None \
+                    and self.__sessions.is_logged_in(user.id) != logged_in:
+                continue
+
+            if len(users) == limit:
+                return Page(users, encode_cursor(order_by, last_key))
+            users.append(user)
+            last_key = key
+        return Page(users)
+
+    @timed("user_service", "UserService calls", operation="search_users_by_name")
+    def search_users_by_name(self, db: Database, prefix: str, limit: int = 20) -> list[User]:
+        """Method to find users by the start of their name, ignoring case
+
+        The database keeps a sorted index of the names, so a search costs
+        as much as the users it returns, not the number of users stored.
+
+        Args:
+            db (Database): database instance
+            prefix (str): start of the name
+            limit (int, optional): maximum number of users. Defaults to 20.
+
+        Raises:
+            TypeError: If the prefix is not a string
+            ValueError: If the prefix is empty or the limit is invalid
+
+        Returns:
+            list[User]: matching users, ordered by name
+        """
+        if not isinstance(prefix, str):
+            raise TypeError("prefix must be of type str")
+
+        if not prefix.strip():
+            raise ValueError("prefix cannot be empty")
+
+        if not isinstance(limit, int) or limit < 1:
+            raise ValueError("limit must be a positive integer")
+
+        return db.search_by_name(prefix, limit)
+
+    @timed("user_service", "UserService calls", operation="get_one_user")
     def get_one_user(self, db: UserDatabase, id: str) -> User | None:
         """Method to get a user
 
@@ -79,16 +426,27 @@ class UserService:
         """
         return db.get(id=id)
 
-    def login_user(self, db: UserDatabase, email: str, password: str) -> User:
+    @timed("user_service", "UserService calls", operation="login_user")
+    def login_user(self, db: UserDatabase, email: str, password: str,
+                   client_id: str = None, rehash: bool = True) -> Session:
         """Method to log a user in
 
         Args:
             db (UserDatabase): database instance
             email (str): email of the user
             password (str): password of the user
+            client_id (str, optional): caller of the login, eg its IP
+                address, for the login limiter. Defaults to None.
+            rehash (bool, optional): store a new hash of a password kept
+                with outdated parameters. Callers that order their writes
+                pass False and call `set_password_hash` themselves.
+                Defaults to True.
+
+        Raises:
+            ThrottledError: If the login limiter refuses the attempt
 
         Returns:
-            User: the user object
+            Session: the session of the logged in user
         """
         if email is None:
             raise ValueError("email cannot be None")
@@ -96,33 +454,92 @@ class UserService:
         if password is None:
             raise ValueError("password cannot be None")
 
+        if self.__login_limiter is not None:
+            self.__login_limiter.check(email, client_id)
+
         user = db.get_user_by_email(email=email)
 
         if not user:
             raise ValueError(f"user with {email} does not exist")
 
-        if user.check_password_is_same(password=password):
-            logged_in_user = db.update(id=user.id, item={"is_logged_in": True})
-            db.save()
-            return logged_in_user
-        raise ValueError("password is incorrect.")
+        if not self.__hasher.verify(user.password_hash, password):
+            raise ValueError("password is incorrect.")
 
-    def logout_user(self, db: UserDatabase, user: User) -> User:
+        if rehash and self.__hasher.needs_rehash(user.password_hash):
+            user = self.set_password_hash(db, user.id, self.__hasher.hash(password))
+
+        return self.__sessions.create(user)
+
+    def set_password_hash(self, db: UserDatabase, id: str, password_hash: str) -> User:
+        """Method to store a new hash of a user's password
+
+        Args:
+            db (UserDatabase): database instance
+            id (str): id of the user
+            password_hash (str): hash made with `hasher`
+
+        Returns:
+            User: the updated user object, or None if it does not exist
+        """
+        with self.__commit_policy.lock:
+            user = db.update(id=id, item={"password": password_hash})
+            self.__commit_policy.mutated(db)
+        return user
+
+    @timed("user_service", "UserService calls", operation="logout_user")
+    def logout_user(self, db: UserDatabase, session: Session) -> Session:
         """Method to logout user
 
         Args:
             db (UserDatabase): database instance
-            user (User): user to be logged out
+            session (Session): session to end
+
+        Returns:
+            Session: the ended session
         """
-        if not isinstance(user, User):
-            raise TypeError(f"user {user} must be of type User")
+        if session is None:
+            raise ValueError("session cannot be None")
 
-        if user is None:
-            raise ValueError("user cannot be None")
+        if not isinstance(session, Session):
+            raise TypeError(f"session {session} must be of type Session")
 
-        if not user.is_logged_in:
-            raise Exception(f"user {user.id} has already been logged out")
+        if self.__sessions.revoke(session.id) is None:
+            raise Exception(f"user {session.user_id} has already been logged out")
+        return session
+
+    def get_session(self, session_id: str) -> Session | None:
+        """Method to get a live session
+
+        Args:
+            session_id (str): id of the session
+
+        Returns:
+            Session | None: the session, or None if it is unknown or expired
+        """
+        return self.__sessions.get(session_id)
+
+    def is_logged_in(self, user_id: str) -> bool:
+        """Method to check if a user has a live session
+
+        Args:
+            user_id (str): id of the user
+
+        Returns:
+            bool: True if the user is logged in
+        """
+        return self.__sessions.is_logged_in(user_id)
+
+    def flush(self, db: Database = None) -> None:
+        """Method to force pending mutations to storage
+
+        Args:
+            db (Database, optional): database to flush. Defaults to None,
+                which flushes every database with pending mutations.
+        """
+        self.__commit_policy.flush(db=db)
 
-        logged_out_user = db.update(id=user.id, item={"is_logged_in": False})
-        db.save()
-        return logged_out_user
+    def close(self) -> None:
+        """Method to stop background flushing and flush pending mutations"""
+        self.__commit_policy.close()
+        self.__hasher.close()
+        self.__sessions.close()
@@ -0,0 +1,175 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from models.user import User
+from repository.indexes import ORDER_BY_CREATED_AT, ORDER_BY_ID
+from repository.user_db import UserDatabase
+from services.async_user_service import AsyncUserService
+from services.commit_policy import CommitPolicy
+from services.user_service import UserService
+from utils.passwords import PasswordHasher, hash_password
+
+
+class BarrierExecutor(ThreadPoolExecutor):
+    """Executor whose password hashes only finish once `parties` of them
+    run at the same time"""
+
+    def __init__(self, parties: int) -> None:
+        super().__init__(max_workers=parties)
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def submit(self, fn, *args, **kwargs):
+        if fn is hash_password:
+            def wait_then_hash(*args, **kwargs):
+                self.barrier.wait()
+                return hash_password(*args, **kwargs)
+            return super().submit(wait_then_hash, *args, **kwargs)
+        return super().submit(fn, *args, **kwargs)
+
+
+class TestAsyncUserService(TestCase):
+    """Test the AsyncUserService class
+
+    Args:
+        TestCase: base class for all tests
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "users.csv")
+        with open(self.file, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.db = UserDatabase(file_to_connect_to=self.file)
+        self.service = AsyncUserService(
+            service=UserService(hasher=PasswordHasher(n=2 ** 8)), max_workers=2)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_async_user_flow(self):
+        """Test create, login, update, list and logout through the event loop"""
+        async def flow():
+            user = await self.service.create_user(
+                db=self.db, email="abc@google.com", name="John Doe",
+                password="Password1234")
+            session = await self.service.login_user(
+                db=self.db, email="abc@google.com", password="Password1234")
+            updated = await self.service.update_user(
+                db=self.db, id=user.id, item={"name": "Jane Doe"})
+            users = await self.service.get_all_users(db=self.db)
+            await self.service.logout_user(db=self.db, session=session)
+            await self.service.close()
+            return user, session, updated, users
+
+        user, session, updated, users = asyncio.run(flow())
+        self.assertEqual(session.user_id, user.id)
+        self.assertEqual(updated.name, "Jane Doe")
+        self.assertEqual([item.name for item in users], ["Jane Doe"])
+
+    def test_concurrent_writes_are_serialised(self):
+        """Test that concurrent creates all land and errors reach the caller"""
+        async def flow():
+            results = await asyncio.gather(*[
+                self.service.create_user(
+                    db=self.db, email=f"user{index}@google.com",
+                    name=f"User {index}", password="Password1234")
+                for index in range(10)
+            ], self.service.create_user(
+                db=self.db, email="bad", name="Bad", password="Password1234"),
+                return_exceptions=True)
+            await self.service.close()
+            return results
+
+        results = asyncio.run(flow())
+        self.assertIsInstance(results[-1], ValueError)
+        self.assertEqual(len(UserDatabase(self.file).users), 10)
+
+    def test_reads_never_miss_a_user_being_updated(self):
+        """Test that reads on the pool do not run in the middle of a write"""
+        users = []
+        for index in range(5000):
+            user = User(email=f"user{index}@google.com", name=f"User {index}")
+            user.password = "Password1234"
+            users.append(user)
+        self.db.add_many(users)
+        self.db.save()
+        id = users[0].id
+        service = AsyncUserService(
+            service=UserService(commit_policy=CommitPolicy.every_n(1000)),
+            max_workers=4)
+
+        async def flow():
+            for order_by in (ORDER_BY_CREATED_AT, ORDER_BY_ID):
+                await service.list_users(db=self.db, order_by=order_by)
+            await service.search_users_by_name(db=self.db, prefix="User")
+            updating = True
+            reads = []
+
+            async def read():
+                while updating:
+                    reads.append(await service.get_one_user(db=self.db, id=id))
+
+            readers = [asyncio.create_task(read()) for _ in range(3)]
+            for round in range(300):
+                await service.update_user(db=self.db, id=id,
+                                          item={"name": f"User {round}"})
+            updating = False
+            await asyncio.gather(*readers)
+            await service.close()
+            return reads
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            reads = asyncio.run(flow())
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(reads.count(None), 0)
+
+    def test_registrations_are_hashed_in_parallel(self):
+        """Test that passwords are hashed before the writer queue"""
+        executor = BarrierExecutor(3)
+        service = AsyncUserService(
+            service=UserService(hasher=PasswordHasher(n=2 ** 8, executor=executor)),
+            max_workers=4)
+
+        async def flow():
+            users = await asyncio.gather(*[
+                service.create_user(db=self.db, email=f"user{index}@google.com",
+                                    name=f"User {index}", password="Password1234")
+                for index in range(3)])
+            await service.close()
+            return users
+
+        users = asyncio.run(flow())
+        executor.shutdown()
+        self.assertFalse(executor.barrier.broken)
+        self.assertEqual(len(users), 3)
+
+    def test_login_rehashes_through_the_writer(self):
+        """Test that a legacy password hash is replaced on login"""
+        legacy = UserService(hasher=PasswordHasher(n=2 ** 8))
+        legacy.create_user(db=self.db, email="abc@google.com", name="John Doe",
+                           password="Password1234")
+        legacy.close()
+        service = AsyncUserService(
+            service=UserService(hasher=PasswordHasher(n=2 ** 9)), max_workers=2)
+
+        async def flow():
+            session = await service.login_user(
+                db=self.db, email="abc@google.com", password="Password1234")
+            await service.close()
+            return session
+
+        session = asyncio.run(flow())
+        stored = self.db.get(session.user_id)[0].password_hash
+        self.assertNotEqual(stored, session.user.password_hash)
+        self.assertFalse(PasswordHasher(n=2 ** 9).needs_rehash(stored))
+
+if __name__ == '__main__':
+    unittest.main()
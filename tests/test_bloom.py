@@ -0,0 +1,53 @@
+import unittest
+from unittest import TestCase
+from repository.bloom import BloomFilter
+
+
+class TestBloomFilter(TestCase):
+    """Test class for the BloomFilter class"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.emails = [f"user{i}@example.com" for i in range(2000)]
+        self.bloom = BloomFilter.from_items(self.emails, len(self.emails), 0.01)
+
+    def test_no_false_negatives(self):
+        """Test that every added item is reported present"""
+        self.assertEqual(len(self.bloom), 2000)
+        for email in self.emails:
+            self.assertIn(email, self.bloom)
+
+    def test_false_positive_rate(self):
+        """Test that unknown items are mostly rejected"""
+        hits = sum(f"other{i}@example.com" in self.bloom for i in range(10000))
+        self.assertLess(hits / 10000, 0.03)
+        self.assertAlmostEqual(self.bloom.false_positive_rate, 0.01, delta=0.005)
+
+    def test_round_trip_through_bytes(self):
+        """Test that a serialized filter gives the same answers"""
+        bloom = BloomFilter.from_bytes(self.bloom.to_bytes())
+        self.assertEqual(len(bloom), 2000)
+        self.assertEqual(bloom.error_rate, 0.01)
+        for i in range(500):
+            email = f"other{i}@example.com"
+            self.assertEqual(email in bloom, email in self.bloom)
+
+    def test_invalid_arguments(self):
+        """Test the constructor and loader arguments"""
+        with self.assertRaises(ValueError):
+            BloomFilter(10, error_rate=1.5)
+        with self.assertRaises(ValueError):
+            BloomFilter(-1)
+        with self.assertRaises(ValueError):
+            BloomFilter.from_bytes(b"short")
+
+    def test_empty_filter(self):
+        """Test a filter sized for no items"""
+        bloom = BloomFilter(0)
+        self.assertNotIn("user@example.com", bloom)
+        bloom.add("user@example.com")
+        self.assertIn("user@example.com", bloom)
+
+
+if __name__ == '__main__':
+    unittest.main()
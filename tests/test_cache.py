@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from models.user import User
+from repository.cache import LRUCache
+from repository.user_db import UserDatabase
+
+
+class TestLRUCache(TestCase):
+    """Test class for the LRUCache class"""
+
+    def test_least_recently_used_is_evicted(self):
+        """Test eviction order and counts"""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "evictions": 1,
+                                         "size": 2, "capacity": 2})
+
+    def test_pop_and_clear(self):
+        """Test dropping entries"""
+        cache = LRUCache(4)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.pop("a")
+        cache.pop("missing")
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_zero_capacity_keeps_nothing(self):
+        """Test that a cache of size 0 is off"""
+        cache = LRUCache(0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+        with self.assertRaises(ValueError):
+            LRUCache(-1)
+
+
+class TestUserDatabaseCache(TestCase):
+    """Test class for the user cache of the UserDatabase class"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, mode="w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.db = UserDatabase(self.filename, journal=True, cache_size=2)
+        self.user = User(email="cached@google.com", name="Cached User")
+        self.user.password = "Password1234"
+        self.db.add(self.user)
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def test_repeated_lookups_hit(self):
+        """Test that the same view is returned for repeated lookups"""
+        first, _ = self.db.get(self.user.id)
+        second, _ = self.db.get(self.user.id)
+        self.assertIs(first, second)
+        self.assertIs(self.db.get_user_by_email(self.user.email),
+                      self.db.get_user_by_email(self.user.email))
+        stats = self.db.cache_stats
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+
+    def test_returned_objects_cannot_change_the_cache(self):
+        """Test that callers cannot mutate cached state"""
+        view, row = self.db.get(self.user.id)
+        row["name"] = "Changed"
+        with self.assertRaises(AttributeError):
+            view.name = "Changed"
+        self.assertEqual(self.db.get(self.user.id)[0].name, "Cached User")
+        self.assertEqual(self.db.get(self.user.id)[1]["name"], "Cached User")
+
+    def test_update_invalidates(self):
+        """Test that updates drop the cached user under both keys"""
+        self.db.get(self.user.id)
+        self.db.get_user_by_email(self.user.email)
+        self.db.update(self.user.id, {"name": "Renamed", "email": "moved@google.com"})
+        self.assertEqual(self.db.get(self.user.id)[0].name, "Renamed")
+        self.assertFalse(self.db.get_user_by_email(self.user.email))
+        self.assertEqual(self.db.get_user_by_email("moved@google.com").name, "Renamed")
+
+    def test_delete_invalidates(self):
+        """Test that deletes drop the cached user"""
+        self.db.get(self.user.id)
+        self.db.get_user_by_email(self.user.email)
+        self.db.delete(self.user.id)
+        self.assertIsNone(self.db.get(self.user.id))
+        self.assertFalse(self.db.get_user_by_email(self.user.email))
+
+    def test_changes_of_other_processes_invalidate(self):
+        """Test that reloading changes made through another handle drops
+        cached users"""
+        self.db.save()
+        first = UserDatabase(self.filename, journal=True, concurrent=True)
+        second = UserDatabase(self.filename, journal=True, concurrent=True)
+        self.assertEqual(first.get(self.user.id)[0].name, "Cached User")
+        second.update(self.user.id, {"name": "Renamed"})
+        second.save()
+        self.assertEqual(first.get(self.user.id)[0].name, "Renamed")
+        second.compact()
+        second.delete(self.user.id)
+        second.save()
+        self.assertIsNone(first.get(self.user.id))
+
+    def test_eviction_is_bounded(self):
+        """Test that the cache holds at most cache_size users"""
+        for i in range(5):
+            user = User(email=f"user{i}@google.com", name=f"User {i}")
+            user.password = "Password1234"
+            self.db.add(user)
+            self.db.get(user.id)
+        stats = self.db.cache_stats
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["evictions"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
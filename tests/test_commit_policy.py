@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from unittest import TestCase
+from services.commit_policy import CommitPolicy
+
+
+class CountingDatabase:
+    """Stand-in database that counts how often it is saved"""
+
+    def __init__(self):
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+
+class TestCommitPolicy(TestCase):
+    """Test the CommitPolicy class
+
+    Args:
+        TestCase: Base class for all tests
+    """
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.db = CountingDatabase()
+
+    def test_invalid_policy(self):
+        """Test that invalid settings are rejected"""
+        with self.assertRaises(ValueError):
+            CommitPolicy(mode="sometimes")
+        with self.assertRaises(ValueError):
+            CommitPolicy.every_n(0)
+        with self.assertRaises(ValueError):
+            CommitPolicy.interval(0)
+
+    def test_immediate_policy_saves_every_mutation(self):
+        """Test that the immediate policy saves after each mutation"""
+        policy = CommitPolicy.immediate()
+        for _ in range(3):
+            policy.mutated(self.db)
+        self.assertEqual(self.db.saves, 3)
+
+    def test_every_n_policy_coalesces_mutations(self):
+        """Test that every_n saves once per N mutations"""
+        policy = CommitPolicy.every_n(4)
+        for _ in range(10):
+            policy.mutated(self.db)
+        self.assertEqual(self.db.saves, 2)
+        policy.flush()
+        self.assertEqual(self.db.saves, 3)
+        policy.flush()
+        self.assertEqual(self.db.saves, 3)
+
+    def test_flush_with_database_forces_save(self):
+        """Test that flushing a database always saves it"""
+        policy = CommitPolicy.every_n(100)
+        policy.flush(self.db)
+        self.assertEqual(self.db.saves, 1)
+
+    def test_interval_policy_shares_flush(self):
+        """Test that concurrent mutations in one window share a save"""
+        policy = CommitPolicy.interval(200)
+        threads = [threading.Thread(target=policy.mutated, args=(self.db,))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        time.sleep(0.5)
+        self.assertGreaterEqual(self.db.saves, 1)
+        self.assertLessEqual(self.db.saves, 2)
+        policy.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
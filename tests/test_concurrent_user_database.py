@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+from unittest import TestCase
+from models.user import User
+from repository.factory import open_database
+from repository.locks import ReadWriteLock
+from repository.user_db import UserDatabase
+from services.commit_policy import CommitPolicy
+from services.user_service import UserService
+
+HEADER = "id,email,name,password,is_logged_in,created_at,updated_at\n"
+
+
+def add_users(filename: str, prefix: str, count: int, journal: bool) -> None:
+    """Worker process adding users to a shared file, saving after each"""
+    db = UserDatabase(filename, journal=journal, concurrent=True)
+    for index in range(count):
+        user = User(email=f"{prefix}{index}@google.com", name=f"User {index}")
+        user.password = "Password1234"
+        db.add(user)
+        db.save()
+
+
+class TestReadWriteLock(TestCase):
+    """Test the ReadWriteLock class"""
+
+    def test_readers_share_the_lock(self):
+        """Test that two threads can read at the same time"""
+        lock = ReadWriteLock()
+        inside = threading.Barrier(2, timeout=2)
+
+        def reader():
+            with lock.read():
+                inside.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(inside.broken)
+
+    def test_writer_excludes_readers(self):
+        """Test that a reader waits for the writer"""
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_write()
+        thread = threading.Thread(target=lambda: (lock.acquire_read(),
+                                                  events.append("read"),
+                                                  lock.release_read()))
+        thread.start()
+        thread.join(0.1)
+        events.append("write done")
+        lock.release_write()
+        thread.join()
+        self.assertEqual(events, ["write done", "read"])
+
+    def test_write_lock_is_reentrant(self):
+        """Test that the writer can take the lock again and read"""
+        lock = ReadWriteLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            pass
+
+
+class TestConcurrentUserDatabase(TestCase):
+    """Test sharing a UserDatabase between threads and processes"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write(HEADER)
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def test_instances_do_not_share_state(self):
+        """Test that two databases on different files are independent"""
+        other = os.path.join(self.directory.name, "other.csv")
+        with open(other, "w") as file:
+            file.write(HEADER)
+        db = UserDatabase(self.filename)
+        user = User(email="abc@google.com", name="John Doe")
+        user.password = "Password1234"
+        db.add(user)
+        self.assertEqual(UserDatabase(other).users, [])
+        self.assertEqual(len(db.users), 1)
+
+    def test_threads_share_one_database(self):
+        """Test concurrent adds and reads from many threads"""
+        db = UserDatabase(self.filename, concurrent=True)
+
+        def worker(prefix):
+            for index in range(50):
+                user = User(email=f"{prefix}{index}@google.com", name="User")
+                user.password = "Password1234"
+                db.add(user)
+                list(db.all())
+                db.get_user_by_email(f"{prefix}{index}@google.com")
+
+        threads = [threading.Thread(target=worker, args=(f"user{name}x",))
+                   for name in "abcd"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        db.save()
+        self.assertEqual(len(UserDatabase(self.filename).users), 200)
+
+    def test_readers_never_miss_a_user_being_updated(self):
+        """Test that lookups during updates always find the user"""
+        for file in (self.filename, os.path.join(self.directory.name, "users.db")):
+            with self.subTest(file=file):
+                db = open_database(file, journal=True, concurrent=True)
+                user = User(email="busy@google.com", name="Busy User")
+                user.password = "Password1234"
+                db.add(user)
+                done = threading.Event()
+                misses = []
+
+                def reader():
+                    while not done.is_set():
+                        if not db.get_user_by_email("busy@google.com") \
+                                or db.get(user.id) is None:
+                            misses.append(1)
+
+                threads = [threading.Thread(target=reader) for _ in range(3)]
+                for thread in threads:
+                    thread.start()
+                for index in range(300):
+                    db.update(user.id, {"name": f"Busy User {index}"})
+                done.set()
+                for thread in threads:
+                    thread.join()
+                db.save()
+                self.assertEqual(misses, [])
+
+    def test_processes_share_one_file(self):
+        """Test that saves from several processes do not lose writes"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                with open(self.filename, "w") as file:
+                    file.write(HEADER)
+                if os.path.exists(f"{self.filename}.journal"):
+                    os.remove(f"{self.filename}.journal")
+
+                workers = [multiprocessing.Process(
+                    target=add_users, args=(self.filename, prefix, 20, journal))
+                    for prefix in ("alpha", "beta", "gamma")]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+
+                db = UserDatabase(self.filename, journal=journal)
+                self.assertEqual(len(db.users), 60)
+
+    def test_reload_on_change(self):
+        """Test that a write from another instance is seen without reopening"""
+        reader = UserDatabase(self.filename, journal=True, concurrent=True)
+        writer = UserDatabase(self.filename, journal=True, concurrent=True)
+        user = User(email="abc@google.com", name="John Doe")
+        user.password = "Password1234"
+        writer.add(user)
+        self.assertFalse(reader.get_user_by_email("abc@google.com"))
+        writer.save()
+        self.assertEqual(reader.get_user_by_email("abc@google.com").id, user.id)
+        writer.compact()
+        self.assertEqual(reader.get(user.id)[0].email, "abc@google.com")
+
+    def test_first_saved_email_wins(self):
+        """Test that two instances adding the same email keep the first
+        one saved"""
+        for journal in (False, True):
+            with self.subTest(journal=journal):
+                with open(self.filename, "w") as file:
+                    file.write(HEADER)
+                if os.path.exists(f"{self.filename}.journal"):
+                    os.remove(f"{self.filename}.journal")
+
+                first = UserDatabase(self.filename, journal=journal, concurrent=True)
+                second = UserDatabase(self.filename, journal=journal, concurrent=True)
+                users = []
+                for db, name in ((first, "John Doe"), (second, "Jane Doe")):
+                    user = User(email="abc@google.com", name=name)
+                    user.password = "Password1234"
+                    db.add(user)
+                    users.append(user)
+                first.save()
+                with self.assertRaisesRegex(ValueError, users[1].id):
+                    second.save()
+                second.save()
+
+                self.assertEqual(second.get_user_by_email("abc@google.com").id,
+                                 users[0].id)
+                self.assertFalse(second.get(users[1].id))
+                db = UserDatabase(self.filename, journal=journal)
+                self.assertEqual(len(db.users), 1)
+                self.assertEqual(db.get_user_by_email("abc@google.com").name, "John Doe")
+
+    def test_service_reports_a_user_lost_to_another_process(self):
+        """Test that create_user fails when another process saved the
+        email between the add and the save"""
+        first = UserDatabase(self.filename, journal=True, concurrent=True)
+        second = UserDatabase(self.filename, journal=True, concurrent=True)
+        service = UserService(commit_policy=CommitPolicy.every_n(2))
+        service.create_user(db=second, email="abc@google.com",
+                            name="Jane Doe", password="Password1234")
+        service.create_user(db=first, email="abc@google.com",
+                            name="John Doe", password="Password1234")
+        service.flush(db=first)
+        with self.assertRaisesRegex(ValueError, "already exists"):
+            service.create_user(db=second, email="def@google.com",
+                                name="Jim Doe", password="Password1234")
+        self.assertEqual(second.get_user_by_email("abc@google.com").name, "John Doe")
+        self.assertTrue(UserDatabase(self.filename, journal=True)
+                        .get_user_by_email("def@google.com"))
+
+
+if __name__ == '__main__':
+    unittest.main()
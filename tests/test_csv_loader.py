@@ -0,0 +1,78 @@
+import csv
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from repository.csv_loader import read_rows, split_records
+from repository.user_db import UserDatabase
+
+
+class TestCsvLoader(TestCase):
+    """Test class for the chunked csv loader"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, mode="w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["id", "email", "name", "password",
+                             "is_logged_in", "created_at", "updated_at"])
+            for i in range(500):
+                name = f'User "{i}"\nsecond line' if i % 7 == 0 else f"User {i}"
+                writer.writerow([f"id-{i}", f"user{i}@google.com", name, "hash",
+                                 "False", "2024-01-01T00:00:00+00:00",
+                                 "2024-01-01T00:00:00+00:00"])
+            file.write("\n")
+            writer.writerow(["short", "short@google.com"])
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def expected(self):
+        with open(self.filename, newline="") as file:
+            return list(csv.DictReader(file))
+
+    def test_ranges_end_on_record_boundaries(self):
+        """Test that no range starts inside a quoted field"""
+        fieldnames, ranges = split_records(self.filename, 16)
+        self.assertEqual(fieldnames[0], "id")
+        self.assertGreater(len(ranges), 1)
+        with open(self.filename, mode="rb") as file:
+            data = file.read()
+        for start, _ in ranges:
+            self.assertEqual(data[start - 1:start], b"\n")
+            self.assertEqual(data[:start].count(b'"') % 2, 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.filename))
+        self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+
+    def test_parallel_read_matches_dict_reader(self):
+        """Test that chunked parsing returns the rows of csv.DictReader"""
+        for workers in (2, 3, 8):
+            self.assertEqual(read_rows(self.filename, workers=workers, min_bytes=0),
+                             self.expected())
+
+    def test_parallel_read_from_a_thread(self):
+        """Test chunked parsing started from a thread, as shards are opened"""
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            rows = pool.submit(read_rows, self.filename, workers=2, min_bytes=0)
+            self.assertEqual(rows.result(timeout=60), self.expected())
+
+    def test_small_files_are_read_serially(self):
+        """Test the serial fallback"""
+        self.assertEqual(read_rows(self.filename, workers=4), self.expected())
+
+    def test_database_load(self):
+        """Test that the database loads the same users with more workers"""
+        serial = UserDatabase(self.filename, load_workers=1)
+        with self.assertRaises(ValueError):
+            UserDatabase(self.filename, load_workers=0)
+        self.assertEqual(serial.get_user_by_email("user7@google.com").name,
+                         'User "7"\nsecond line')
+        self.assertEqual(len(serial.users), 501)
+
+
+if __name__ == '__main__':
+    unittest.main()
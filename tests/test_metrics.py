@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+import urllib.request
+from unittest import TestCase
+from repository.user_db import UserDatabase
+from services.user_service import UserService
+from utils.metrics import REGISTRY, MetricsRegistry, serve_metrics, timed
+from utils.passwords import PasswordHasher
+
+
+class TestMetricsRegistry(TestCase):
+    """Test class for the metrics registry"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.registry = MetricsRegistry()
+
+    def test_disabled_registry_records_nothing(self):
+        """Test that a disabled registry only calls through"""
+        @timed("work", "Work", registry=self.registry, step="a")
+        def work(value):
+            return value * 2
+
+        self.assertEqual(work(2), 4)
+        self.assertEqual(self.registry.get("work_seconds").count("a"), 0)
+
+    def test_timed_records_calls_and_errors(self):
+        """Test the histogram and error counter of a timed function"""
+        self.registry.enable()
+
+        @timed("work", "Work", registry=self.registry, step="a")
+        def work(fail):
+            if fail:
+                raise ValueError("failed")
+
+        work(False)
+        with self.assertRaises(ValueError):
+            work(True)
+        self.assertEqual(self.registry.get("work_seconds").count("a"), 2)
+        self.assertEqual(self.registry.get("work_errors_total").value("a"), 1)
+
+    def test_render_prometheus_text(self):
+        """Test the text exposition format"""
+        self.registry.enable()
+        histogram = self.registry.histogram("latency", "Latency", ("op",),
+                                            buckets=(0.1, 1.0))
+        histogram.observe(0.05, "get")
+        histogram.observe(0.5, "get")
+        self.registry.counter("calls_total", "Calls").inc(amount=3)
+        self.registry.gauge("ratio", "Ratio", ("kind",)).set(0.25, 'a"b')
+        lines = self.registry.render().splitlines()
+        self.assertIn("# TYPE latency histogram", lines)
+        self.assertIn('latency_bucket{op="get",le="0.1"} 1', lines)
+        self.assertIn('latency_bucket{op="get",le="+Inf"} 2', lines)
+        self.assertIn('latency_count{op="get"} 2', lines)
+        self.assertIn("calls_total 3", lines)
+        self.assertIn('ratio{kind="a\\"b"} 0.25', lines)
+
+    def test_name_taken_by_other_kind(self):
+        """Test that a name cannot be reused for another kind of metric"""
+        self.registry.counter("calls", "Calls")
+        with self.assertRaises(ValueError):
+            self.registry.histogram("calls", "Calls")
+
+
+class TestServiceMetrics(TestCase):
+    """Test the instrumentation of the service and the database"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.service = UserService(hasher=PasswordHasher(n=2 ** 8))
+        REGISTRY.reset()
+        REGISTRY.enable()
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        REGISTRY.disable()
+        REGISTRY.reset()
+        self.service.close()
+        self.directory.cleanup()
+
+    def test_operations_are_recorded(self):
+        """Test that service calls and database operations are timed"""
+        db = UserDatabase(self.filename)
+        self.service.create_user(db, "smith@google.com", "Alex Smith", "AleSmi12344")
+        with self.assertRaises(ValueError):
+            self.service.login_user(db, "smith@google.com", "WrongPass1234")
+
+        service = REGISTRY.get("user_service_seconds")
+        self.assertEqual(service.count("create_user"), 1)
+        self.assertEqual(service.count("login_user"), 1)
+        self.assertEqual(REGISTRY.get("user_service_errors_total").value("login_user"), 1)
+        database = REGISTRY.get("database_seconds")
+        self.assertEqual(database.count("csv", "load"), 1)
+        self.assertEqual(database.count("csv", "save"), 1)
+        self.assertGreaterEqual(database.count("csv", "get_user_by_email"), 2)
+
+    def test_http_endpoint(self):
+        """Test that the metrics are served over HTTP"""
+        db = UserDatabase(self.filename)
+        db.get("missing")
+        server = serve_metrics(port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+            self.assertIn('database_seconds_count{engine="csv",operation="get"} 1', body)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
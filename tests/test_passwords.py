@@ -0,0 +1,53 @@
+import unittest
+from unittest import TestCase
+from utils.passwords import (PBKDF2, SCRYPT, PasswordHasher, hash_password,
+                             is_password_hash, verify_password)
+
+
+class TestPasswords(TestCase):
+    """Test the passwords module.
+
+    Args:
+        TestCase: Base class for test cases
+    """
+
+    def test_scrypt_hash_and_verify(self):
+        """Test hashing and verifying with scrypt"""
+        stored = hash_password("Password1234", SCRYPT, n=2 ** 8)
+        self.assertTrue(is_password_hash(stored))
+        self.assertTrue(verify_password(stored, "Password1234"))
+        self.assertFalse(verify_password(stored, "Password1235"))
+
+    def test_pbkdf2_hash_and_verify(self):
+        """Test hashing and verifying with pbkdf2"""
+        stored = hash_password("Password1234", PBKDF2, iterations=1000)
+        self.assertTrue(stored.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(verify_password(stored, "Password1234"))
+        self.assertFalse(verify_password(stored, "password1234"))
+
+    def test_hashes_are_salted(self):
+        """Test that the same password hashes differently every time"""
+        self.assertNotEqual(hash_password("Password1234", n=2 ** 8),
+                            hash_password("Password1234", n=2 ** 8))
+
+    def test_verify_legacy_plaintext_password(self):
+        """Test that plaintext passwords from old files still verify"""
+        self.assertFalse(is_password_hash("Password1234"))
+        self.assertTrue(verify_password("Password1234", "Password1234"))
+        self.assertFalse(verify_password("Password1234", "Password"))
+
+    def test_hasher_needs_rehash(self):
+        """Test that plaintext and outdated hashes need a rehash"""
+        hasher = PasswordHasher(n=2 ** 8, workers=2)
+        stored = hasher.hash("Password1234")
+        self.assertTrue(hasher.verify(stored, "Password1234"))
+        self.assertFalse(hasher.needs_rehash(stored))
+        self.assertTrue(hasher.needs_rehash("Password1234"))
+        self.assertTrue(hasher.needs_rehash(hash_password("Password1234", n=2 ** 9)))
+        self.assertTrue(hasher.needs_rehash(
+            hash_password("Password1234", PBKDF2, iterations=1000)))
+        hasher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from repository.user_db import UserDatabase
+from services.rate_limiter import LoginLimiter, ThrottledError, TokenBucketLimiter
+from services.user_service import UserService
+from utils.passwords import PasswordHasher
+
+
+class FakeClock:
+    """Clock the tests move by hand"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucketLimiter(TestCase):
+    """Test class for the TokenBucketLimiter class"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.clock = FakeClock()
+        self.limiter = TokenBucketLimiter(rate=2, burst=3, max_keys=2, clock=self.clock)
+
+    def test_burst_then_refill(self):
+        """Test that a bucket allows a burst and refills lazily"""
+        self.assertEqual([self.limiter.acquire("a") for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(self.limiter.acquire("a"), 0.5)
+        self.clock.now = 0.5
+        self.assertEqual(self.limiter.acquire("a"), 0)
+        self.clock.now = 100
+        self.assertEqual([self.limiter.acquire("a") for _ in range(4)], [0, 0, 0, 0.5])
+        self.assertEqual(self.limiter.stats()["throttled"], 2)
+
+    def test_keys_are_independent(self):
+        """Test that throttling one key leaves others alone"""
+        for _ in range(4):
+            self.limiter.acquire("a")
+        self.assertEqual(self.limiter.acquire("b"), 0)
+
+    def test_idle_buckets_are_evicted(self):
+        """Test that the number of buckets is bounded"""
+        for key in ("a", "b", "a", "c"):
+            self.limiter.acquire(key)
+        self.assertEqual(len(self.limiter), 2)
+        self.assertEqual(self.limiter.stats()["evictions"], 1)
+        for _ in range(2):
+            self.limiter.acquire("a")
+        self.assertGreater(self.limiter.acquire("a"), 0)
+
+    def test_invalid_settings(self):
+        """Test that invalid settings are refused"""
+        with self.assertRaises(ValueError):
+            TokenBucketLimiter(rate=0, burst=1)
+        with self.assertRaises(ValueError):
+            TokenBucketLimiter(rate=1, burst=0.5)
+
+
+class TestLoginThrottling(TestCase):
+    """Test class for throttled logins in UserService"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.db = UserDatabase(self.filename)
+        self.clock = FakeClock()
+        self.limiter = LoginLimiter(
+            per_email=TokenBucketLimiter(rate=0.1, burst=2, clock=self.clock),
+            per_client=TokenBucketLimiter(rate=0.1, burst=3, clock=self.clock))
+        self.service = UserService(hasher=PasswordHasher(n=2 ** 8),
+                                   login_limiter=self.limiter)
+        self.service.create_user(db=self.db, email="smith@google.com",
+                                 name="Alex Smith", password="AleSmi12344")
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.service.close()
+        self.directory.cleanup()
+
+    def test_email_is_throttled(self):
+        """Test that attempts on one email are limited, in any case"""
+        for email in ("smith@google.com", "SMITH@google.com"):
+            with self.assertRaises(ValueError):
+                self.service.login_user(db=self.db, email=email, password="Wrong12345")
+        with self.assertRaises(ThrottledError) as e:
+            self.service.login_user(db=self.db, email="smith@google.com",
+                                    password="AleSmi12344")
+        self.assertAlmostEqual(e.exception.retry_after, 10)
+
+        self.clock.now = 10
+        session = self.service.login_user(db=self.db, email="smith@google.com",
+                                          password="AleSmi12344")
+        self.assertIsNotNone(session)
+
+    def test_client_is_throttled_across_emails(self):
+        """Test that one client sweeping emails is limited"""
+        for i in range(3):
+            with self.assertRaises(ValueError):
+                self.service.login_user(db=self.db, email=f"user{i}@google.com",
+                                        password="Wrong12345", client_id="10.0.0.1")
+        with self.assertRaises(ThrottledError):
+            self.service.login_user(db=self.db, email="smith@google.com",
+                                    password="AleSmi12344", client_id="10.0.0.1")
+        session = self.service.login_user(db=self.db, email="smith@google.com",
+                                          password="AleSmi12344", client_id="10.0.0.2")
+        self.assertIsNotNone(session)
+        self.assertEqual(self.limiter.stats()["client"]["throttled"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
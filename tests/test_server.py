@@ -0,0 +1,156 @@
+import http.client
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from repository.user_db import UserDatabase
+from server import AuthServer
+from services.rate_limiter import LoginLimiter, TokenBucketLimiter
+from services.user_service import UserService
+from utils.passwords import PasswordHasher
+
+
+class TestAuthServer(TestCase):
+    """Test class for the HTTP front end"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.db = UserDatabase(self.filename, journal=True, concurrent=True)
+        self.server = AuthServer(
+            self.db, UserService(hasher=PasswordHasher(n=2 ** 8)),
+            port=0, workers=2)
+        self.server.serve_in_background()
+        self.connection = http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.connection.close()
+        self.server.stop()
+        self.directory.cleanup()
+
+    def request(self, method, path, body=None, session_id=None):
+        """Send a request on the kept-alive connection"""
+        headers = {"Content-Type": "application/json"}
+        if session_id is not None:
+            headers["Authorization"] = f"Bearer {session_id}"
+        data = None if body is None else json.dumps(body)
+        self.connection.request(method, path, body=data, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+
+    def register_and_login(self):
+        """Create a user and log in"""
+        status, user = self.request("POST", "/users", {
+            "email": "smith@google.com", "name": "Alex Smith",
+            "password": "AleSmi12344"})
+        self.assertEqual(status, 201)
+        status, session = self.request("POST", "/sessions", {
+            "email": "smith@google.com", "password": "AleSmi12344"})
+        self.assertEqual(status, 201)
+        return user, session
+
+    def test_user_flow_on_one_connection(self):
+        """Test register, login, get, update and logout over keep-alive"""
+        user, session = self.register_and_login()
+        self.assertEqual(session["user_id"], user["id"])
+
+        path = f"/users/{user['id']}"
+        status, body = self.request("GET", path, session_id=session["session_id"])
+        self.assertEqual(status, 200)
+        self.assertTrue(body["is_logged_in"])
+
+        status, body = self.request("PATCH", path, {"name": "Alex Black"},
+                                    session_id=session["session_id"])
+        self.assertEqual((status, body["name"]), (200, "Alex Black"))
+
+        status, _ = self.request("DELETE", f"/sessions/{session['session_id']}")
+        self.assertEqual(status, 200)
+        status, _ = self.request("GET", path, session_id=session["session_id"])
+        self.assertEqual(status, 401)
+        self.assertEqual(UserDatabase(self.filename, journal=True)
+                         .get(user["id"])[0].name, "Alex Black")
+
+    def test_errors(self):
+        """Test the status codes of failed requests"""
+        user, session = self.register_and_login()
+        status, _ = self.request("POST", "/users", {
+            "email": "smith@google.com", "name": "Alex Smith",
+            "password": "AleSmi12344"})
+        self.assertEqual(status, 409)
+        status, _ = self.request("POST", "/users", {
+            "email": "max@gintel.com", "name": "Max", "password": "short"})
+        self.assertEqual(status, 400)
+        status, _ = self.request("POST", "/sessions", {
+            "email": "smith@google.com", "password": "WrongPass1234"})
+        self.assertEqual(status, 401)
+        status, _ = self.request("GET", "/users/other-id",
+                                 session_id=session["session_id"])
+        self.assertEqual(status, 403)
+        status, _ = self.request("DELETE", "/sessions/unknown")
+        self.assertEqual(status, 404)
+        status, _ = self.request("PUT", "/users")
+        self.assertEqual(status, 501)
+        status, _ = self.request("GET", "/users")
+        self.assertEqual(status, 405)
+        status, _ = self.request("GET", "/nowhere")
+        self.assertEqual(status, 404)
+
+    def test_failed_logins_do_not_reveal_accounts(self):
+        """Test that unknown emails and wrong passwords get the same answer"""
+        self.register_and_login()
+        wrong_password = self.request("POST", "/sessions", {
+            "email": "smith@google.com", "password": "WrongPass1234"})
+        unknown_email = self.request("POST", "/sessions", {
+            "email": "nobody@google.com", "password": "WrongPass1234"})
+        self.assertEqual(wrong_password, unknown_email)
+        self.assertEqual(wrong_password, (401, {"error": "invalid email or password"}))
+
+    def test_fields_must_be_strings(self):
+        """Test that fields of the wrong type are refused with 400"""
+        for path, body in (
+                ("/sessions", {"email": "smith@google.com", "password": 123}),
+                ("/sessions", {"email": ["smith@google.com"], "password": "x"}),
+                ("/users", {"email": "a@google.com", "name": 1, "password": "AleSmi12344"}),
+                ("/users", {"email": "a@google.com", "name": " ", "password": "AleSmi12344"}),
+                ("/users", {"email": {}, "name": "Alex", "password": "AleSmi12344"})):
+            with self.subTest(path=path, body=body):
+                status, response = self.request("POST", path, body)
+                self.assertEqual(status, 400)
+                self.assertIn("must be a", response["error"])
+
+    def test_throttled_logins(self):
+        """Test that refused logins get 429 with Retry-After"""
+        self.register_and_login()
+        limiter = LoginLimiter(per_client=TokenBucketLimiter(rate=0.01, burst=1))
+        server = AuthServer(self.db, UserService(hasher=PasswordHasher(n=2 ** 8),
+                                                 login_limiter=limiter),
+                            port=0, workers=1)
+        server.serve_in_background()
+        connection = http.client.HTTPConnection(*server.server_address[:2])
+        statuses = []
+        for _ in range(2):
+            connection.request("POST", "/sessions", body=json.dumps({
+                "email": "smith@google.com", "password": "AleSmi12344"}))
+            response = connection.getresponse()
+            response.read()
+            statuses.append(response.status)
+        self.assertEqual(statuses, [201, 429])
+        self.assertEqual(response.getheader("Retry-After"), "100")
+        connection.close()
+        server.stop()
+
+    def test_invalid_json(self):
+        """Test a body that is not a JSON object"""
+        self.connection.request("POST", "/users", body="not json")
+        response = self.connection.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
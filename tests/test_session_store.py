@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import TestCase
+from models.user import User
+from services.session_store import SessionStore
+
+
+class TestSessionStore(TestCase):
+    """Test the SessionStore class
+
+    Args:
+        TestCase: Base class for all tests
+    """
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.user = User(email="abc@google.com", name="John Doe")
+        self.store = SessionStore(ttl_seconds=60, sweep_interval=None)
+
+    def test_create_and_get_session(self):
+        """Test that a created session can be looked up"""
+        session = self.store.create(self.user)
+        self.assertIs(self.store.get(session.id), session)
+        self.assertIs(session.user, self.user)
+        self.assertTrue(self.store.is_logged_in(self.user.id))
+        self.assertIsNone(self.store.get("unknown"))
+
+    def test_revoke_session(self):
+        """Test that a revoked session is gone"""
+        session = self.store.create(self.user)
+        self.assertIs(self.store.revoke(session.id), session)
+        self.assertIsNone(self.store.revoke(session.id))
+        self.assertFalse(self.store.is_logged_in(self.user.id))
+
+    def test_revoke_user_ends_every_session(self):
+        """Test that all sessions of a user can be ended at once"""
+        self.store.create(self.user)
+        self.store.create(self.user)
+        self.assertEqual(self.store.revoke_user(self.user.id), 2)
+        self.assertEqual(len(self.store), 0)
+
+    def test_expired_sessions_are_not_live(self):
+        """Test TTL expiry on lookup and on sweep"""
+        session = self.store.create(self.user)
+        self.assertTrue(session.is_expired(time.time() + 61))
+        self.assertEqual(self.store.sweep(now=time.time() + 30), 0)
+        self.assertEqual(self.store.sweep(now=time.time() + 61), 1)
+        self.assertIsNone(self.store.get(session.id))
+        self.assertFalse(self.store.is_logged_in(self.user.id))
+
+    def test_background_sweeper(self):
+        """Test that the sweeper thread drops expired sessions"""
+        store = SessionStore(ttl_seconds=0.05, sweep_interval=0.02)
+        store.create(self.user)
+        time.sleep(0.2)
+        self.assertEqual(len(store), 0)
+        store.close()
+
+    def test_snapshot_and_restore(self):
+        """Test that live sessions survive a restart through a snapshot"""
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_file = os.path.join(directory, "sessions.json")
+            store = SessionStore(ttl_seconds=60, sweep_interval=None,
+                                 snapshot_file=snapshot_file)
+            session = store.create(self.user)
+            store.close()
+
+            restored = SessionStore(ttl_seconds=60, sweep_interval=None,
+                                    snapshot_file=snapshot_file)
+            self.assertEqual(restored.get(session.id).user_id, self.user.id)
+            self.assertIsNone(restored.get(session.id).user)
+
+
+if __name__ == '__main__':
+    unittest.main()
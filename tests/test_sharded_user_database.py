@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from models.user import User
+from repository.factory import open_database
+from repository.sharded_user_db import ShardedUserDatabase, shard_of
+from services.user_service import UserService
+from utils.passwords import PasswordHasher
+
+
+class TestShardedUserDatabase(TestCase):
+    """Test class for the ShardedUserDatabase class"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        self.db = ShardedUserDatabase(self.filename, shards=4)
+        self.users = []
+        for i in range(40):
+            user = User(email=f"user{i}@google.com", name=f"User {i}")
+            user.password = "Password1234"
+            self.users.append(user)
+            self.db.add(user)
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_users_are_spread_over_shards(self):
+        """Test that every user is stored in the shard of its id"""
+        self.db.save()
+        db = ShardedUserDatabase(self.filename, shards=4)
+        self.assertEqual(len(db.users), 40)
+        for number, file in enumerate(db.shard_files):
+            with open(file) as handle:
+                ids = [line.split(",")[0] for line in handle.readlines()[1:]]
+            self.assertTrue(all(shard_of(id, 4) == number for id in ids))
+            self.assertGreater(len(ids), 0)
+        db.close()
+
+    def test_lookups(self):
+        """Test lookups by id and email"""
+        user = self.users[7]
+        self.assertEqual(self.db.get(user.id)[0].email, user.email)
+        self.assertEqual(self.db.get_user_by_email(user.email).id, user.id)
+        self.assertFalse(self.db.get_user_by_email("nobody@google.com"))
+        self.assertIsNone(self.db.get("missing"))
+        with self.assertRaises(ValueError):
+            self.db.add(self.users[3])
+
+    def test_update_and_delete_keep_email_index(self):
+        """Test that the email routing follows updates and deletes"""
+        user, other = self.users[0], self.users[1]
+        with self.assertRaises(ValueError):
+            self.db.update(user.id, {"email": other.email})
+        self.db.update(user.id, {"email": "moved@google.com"})
+        self.assertFalse(self.db.get_user_by_email(user.email))
+        self.assertEqual(self.db.get_user_by_email("moved@google.com").id, user.id)
+
+        self.db.delete(other.id)
+        self.assertFalse(self.db.get_user_by_email(other.email))
+        with self.assertRaises(ValueError):
+            self.db.delete(other.id)
+
+    def test_save_rewrites_only_changed_shards(self):
+        """Test that a save leaves untouched shard files alone"""
+        self.db.save()
+        mtimes = [os.stat(file).st_mtime_ns for file in self.db.shard_files]
+        user = self.users[5]
+        self.db.update(user.id, {"name": "Renamed"})
+        self.db.save()
+        changed = [number for number, file in enumerate(self.db.shard_files)
+                   if os.stat(file).st_mtime_ns != mtimes[number]]
+        self.assertEqual(changed, [shard_of(user.id, 4)])
+
+    def test_list_users_merges_shards(self):
+        """Test that paging walks every shard in id order"""
+        service = UserService(hasher=PasswordHasher(n=2 ** 8))
+        page = service.list_users(self.db, limit=100)
+        self.assertEqual([user.id for user in page.users],
+                         sorted(user.id for user in self.users))
+        service.close()
+
+    def test_open_database_with_shards(self):
+        """Test the factory option"""
+        self.db.save()
+        db = open_database(self.filename, shards=4, journal=True)
+        self.assertIsInstance(db, ShardedUserDatabase)
+        self.assertEqual(len(db.users), 40)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
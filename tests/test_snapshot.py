@@ -0,0 +1,190 @@
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from models.user import User
+from repository.snapshot import Snapshot, write_snapshot
+from repository.user_db import UserDatabase
+from utils.metrics import REGISTRY
+
+FIELDNAMES = ["id", "email", "name", "password",
+              "is_logged_in", "created_at", "updated_at"]
+
+
+class TestSnapshot(TestCase):
+    """Test class for the snapshot file format"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.snap")
+        self.rows = [
+            {"id": f"id-{i:03}", "email": f"user{(i * 7) % 50}@ex.com",
+             "name": f"Nämé {i}", "password": "", "is_logged_in": "False",
+             "created_at": "1", "updated_at": "2"}
+            for i in reversed(range(50))
+        ]
+        write_snapshot(self.filename, self.rows, FIELDNAMES, (10, 20))
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def test_rows_round_trip(self):
+        """Test that every record decodes to the row it was written from"""
+        snapshot = Snapshot(self.filename, FIELDNAMES)
+        self.assertEqual(len(snapshot), 50)
+        self.assertEqual(snapshot.source, (10, 20))
+        self.assertEqual(list(snapshot.rows()), self.rows)
+        snapshot.close()
+
+    def test_find_by_id_and_email(self):
+        """Test the binary search over both indexes"""
+        snapshot = Snapshot(self.filename, FIELDNAMES)
+        for row in self.rows:
+            self.assertEqual(snapshot.find_by_id(row["id"]), row)
+            self.assertEqual(snapshot.find_by_email(row["email"]), row)
+        self.assertIsNone(snapshot.find_by_id("id-999"))
+        self.assertIsNone(snapshot.find_by_email("nobody@ex.com"))
+        snapshot.close()
+
+    def test_email_filter_skips_search(self):
+        """Test that emails ruled out by the filter are counted as misses"""
+        snapshot = Snapshot(self.filename, FIELDNAMES)
+        checks = REGISTRY.get("email_filter_checks_total")
+        REGISTRY.enable()
+        try:
+            before = checks.value("definite_miss")
+            for i in range(200):
+                self.assertIsNone(snapshot.find_by_email(f"nobody{i}@ex.com"))
+            self.assertGreater(checks.value("definite_miss") - before, 150)
+            self.assertEqual(snapshot.find_by_email("USER7@ex.com"), None)
+            self.assertIn("user7@ex.com", snapshot.email_filter)
+        finally:
+            REGISTRY.disable()
+        snapshot.close()
+
+    def test_empty_snapshot(self):
+        """Test a snapshot without records"""
+        write_snapshot(self.filename, [], FIELDNAMES)
+        snapshot = Snapshot(self.filename, FIELDNAMES)
+        self.assertEqual(len(snapshot), 0)
+        self.assertIsNone(snapshot.find_by_id("id-001"))
+        snapshot.close()
+
+    def test_rejects_other_files(self):
+        """Test that a file that is not a snapshot is refused"""
+        with open(self.filename, "wb") as file:
+            file.write(b"id,email\n" * 20)
+        with self.assertRaises(ValueError):
+            Snapshot(self.filename, FIELDNAMES)
+
+    def test_rejects_truncated_files(self):
+        """Test that a snapshot cut short is refused with a ValueError"""
+        with open(self.filename, "rb") as file:
+            data = file.read()
+        for length in (10, 200, len(data) // 2):
+            with self.subTest(length=length):
+                with open(self.filename, "wb") as file:
+                    file.write(data[:length])
+                with self.assertRaises(ValueError):
+                    Snapshot(self.filename, FIELDNAMES)
+
+
+class TestUserDatabaseSnapshot(TestCase):
+    """Test the snapshot mode of the UserDatabase"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.user = User(email="smith@google.com", name="Alex Smith")
+        self.user.password = "AleSmi12344"
+        self.user2 = User(email="max@gintel.com", name="Maxwell Smith")
+        self.user2.password = "Maxman1234"
+        db = UserDatabase(self.filename)
+        db.add(self.user)
+        db.add(self.user2)
+        db.save()
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def test_snapshot_written_on_startup(self):
+        """Test that a missing snapshot is built from the csv file"""
+        db = UserDatabase(self.filename, snapshot=True)
+        self.assertTrue(os.path.exists(db._snapshot_file))
+        self.assertEqual(db.get(self.user.id)[0].email, "smith@google.com")
+        self.assertEqual(db.get_user_by_email("max@gintel.com").id, self.user2.id)
+        self.assertEqual(len(db.users), 2)
+
+    def test_changes_on_top_of_snapshot(self):
+        """Test that unsaved changes hide the snapshot rows they replace"""
+        db = UserDatabase(self.filename, snapshot=True)
+        db.update(id=self.user.id, item={"email": "alex@google.com"})
+        db.delete(self.user2.id)
+        self.assertFalse(db.get_user_by_email("smith@google.com"))
+        self.assertEqual(db.get_user_by_email("alex@google.com").id, self.user.id)
+        self.assertIsNone(db.get(self.user2.id))
+        self.assertEqual([user.id for user in db.all()], [self.user.id])
+        with self.assertRaises(ValueError):
+            db.delete(self.user2.id)
+
+        db.add(self.user2)
+        with self.assertRaises(ValueError):
+            db.add(self.user2)
+        self.assertEqual(len(db.users), 2)
+
+    def test_save_rewrites_snapshot(self):
+        """Test that a save leaves a snapshot matching the csv file"""
+        db = UserDatabase(self.filename, snapshot=True)
+        db.update(id=self.user.id, item={"name": "Alex Black"})
+        db.delete(self.user2.id)
+        db.save()
+
+        db = UserDatabase(self.filename, snapshot=True)
+        self.assertEqual(db.get(self.user.id)[0].name, "Alex Black")
+        self.assertIsNone(db.get(self.user2.id))
+        self.assertEqual(len(UserDatabase(self.filename).users), 1)
+
+    def test_stale_snapshot_is_rebuilt(self):
+        """Test that a snapshot older than the csv file is not used"""
+        UserDatabase(self.filename, snapshot=True)
+        db = UserDatabase(self.filename)
+        db.delete(self.user2.id)
+        db.save()
+
+        db = UserDatabase(self.filename, snapshot=True)
+        self.assertIsNone(db.get(self.user2.id))
+        self.assertEqual(len(db.users), 1)
+
+    def test_truncated_snapshot_is_rebuilt(self):
+        """Test that a snapshot cut short is rebuilt from the csv file"""
+        db = UserDatabase(self.filename, snapshot=True)
+        with open(db._snapshot_file, "r+b") as file:
+            file.truncate(10)
+
+        db = UserDatabase(self.filename, snapshot=True)
+        self.assertEqual(db.get(self.user.id)[0].email, self.user.email)
+        self.assertEqual(len(db.users), 2)
+        self.assertGreater(os.path.getsize(db._snapshot_file), 10)
+
+    def test_snapshot_with_journal(self):
+        """Test that the journal is replayed over the snapshot"""
+        db = UserDatabase(self.filename, journal=True, snapshot=True)
+        db.update(id=self.user.id, item={"name": "Alex Black"})
+        db.save()
+
+        db = UserDatabase(self.filename, journal=True, snapshot=True)
+        self.assertEqual(db.get(self.user.id)[0].name, "Alex Black")
+        db.compact()
+        db = UserDatabase(self.filename, journal=True, snapshot=True)
+        self.assertEqual(db.get(self.user.id)[0].name, "Alex Black")
+        self.assertEqual(len(db.users), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
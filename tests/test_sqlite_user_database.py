@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import TestCase
+from models.user import User
+from repository.factory import open_database
+from repository.sqlite_user_db import SqliteUserDatabase
+from repository.user_db import UserDatabase
+
+
+class TestSqliteUserDatabase(TestCase):
+    """Test class for the SqliteUserDatabase class"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.db")
+        self.db = SqliteUserDatabase(self.filename)
+        self.user = User(email="smith@google.com", name="Alex Smith")
+        self.user2 = User(email="max@gintel.com", name="Maxwell Smith")
+        self.user.password = "AleSmi12344"
+        self.user2.password = "Maxman1234"
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.db.close()
+        self.directory.cleanup()
+
+    def test_sqlite_init_with_invalid_file(self):
+        """Test the SqliteUserDatabase constructor"""
+        with self.assertRaises(ValueError):
+            SqliteUserDatabase(None)
+        with self.assertRaises(TypeError):
+            SqliteUserDatabase(os.path.join(self.directory.name, "users.csv"))
+
+    def test_sqlite_add_and_get(self):
+        """Test add and get methods for SqliteUserDatabase"""
+        self.assertIsInstance(self.db.add(self.user), User)
+        user, row = self.db.get(self.user.id)
+        self.assertEqual(user.email, "smith@google.com")
+        self.assertEqual(row.get("name"), "Alex Smith")
+        self.assertIsNone(self.db.get("835f2634-68ee-4e00-8144-c0210f8ef174"))
+
+    def test_sqlite_add_with_existing_email(self):
+        """Test add method with an email that already exists"""
+        self.db.add(self.user)
+        user = User(email="smith@google.com", name="Other Smith")
+        user.password = "AleSmi12344"
+        with self.assertRaises(ValueError):
+            self.db.add(user)
+        with self.assertRaises(ValueError):
+            self.db.add(self.user)
+
+    def test_sqlite_get_user_by_email(self):
+        """Test get_user_by_email method for SqliteUserDatabase"""
+        self.db.add(self.user)
+        self.assertEqual(self.db.get_user_by_email("smith@google.com").id,
+                         self.user.id)
+        self.assertFalse(self.db.get_user_by_email("nobody@google.com"))
+
+    def test_sqlite_update(self):
+        """Test update method for SqliteUserDatabase"""
+        self.db.add(self.user)
+        self.db.add(self.user2)
+        updated = self.db.update(id=self.user.id,
+                                 item={"name": "Alex Black",
+                                       "email": "alex@google.com"})
+        self.assertEqual(updated.name, "Alex Black")
+        self.assertEqual(self.db.get_user_by_email("alex@google.com").id,
+                         self.user.id)
+        with self.assertRaises(ValueError):
+            self.db.update(id=self.user2.id, item={"email": "alex@google.com"})
+        with self.assertRaises(TypeError):
+            self.db.update(id=self.user.id, item="item")
+
+    def test_sqlite_delete(self):
+        """Test delete method for SqliteUserDatabase"""
+        self.db.add(self.user)
+        self.assertIsNone(self.db.delete(self.user.id))
+        with self.assertRaises(ValueError):
+            self.db.delete(self.user.id)
+
+    def test_sqlite_all_and_save(self):
+        """Test that saved users are visible to a new connection"""
+        self.db.add(self.user)
+        self.db.add(self.user2)
+        self.db.save()
+        db = SqliteUserDatabase(self.filename)
+        self.assertEqual({user.email for user in db.all()},
+                         {"smith@google.com", "max@gintel.com"})
+        db.close()
+
+    def test_sqlite_add_many(self):
+        """Test add_many method for SqliteUserDatabase"""
+        self.db.add(self.user)
+        duplicate = User(email="smith@google.com", name="Other Smith")
+        duplicate.password = "AleSmi12344"
+        errors = self.db.add_many([self.user2, duplicate, "user", self.user2])
+        self.assertEqual([position for position, _ in errors], [1, 2, 3])
+        self.assertEqual(self.db.get_user_by_email("max@gintel.com").id,
+                         self.user2.id)
+
+    def test_sqlite_search_by_name_skips_missing_names(self):
+        """Test that rows without a name do not break name searches"""
+        self.db.add(self.user)
+        self.db.close()
+        with sqlite3.connect(self.filename) as connection:
+            connection.execute("INSERT INTO users (id, email, name) VALUES ('x', 'x@google.com', NULL)")
+            indexes = {row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        connection.close()
+        self.assertIn("users_name_nocase", indexes)
+        self.db = SqliteUserDatabase(self.filename)
+        self.assertEqual([user.name for user in self.db.search_by_name("")], ["Alex Smith"])
+        self.assertEqual([user.name for user in self.db.search_by_name("alex")], ["Alex Smith"])
+
+    def test_open_database_by_extension(self):
+        """Test that open_database picks the engine from the extension"""
+        self.assertIsInstance(open_database(self.filename), SqliteUserDatabase)
+        csv_file = os.path.join(self.directory.name, "users.csv")
+        with open(csv_file, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.assertIsInstance(open_database(csv_file), UserDatabase)
+        with self.assertRaises(ValueError):
+            open_database(csv_file, engine="mongo")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest import TestCase
+from repository.migrate import migrate
+from repository.user_db import UserDatabase
+from utils.timestamps import (EPOCH, ISO, LEGACY, detect_format,
+                              format_timestamp, parse_timestamp)
+
+
+class TestTimestamps(TestCase):
+    """Test the timestamps module.
+
+    Args:
+        TestCase: Base class for test cases
+    """
+
+    def test_parse_legacy_timestamp(self):
+        """Test parsing the legacy format"""
+        self.assertEqual(parse_timestamp("09 June 2024 : 12:53:44"),
+                         datetime(2024, 6, 9, 12, 53, 44))
+
+    def test_parse_iso_and_epoch_timestamp(self):
+        """Test parsing ISO-8601 and epoch timestamps"""
+        expected = datetime(2024, 6, 9, 12, 53, 44, tzinfo=timezone.utc)
+        self.assertEqual(parse_timestamp("2024-06-09T12:53:44+00:00"), expected)
+        self.assertEqual(parse_timestamp("1717937624"), expected)
+        self.assertEqual(parse_timestamp(1717937624), expected)
+
+    def test_parse_invalid_timestamp(self):
+        """Test parsing invalid timestamps"""
+        for value in ["09/06/2020", "", "09 Juin 2024 : 12:53:44", None]:
+            with self.assertRaises(ValueError):
+                parse_timestamp(value)
+
+    def test_format_timestamp(self):
+        """Test formatting a timestamp in every format"""
+        value = datetime(2024, 6, 9, 12, 53, 44, tzinfo=timezone.utc)
+        self.assertEqual(format_timestamp(value, LEGACY), "09 June 2024 : 12:53:44")
+        self.assertEqual(format_timestamp(value, ISO), "2024-06-09T12:53:44+00:00")
+        self.assertEqual(format_timestamp(value, EPOCH), "1717937624")
+        with self.assertRaises(ValueError):
+            format_timestamp(value, "rfc822")
+
+    def test_detect_format(self):
+        """Test detecting the format of a stored timestamp"""
+        self.assertEqual(detect_format("09 June 2024 : 12:53:44"), LEGACY)
+        self.assertEqual(detect_format("2024-06-09T12:53:44+00:00"), ISO)
+        self.assertEqual(detect_format("1717937624"), EPOCH)
+        self.assertIsNone(detect_format(""))
+
+    def test_migrate_csv_file(self):
+        """Test migrating a legacy csv file to ISO timestamps"""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "users.csv")
+            with open(filename, "w") as file:
+                file.write("id,email,name,password,is_logged_in,created_at,updated_at\n"
+                           "835f2634-68ee-4e00-8144-c0210f8ef175,abc@google.com,John Doe,"
+                           "Password1234,False,06 June 2020 : 12:00:00,06 June 2020 : 12:05:20\n")
+            self.assertEqual(migrate(filename, ISO), 1)
+            db = UserDatabase(filename)
+            self.assertEqual(db.timestamp_format, ISO)
+            user = db.get("835f2634-68ee-4e00-8144-c0210f8ef175")[0]
+            self.assertEqual(user.get_user().get("created_at"),
+                             "2020-06-06T12:00:00+00:00")
+            self.assertEqual(user.updated_at,
+                             datetime(2020, 6, 6, 12, 5, 20, tzinfo=timezone.utc))
+
+
+if __name__ == '__main__':
+    unittest.main()
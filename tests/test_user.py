@@ -1,5 +1,7 @@
 import unittest
+from datetime import datetime, timezone
 from unittest import TestCase
+from models.base import Base
 from models.user import User
 
 
@@ -79,6 +81,38 @@ class TestUser(TestCase):
         user = User(email="abc@google.com", name="John Doe")
         self.assertTrue("password" not in user.get_user().keys())
 
+    def test_user_has_no_instance_dict(self):
+        """Test that user state is kept in slots"""
+        user = User(email="abc@google.com", name="John Doe")
+        self.assertFalse(hasattr(user, "__dict__"))
+        with self.assertRaises(AttributeError):
+            user.nickname = "Johnny"
+
+    def test_user_with_epoch_timestamps(self):
+        """Test that epoch timestamps keep the same property API"""
+        Base.store_epoch_timestamps(True)
+        try:
+            user = User(email="abc@google.com", name="John Doe",
+                        created_at="09 June 2024 : 12:53:44")
+            user.updated_at = datetime(2024, 6, 10, 8, 0, 0, tzinfo=timezone.utc)
+        finally:
+            Base.store_epoch_timestamps(False)
+        self.assertEqual(user.created_at,
+                         datetime(2024, 6, 9, 12, 53, 44, tzinfo=timezone.utc))
+        self.assertEqual(user.to_dict().get('created_at'),
+                         "09 June 2024 : 12:53:44")
+        self.assertEqual(user.to_dict().get('updated_at'),
+                         "10 June 2024 : 08:00:00")
+
+    def test_user_with_valid_email(self):
+        """Test building a user from an email that was already validated"""
+        user = User.with_valid_email("abc@google.com", "John Doe")
+        user.password = "Password1234"
+        self.assertEqual(user.email, "abc@google.com")
+        self.assertEqual(user.to_dict().get('name'), "John Doe")
+        self.assertIsNotNone(user.id)
+        self.assertFalse(user.is_logged_in)
+
 
 if __name__ == '__main__':
     unittest.main()
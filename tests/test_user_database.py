@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 from unittest import TestCase
 from models.user import User
@@ -141,5 +142,156 @@ class TestUserDatabase(TestCase):
         with open(self.filename, "r") as file:
             self.assertEqual(len(file.readlines()), 4)
 
+
+class TestUserDatabaseIndexes(TestCase):
+    """Test that the id and email indexes stay in sync with the rows"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.db = UserDatabase(self.filename)
+        self.user = User(email="smith@google.com", name="Alex Smith")
+        self.user.password = "AleSmi12344"
+        self.db.add(self.user)
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def test_add_with_existing_email(self):
+        """Test that add rejects an email that is already indexed"""
+        user = User(email="smith@google.com", name="Other Smith")
+        with self.assertRaises(ValueError):
+            self.db.add(user)
+
+    def test_update_email_moves_index_entry(self):
+        """Test that updating the email re-indexes the user"""
+        self.db.update(id=self.user.id, item={"email": "alex@google.com"})
+        self.assertFalse(self.db.get_user_by_email("smith@google.com"))
+        self.assertEqual(self.db.get_user_by_email("alex@google.com").id,
+                         self.user.id)
+
+    def test_update_email_to_existing_email(self):
+        """Test that update rejects an email owned by another user"""
+        other = User(email="dax@google.com", name="Dax Black")
+        other.password = "Daxma12344"
+        self.db.add(other)
+        with self.assertRaises(ValueError):
+            self.db.update(id=other.id, item={"email": "smith@google.com"})
+
+    def test_delete_removes_index_entries(self):
+        """Test that delete removes the user from both indexes"""
+        self.db.delete(self.user.id)
+        self.assertIsNone(self.db.get(self.user.id))
+        self.assertFalse(self.db.get_user_by_email("smith@google.com"))
+
+    def test_load_builds_indexes(self):
+        """Test that loading a saved file rebuilds the indexes"""
+        self.db.save()
+        db = UserDatabase(self.filename)
+        self.assertEqual(db.get(self.user.id)[0].email, "smith@google.com")
+        self.assertEqual(db.get_user_by_email("smith@google.com").id,
+                         self.user.id)
+
+
+class TestUserDatabaseJournal(TestCase):
+    """Test the journaled persistence mode of the UserDatabase"""
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "users.csv")
+        with open(self.filename, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.user = User(email="smith@google.com", name="Alex Smith")
+        self.user.password = "AleSmi12344"
+        self.user2 = User(email="max@gintel.com", name="Maxwell Smith")
+        self.user2.password = "Maxman1234"
+
+    def tearDown(self):
+        """Teardown method for the test class"""
+        self.directory.cleanup()
+
+    def test_save_appends_to_journal(self):
+        """Test that save appends records and leaves the csv untouched"""
+        db = UserDatabase(self.filename, journal=True)
+        base_size = os.path.getsize(self.filename)
+        db.add(self.user)
+        db.save()
+        db.update(id=self.user.id, item={"name": "Alex Black"})
+        db.save()
+        self.assertEqual(os.path.getsize(self.filename), base_size)
+        with open(db._journal_file, "r") as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+    def test_torn_record_is_dropped(self):
+        """Test that a partial record left by a crash is not glued to the
+        next one"""
+        db = UserDatabase(self.filename, journal=True)
+        db.add(self.user)
+        db.save()
+        with open(db._journal_file, "a") as file:
+            file.write(f'PUT,{self.user2.id},max@gintel.com,"Max\nwell')
+
+        db = UserDatabase(self.filename, journal=True)
+        self.assertIsNone(db.get(self.user2.id))
+        db.update(id=self.user.id, item={"name": "Alex Black"})
+        db.save()
+
+        db = UserDatabase(self.filename, journal=True)
+        self.assertEqual(db.get(self.user.id)[0].name, "Alex Black")
+        self.assertEqual(len(db.users), 1)
+        with open(db._journal_file, "r") as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+    def test_add_many_checks_the_batch_and_journals_it(self):
+        """Test that add_many skips duplicates within the batch and against
+        stored users, and journals the added rows together"""
+        db = UserDatabase(self.filename, journal=True)
+        db.add(self.user)
+        duplicate = User(email="smith@google.com", name="Other Smith")
+        duplicate.password = "AleSmi12344"
+        errors = db.add_many([self.user2, duplicate, "user", self.user2, None])
+        self.assertEqual([position for position, _ in errors], [1, 2, 3, 4])
+        self.assertIn("already exists", errors[0][1])
+        db.save()
+        with open(db._journal_file, "r") as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+        db = UserDatabase(self.filename, journal=True)
+        self.assertEqual(db.get_user_by_email("max@gintel.com").id, self.user2.id)
+
+    def test_replay_journal_on_startup(self):
+        """Test that the journal is replayed over the csv file"""
+        db = UserDatabase(self.filename, journal=True)
+        db.add(self.user)
+        db.add(self.user2)
+        db.update(id=self.user.id, item={"email": "alex@google.com"})
+        db.delete(self.user2.id)
+        db.save()
+
+        db = UserDatabase(self.filename, journal=True)
+        self.assertEqual(db.get(self.user.id)[0].email, "alex@google.com")
+        self.assertFalse(db.get_user_by_email("smith@google.com"))
+        self.assertIsNone(db.get(self.user2.id))
+
+    def test_compaction_after_record_threshold(self):
+        """Test that the journal is folded into the csv file"""
+        db = UserDatabase(self.filename, journal=True, compact_after_records=2)
+        db.add(self.user)
+        db.save()
+        db.add(self.user2)
+        db.save()
+        self.assertEqual(os.path.getsize(db._journal_file), 0)
+        with open(self.filename, "r") as file:
+            self.assertEqual(len(file.readlines()), 3)
+
+        db = UserDatabase(self.filename, journal=True)
+        self.assertEqual(len(db.users), 2)
+
+
 if __name__ == '__main__':
     unittest.main()
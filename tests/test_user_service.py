@@ -1,8 +1,16 @@
+import io
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
 import unittest
 from unittest import TestCase
 from services.user_service import UserService
+from repository.sharded_user_db import ShardedUserDatabase
+from repository.sqlite_user_db import SqliteUserDatabase
 from repository.user_db import UserDatabase
 from models.user import User
+from utils.passwords import PasswordHasher
 
 
 class TestUserService(TestCase):
@@ -83,5 +91,356 @@ class TestUserService(TestCase):
         )[0].email, "abc@google.com")
 
 
+class TestUserServiceBulkImport(TestCase):
+    """Test the bulk import of users through the user service"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "users.csv")
+        with open(self.file, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        self.db = UserDatabase(file_to_connect_to=self.file)
+        self.service = UserService(hasher=PasswordHasher(n=2 ** 8))
+
+    def tearDown(self) -> None:
+        self.service.close()
+        self.directory.cleanup()
+
+    def test_create_users_bulk_reports_row_errors(self):
+        """Test that invalid and duplicate rows are reported, not raised"""
+        rows = [
+            {"email": "abc@google.com", "name": "John Doe", "password": "Password1234"},
+            {"email": "Bad@google.com", "name": "Bad Email", "password": "Password1234"},
+            {"email": "max@google.com", "name": "Max Doe", "password": "weak"},
+            {"email": "abc@google.com", "name": "John Again", "password": "Password1234"},
+            {"email": "liam@google.com", "name": "Liam Black", "password": "Password1234"},
+        ]
+        result = self.service.create_users_bulk(db=self.db, rows=rows, batch_size=2)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([row for row, _ in result.errors], [2, 3, 4])
+        self.assertIn("already exists", result.errors[2][1])
+        self.assertEqual(len(UserDatabase(self.file).users), 2)
+
+    def test_create_users_bulk_hashes_only_new_users(self):
+        """Test that duplicate rows are dropped before their password is hashed"""
+        self.service.create_user(db=self.db, email="abc@google.com",
+                                 name="John Doe", password="Password1234")
+        hashes = []
+        hasher = self.service.hasher
+        hash_async = hasher.hash_async
+        hasher.hash_async = lambda password: hashes.append(password) or hash_async(password)
+        rows = [
+            {"email": "abc@google.com", "name": "John Again", "password": "Password1234"},
+            {"email": "liam@google.com", "name": "Liam Black", "password": "Password1234"},
+            {"email": "liam@google.com", "name": "Liam Again", "password": "Password1234"},
+        ]
+        result = self.service.create_users_bulk(db=self.db, rows=rows)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(len(hashes), 1)
+        self.assertEqual([row for row, _ in result.errors], [1, 3])
+        self.assertTrue(all("already exists" in error for _, error in result.errors))
+
+    def test_create_users_bulk_from_csv_stream(self):
+        """Test that users can be imported from a csv stream"""
+        stream = io.StringIO(
+            "email,name,password\n"
+            "abc@google.com,John Doe,Password1234\n"
+            "liam@google.com,Liam Black,Password1234\n")
+        result = self.service.create_users_bulk(db=self.db, rows=stream)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(self.db.get_user_by_email("liam@google.com").name,
+                         "Liam Black")
+
+
+class TestUserServicePasswords(TestCase):
+    """Test password hashing in the user service"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "users.csv")
+        with open(self.file, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n"
+                       "835f2634-68ee-4e00-8144-c0210f8ef175,abc@google.com,John Doe,"
+                       "Password1234,False,06 June 2020 : 12:00:00,06 June 2020 : 12:00:00\n")
+        self.db = UserDatabase(file_to_connect_to=self.file)
+        self.service = UserService(hasher=PasswordHasher(n=2 ** 8))
+
+    def tearDown(self) -> None:
+        self.service.close()
+        self.directory.cleanup()
+
+    def test_create_user_stores_hash(self):
+        """Test that new users are stored with a password hash"""
+        user = self.service.create_user(db=self.db, email="liam@google.com",
+                                        name="Liam Black", password="Password1234")
+        with open(self.file, "r") as file:
+            self.assertNotIn("Password1234", file.read().split(user.id)[1])
+        self.assertTrue(self.db.get_user_by_email("liam@google.com")
+                        .password_hash.startswith("scrypt$"))
+
+    def test_login_rehashes_legacy_password(self):
+        """Test that a plaintext password is hashed on successful login"""
+        with self.assertRaises(ValueError):
+            self.service.login_user(db=self.db, email="abc@google.com",
+                                    password="Password1235")
+        self.assertEqual(self.db.get_user_by_email("abc@google.com").password_hash,
+                         "Password1234")
+        session = self.service.login_user(db=self.db, email="abc@google.com",
+                                          password="Password1234")
+        stored = self.db.get_user_by_email("abc@google.com").password_hash
+        self.assertTrue(stored.startswith("scrypt$"))
+        self.assertTrue(session.user.check_password_is_same("Password1234"))
+
+    def test_login_and_logout_use_sessions(self):
+        """Test that login state lives in the session store"""
+        with open(self.file, "r") as file:
+            before = file.read()
+        self.service.login_user(db=self.db, email="abc@google.com",
+                                password="Password1234")
+        with open(self.file, "r") as file:
+            after_rehash = file.read()
+        self.assertNotEqual(before, after_rehash)
+
+        session = self.service.login_user(db=self.db, email="abc@google.com",
+                                          password="Password1234")
+        self.assertEqual(session.user_id, "835f2634-68ee-4e00-8144-c0210f8ef175")
+        self.assertTrue(self.service.is_logged_in(session.user_id))
+        self.assertIs(self.service.get_session(session.id), session)
+
+        self.service.logout_user(db=self.db, session=session)
+        self.assertIsNone(self.service.get_session(session.id))
+        with self.assertRaises(Exception):
+            self.service.logout_user(db=self.db, session=session)
+        with self.assertRaises(TypeError):
+            self.service.logout_user(db=self.db, session=session.user)
+        with open(self.file, "r") as file:
+            self.assertEqual(file.read(), after_rehash)
+
+    def test_update_user_hashes_password(self):
+        """Test that a new password is validated and hashed"""
+        with self.assertRaises(ValueError):
+            self.service.update_user(db=self.db, id="835f2634-68ee-4e00-8144-c0210f8ef175",
+                                     item={"password": "weak"})
+        self.service.update_user(db=self.db, id="835f2634-68ee-4e00-8144-c0210f8ef175",
+                                 item={"password": "NewPassword1"})
+        user = self.db.get_user_by_email("abc@google.com")
+        self.assertTrue(user.check_password_is_same("NewPassword1"))
+        self.assertTrue(user.password_hash.startswith("scrypt$"))
+
+    def test_delete_user_ends_sessions(self):
+        """Test that a deleted user is logged out everywhere"""
+        id = "835f2634-68ee-4e00-8144-c0210f8ef175"
+        sessions = [self.service.login_user(db=self.db, email="abc@google.com",
+                                            password="Password1234")
+                    for _ in range(2)]
+        self.service.delete_user(db=self.db, id=id)
+        for session in sessions:
+            self.assertIsNone(self.service.get_session(session.id))
+        self.assertFalse(self.service.is_logged_in(id))
+
+
+class TestUserServiceListUsers(TestCase):
+    """Test paging through users in the user service"""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.rows = []
+        for i in range(30):
+            created_at = f"2024-01-01T{(30 - i) // 2:02d}:00:00+00:00"
+            domain = "a.com" if i % 3 else "B.com"
+            self.rows.append((f"00000000-0000-4000-8000-{i:012d}", f"user{i}@{domain}", f"User {i}",
+                              "Password1234", "False", created_at, created_at))
+        self.service = UserService(hasher=PasswordHasher(n=2 ** 8))
+
+    def tearDown(self) -> None:
+        self.service.close()
+        self.directory.cleanup()
+
+    def databases(self):
+        """Yield a csv and a SQLite database holding the same rows"""
+        csv_file = os.path.join(self.directory.name, "users.csv")
+        with open(csv_file, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+            for row in self.rows:
+                file.write(",".join(row) + "\n")
+        yield UserDatabase(file_to_connect_to=csv_file)
+
+        db_file = os.path.join(self.directory.name, "users.db")
+        SqliteUserDatabase(db_file).close()
+        with sqlite3.connect(db_file) as connection:
+            connection.executemany(
+                "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)", self.rows)
+        connection.close()
+        db = SqliteUserDatabase(db_file)
+        yield db
+        db.close()
+
+    def collect(self, db, cursor=None, **kwargs):
+        """Follow the cursors and return every user listed"""
+        users = []
+        while True:
+            page = self.service.list_users(db, cursor=cursor, **kwargs)
+            self.assertLessEqual(len(page.users), kwargs.get("limit", 100))
+            users.extend(page.users)
+            if not page.has_more:
+                return users
+            cursor = page.next_cursor
+
+    def test_pages_in_id_order(self):
+        """Test that pages cover every user once, in id order"""
+        for db in self.databases():
+            with self.subTest(db=type(db).__name__):
+                users = self.collect(db, limit=7)
+                self.assertEqual([user.id for user in users],
+                                 [row[0] for row in self.rows])
+
+    def test_pages_in_created_at_order(self):
+        """Test ordering by creation time, ties broken by id"""
+        expected = [row[0] for row in sorted(self.rows, key=lambda row: (row[5], row[0]))]
+        for db in self.databases():
+            with self.subTest(db=type(db).__name__):
+                users = self.collect(db, limit=4, order_by="created_at")
+                self.assertEqual([user.id for user in users], expected)
+
+    def test_filters(self):
+        """Test the created_at range and email domain filters"""
+        created_from = datetime(2024, 1, 1, 3, tzinfo=timezone.utc)
+        created_to = "2024-01-01T10:00:00+00:00"
+        expected = sorted(row[0] for row in self.rows
+                          if "03:00" <= row[5][11:16] < "10:00"
+                          and row[1].endswith("@B.com"))
+        filters = {"created_from": created_from, "created_to": created_to,
+                   "email_domain": "b.com"}
+        for db in self.databases():
+            for order_by in ("id", "created_at"):
+                with self.subTest(db=type(db).__name__, order_by=order_by):
+                    users = self.collect(db, limit=2, order_by=order_by,
+                                         filters=filters)
+                    self.assertEqual(sorted(user.id for user in users), expected)
+
+    def test_scans_are_capped(self):
+        """Test that a filter without matches stops after max_scanned users
+        and hands out a cursor to go on"""
+        for db in self.databases():
+            with self.subTest(db=type(db).__name__):
+                page = self.service.list_users(db, filters={"email_domain": "c.com"},
+                                               max_scanned=8)
+                self.assertEqual(page.users, [])
+                self.assertTrue(page.has_more)
+                users = self.collect(db, limit=3, max_scanned=4,
+                                     filters={"email_domain": "b.com"})
+                self.assertEqual([user.id for user in users],
+                                 [row[0] for row in self.rows if row[1].endswith("@B.com")])
+
+    def test_logged_in_filter(self):
+        """Test filtering on the session store"""
+        db = next(self.databases())
+        self.service.login_user(db, "user4@a.com", "Password1234")
+        page = self.service.list_users(db, filters={"logged_in": True})
+        self.assertEqual([user.id for user in page.users], [self.rows[4][0]])
+        page = self.service.list_users(db, filters={"logged_in": False})
+        self.assertEqual(len(page.users), 29)
+
+    def test_index_follows_mutations(self):
+        """Test that users added or deleted between pages are seen"""
+        db = next(self.databases())
+        page = self.service.list_users(db, limit=10)
+        self.service.create_user(db, "zed@a.com", "Zed Zed", "Password1234")
+        self.service.delete_user(db, self.rows[15][0])
+        users = page.users + self.collect(db, cursor=page.next_cursor, limit=10)
+        self.assertEqual(len(users), 30)
+        self.assertNotIn(self.rows[15][0], [user.id for user in users])
+
+    def test_invalid_arguments(self):
+        """Test bad limits, filters, orders and cursors"""
+        db = next(self.databases())
+        page = self.service.list_users(db, limit=5)
+        with self.assertRaises(ValueError):
+            self.service.list_users(db, limit=0)
+        with self.assertRaises(ValueError):
+            self.service.list_users(db, filters={"role": "admin"})
+        with self.assertRaises(ValueError):
+            self.service.list_users(db, order_by="email")
+        with self.assertRaises(ValueError):
+            self.service.list_users(db, cursor="not a cursor")
+        with self.assertRaises(ValueError):
+            self.service.list_users(db, cursor=page.next_cursor,
+                                    order_by="created_at")
+
+
+
+class TestUserServiceSearchUsersByName(TestCase):
+    """Test finding users by name prefix in the user service"""
+
+    NAMES = ["alice Smith", "Alicia Keys", "ALI Baba", "Bob Stone", "Albert Ross", "Zed"]
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.service = UserService(hasher=PasswordHasher(n=2 ** 8))
+
+    def tearDown(self) -> None:
+        self.service.close()
+        self.directory.cleanup()
+
+    def databases(self):
+        """Yield a csv, a sharded csv and a SQLite database holding the
+        same users"""
+        csv_file = os.path.join(self.directory.name, "users.csv")
+        with open(csv_file, "w") as file:
+            file.write("id,email,name,password,is_logged_in,created_at,updated_at\n")
+        sharded = os.path.join(self.directory.name, "sharded.csv")
+        for db in (UserDatabase(file_to_connect_to=csv_file),
+                   ShardedUserDatabase(sharded, shards=3),
+                   SqliteUserDatabase(os.path.join(self.directory.name, "users.db"))):
+            for i, name in enumerate(self.NAMES):
+                db.add(self.user(f"user{i}@google.com", name))
+            yield db
+            if hasattr(db, "close"):
+                db.close()
+
+    def user(self, email, name):
+        user = User(email=email, name=name)
+        user.password = "Password1234"
+        return user
+
+    def names(self, db, prefix, limit=20):
+        return [user.name for user in self.service.search_users_by_name(db, prefix, limit)]
+
+    def test_prefix_search_ignores_case(self):
+        """Test that matches are found in any case, ordered by name"""
+        for db in self.databases():
+            with self.subTest(db=type(db).__name__):
+                self.assertEqual(self.names(db, "ali"),
+                                 ["ALI Baba", "alice Smith", "Alicia Keys"])
+                self.assertEqual(self.names(db, "ALIC", limit=1), ["alice Smith"])
+                self.assertEqual(self.names(db, "al"),
+                                 ["Albert Ross", "ALI Baba", "alice Smith", "Alicia Keys"])
+                self.assertEqual(self.names(db, "carl"), [])
+
+    def test_index_follows_mutations(self):
+        """Test that adds, updates and deletes show up in later searches"""
+        for db in self.databases():
+            with self.subTest(db=type(db).__name__):
+                self.assertEqual(self.names(db, "bob"), ["Bob Stone"])
+                bob = self.service.search_users_by_name(db, "bob")[0]
+                db.update(bob.id, {"name": "Alina Stone"})
+                db.add(self.user("new@google.com", "Bobby Tables"))
+                alice = self.service.search_users_by_name(db, "alice")[0]
+                db.delete(alice.id)
+                self.assertEqual(self.names(db, "bob"), ["Bobby Tables"])
+                self.assertEqual(self.names(db, "ali"),
+                                 ["ALI Baba", "Alicia Keys", "Alina Stone"])
+
+    def test_invalid_arguments(self):
+        """Test that a missing prefix or a bad limit is refused"""
+        db = next(self.databases())
+        with self.assertRaises(TypeError):
+            self.service.search_users_by_name(db, None)
+        with self.assertRaises(ValueError):
+            self.service.search_users_by_name(db, " ")
+        with self.assertRaises(ValueError):
+            self.service.search_users_by_name(db, "a", limit=0)
+
 if __name__ == '__main__':
     unittest.main()
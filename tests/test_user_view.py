@@ -0,0 +1,64 @@
+import unittest
+from datetime import datetime
+from unittest import TestCase
+from models.user import User
+from models.user_view import UserView
+
+
+class TestUserView(TestCase):
+    """TestUserView is a class that tests the UserView model class
+
+    Args:
+        TestCase: Base class for all tests
+    """
+
+    def setUp(self):
+        """Setup method for the test class"""
+        self.row = {
+            "id": "835f2634-68ee-4e00-8144-c0210f8ef175",
+            "email": "abc@google.com",
+            "name": "John Doe",
+            "password": "Password1234",
+            "is_logged_in": "False",
+            "created_at": "06 June 2020 : 12:00:00",
+            "updated_at": "06 June 2020 : 12:05:20",
+        }
+        self.view = UserView(self.row)
+
+    def test_view_is_a_user(self):
+        """Test that a view can be used where a User is expected"""
+        self.assertIsInstance(self.view, User)
+        self.assertEqual(self.view.email, "abc@google.com")
+        self.assertEqual(self.view, self.view.to_user())
+
+    def test_view_is_read_only(self):
+        """Test that a view cannot be mutated"""
+        with self.assertRaises(AttributeError):
+            self.view.name = "Jane Doe"
+        with self.assertRaises(AttributeError):
+            self.view.password
+
+    def test_view_parses_stored_values(self):
+        """Test that stored strings are parsed on access"""
+        self.assertFalse(self.view.is_logged_in)
+        self.assertTrue(UserView(dict(self.row, is_logged_in="True")).is_logged_in)
+        self.assertEqual(self.view.created_at, datetime(2020, 6, 6, 12, 0, 0))
+
+    def test_view_skips_validation(self):
+        """Test that a view of a trusted row is not revalidated"""
+        view = UserView(dict(self.row, created_at="not a date"))
+        self.assertEqual(view.get_user().get("created_at"), "not a date")
+        self.assertTrue(view.check_password_is_same("Password1234"))
+
+    def test_to_user_builds_mutable_user(self):
+        """Test that to_user returns a full User object"""
+        user = self.view.to_user()
+        self.assertNotIsInstance(user, UserView)
+        user.name = "Jane Doe"
+        self.assertEqual(self.view.name, "John Doe")
+        self.assertEqual(user.to_dict().get("created_at"),
+                         "06 June 2020 : 12:00:00")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from unittest import TestCase
-from utils.validators import email_validator, password_validator
+from utils.validators import email_validator, password_validator, \
+    validate_emails, validate_passwords
 
 
 class TestValidators(TestCase):
@@ -108,6 +109,34 @@ class TestValidators(TestCase):
         with self.assertRaises(ValueError):
             password_validator("        ")
 
+    def test_password_validator_with_unicode_digit(self):
+        """Test that any decimal digit counts, as with the \\d pattern."""
+        self.assertEqual(password_validator("Password\u0663"), "Password\u0663")
+        with self.assertRaises(ValueError):
+            password_validator("Password\u00b2")
+
+    def test_password_validator_reports_first_failure(self):
+        """Test the order in which password rules are checked."""
+        with self.assertRaisesRegex(ValueError, "digit"):
+            password_validator("password")
+        with self.assertRaisesRegex(ValueError, "uppercase"):
+            password_validator("password1")
+
+    def test_validate_emails(self):
+        """Test the validate_emails batch function."""
+        results = validate_emails(["kwasi@outlook.com", "@outlook.com", None])
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1], "Invalid email address!")
+        self.assertIsNotNone(results[2])
+
+    def test_validate_passwords(self):
+        """Test the validate_passwords batch function."""
+        results = validate_passwords(iter(["Password1234", "Pass123", "PASSWORD123", 42]))
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1], "Password must be at least 8 characters long!")
+        self.assertEqual(results[2], "Password must contain at least one lowercase letter!")
+        self.assertIsNotNone(results[3])
+
 
 if __name__ == '__main__':
     unittest.main()
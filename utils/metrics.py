@@ -0,0 +1,324 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_text(names: tuple, values: tuple, extra: str = None) -> str:
+    """Render label pairs in the Prometheus text format"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    """Escape a label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter, one value per combination of labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()) -> None:
+        """Constructor for the Counter class
+
+        Args:
+            name (str): metric name
+            help (str): description of the metric
+            labels (tuple, optional): label names. Defaults to no labels.
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.__values = {}
+        self.__lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1) -> None:
+        """Increase the counter
+
+        Args:
+            *values: label values, in the order of the label names
+            amount (float, optional): amount to add. Defaults to 1.
+        """
+        with self.__lock:
+            self.__values[values] = self.__values.get(values, 0) + amount
+
+    def _set(self, values: tuple, value: float) -> None:
+        """Replace the value for a combination of labels"""
+        with self.__lock:
+            self.__values[values] = value
+
+    def value(self, *values) -> float:
+        """Current value for a combination of labels"""
+        return self.__values.get(values, 0)
+
+    def reset(self) -> None:
+        """Forget every value"""
+        with self.__lock:
+            self.__values = {}
+
+    def render(self) -> list[str]:
+        """Lines of the metric in the Prometheus text format"""
+        with self.__lock:
+            values = sorted(self.__values.items())
+        return [f"{self.name}{_label_text(self.labels, labels)} {value}"
+                for labels, value in values]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, one per combination of labels"""
+
+    kind = "gauge"
+
+    def set(self, value: float, *values) -> None:
+        """Set the gauge
+
+        Args:
+            value (float): new value
+            *values: label values, in the order of the label names
+        """
+        self._set(values, value)
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS) -> None:
+        """Constructor for the Histogram class
+
+        Args:
+            name (str): metric name
+            help (str): description of the metric
+            labels (tuple, optional): label names. Defaults to no labels.
+            buckets (tuple, optional): upper bounds of the buckets.
+                Defaults to DEFAULT_BUCKETS, 100us to 10s.
+        """
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.__series = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, amount: float, *values) -> None:
+        """Record one value
+
+        Args:
+            amount (float): observed value
+            *values: label values, in the order of the label names
+        """
+        position = bisect_left(self.buckets, amount)
+        with self.__lock:
+            series = self.__series.get(values)
+            if series is None:
+                series = self.__series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += amount
+
+    def count(self, *values) -> int:
+        """Number of values recorded for a combination of labels"""
+        series = self.__series.get(values)
+        return 0 if series is None else sum(series[0])
+
+    def reset(self) -> None:
+        """Forget every value"""
+        with self.__lock:
+            self.__series = {}
+
+    def render(self) -> list[str]:
+        """Lines of the metric in the Prometheus text format"""
+        with self.__lock:
+            series = sorted((labels, (list(counts), total))
+                            for labels, (counts, total) in self.__series.items())
+        lines = []
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_text = _label_text(self.labels, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics that can be rendered together.
+
+    Recording is off until `enable` is called. Instrumented code checks
+    `enabled` before doing any work, so a disabled registry costs one
+    attribute lookup per call.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Constructor for the MetricsRegistry class
+
+        Args:
+            enabled (bool, optional): record from the start.
+                Defaults to False.
+        """
+        self.enabled = enabled
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+
+    def enable(self) -> None:
+        """Start recording"""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording. Values recorded so far are kept."""
+        self.enabled = False
+
+    def __register(self, cls: type, name: str, *args, **kwargs):
+        """Private method to get a metric, creating it on first use
+
+        Raises:
+            ValueError: If the name is taken by another kind of metric
+        """
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = self.__metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"metric {name} is already a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        """Get or create a counter"""
+        return self.__register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> Gauge:
+        """Get or create a gauge"""
+        return self.__register(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        return self.__register(Histogram, name, help, labels, buckets)
+
+    def get(self, name: str):
+        """Get a metric by name, or None"""
+        return self.__metrics.get(name)
+
+    def reset(self) -> None:
+        """Forget every recorded value, keeping the metrics"""
+        for metric in list(self.__metrics.values()):
+            metric.reset()
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format
+
+        Returns:
+            str: the metrics
+        """
+        lines = []
+        for name, metric in sorted(self.__metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def timed(name: str, help: str, registry: MetricsRegistry = None,
+          **labels) -> Callable:
+    """Decorator recording how long every call takes
+
+    Durations go to the `<name>_seconds` histogram and calls that raise
+    are counted in `<name>_errors_total`, both labelled with `labels`.
+    While the registry is disabled the function is called directly.
+
+    Args:
+        name (str): metric name prefix
+        help (str): description of what is timed
+        registry (MetricsRegistry, optional): where to record.
+            Defaults to REGISTRY.
+        **labels: labels of this function's series
+
+    Returns:
+        Callable: the decorator
+    """
+    registry = REGISTRY if registry is None else registry
+    names = tuple(labels)
+    values = tuple(labels.values())
+    histogram = registry.histogram(f"{name}_seconds", f"{help}, in seconds", names)
+    errors = registry.counter(f"{name}_errors_total", f"{help}, calls that raised", names)
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc(*values)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, *values)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the registry of its server on GET /metrics"""
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Keep scrapes out of stderr"""
+        return
+
+
+def serve_metrics(port: int = 9100, host: str = "127.0.0.1",
+                  registry: MetricsRegistry = None) -> ThreadingHTTPServer:
+    """Serve the metrics on http://host:port/metrics from a daemon thread
+
+    The registry is enabled, since an endpoint for metrics that are not
+    recorded is of no use. Call `shutdown()` on the returned server to
+    stop it.
+
+    Args:
+        port (int, optional): port to listen on, 0 for any free port.
+            Defaults to 9100.
+        host (str, optional): address to listen on. Defaults to localhost.
+        registry (MetricsRegistry, optional): metrics to serve.
+            Defaults to REGISTRY.
+
+    Returns:
+        ThreadingHTTPServer: the running server
+    """
+    registry = REGISTRY if registry is None else registry
+    registry.enable()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
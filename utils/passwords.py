@@ -0,0 +1,203 @@
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+SCRYPT = "scrypt"
+PBKDF2 = "pbkdf2_sha256"
+ALGORITHMS = (SCRYPT, PBKDF2)
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _encode(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def _decode(value: str) -> bytes:
+    return base64.b64decode(value.encode("ascii"))
+
+
+def is_password_hash(value: str) -> bool:
+    """Check if a stored password is a KDF hash made by `hash_password`
+
+    Args:
+        value (str): stored password
+
+    Returns:
+        bool: True for a hash, False for a legacy plaintext password
+    """
+    if not isinstance(value, str):
+        return False
+    parts = value.split("$")
+    return (parts[0] == SCRYPT and len(parts) == 6) \
+        or (parts[0] == PBKDF2 and len(parts) == 4)
+
+
+def hash_password(password: str, algorithm: str = SCRYPT, n: int = SCRYPT_N,
+                  r: int = SCRYPT_R, p: int = SCRYPT_P,
+                  iterations: int = PBKDF2_ITERATIONS) -> str:
+    """Hash a password with a random salt
+
+    Args:
+        password (str): password to hash
+        algorithm (str, optional): scrypt or pbkdf2_sha256. Defaults to scrypt.
+        n (int, optional): scrypt CPU/memory cost. Defaults to 2 ** 14.
+        r (int, optional): scrypt block size. Defaults to 8.
+        p (int, optional): scrypt parallelism. Defaults to 1.
+        iterations (int, optional): pbkdf2 iterations. Defaults to 600000.
+
+    Raises:
+        ValueError: If the algorithm is unknown
+
+    Returns:
+        str: the hash, with the algorithm, parameters and salt encoded in it
+    """
+    salt = os.urandom(SALT_BYTES)
+    if algorithm == SCRYPT:
+        key = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                             maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES)
+        return f"{SCRYPT}${n}${r}${p}${_encode(salt)}${_encode(key)}"
+    if algorithm == PBKDF2:
+        key = hashlib.pbkdf2_hmac("sha256", password.encode(), salt,
+                                  iterations, dklen=KEY_BYTES)
+        return f"{PBKDF2}${iterations}${_encode(salt)}${_encode(key)}"
+    raise ValueError(f"algorithm must be one of {', '.join(ALGORITHMS)}")
+
+
+def verify_password(stored: str, password: str) -> bool:
+    """Check a password against a stored hash or legacy plaintext password
+
+    Args:
+        stored (str): stored password
+        password (str): password to check
+
+    Returns:
+        bool: True if the password matches
+    """
+    if stored is None or password is None:
+        return False
+
+    if not is_password_hash(stored):
+        return hmac.compare_digest(stored.encode(), password.encode())
+
+    parts = stored.split("$")
+    if parts[0] == SCRYPT:
+        n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+        salt, key = _decode(parts[4]), _decode(parts[5])
+        candidate = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                                   maxmem=256 * n * r + 1024 * 1024,
+                                   dklen=len(key))
+    else:
+        salt, key = _decode(parts[2]), _decode(parts[3])
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt,
+                                        int(parts[1]), dklen=len(key))
+    return hmac.compare_digest(candidate, key)
+
+
+class PasswordHasher:
+    """PasswordHasher hashes and verifies passwords on an executor.
+
+    hashlib releases the GIL while it runs scrypt and pbkdf2, so a thread
+    pool already spreads the work over all cores; a process pool can be
+    used instead. Callers that must not block use the `*_async` methods,
+    which return futures.
+    """
+
+    def __init__(self, algorithm: str = SCRYPT, n: int = SCRYPT_N,
+                 r: int = SCRYPT_R, p: int = SCRYPT_P,
+                 iterations: int = PBKDF2_ITERATIONS, workers: int = None,
+                 use_processes: bool = False, executor: Executor = None) -> None:
+        """Constructor for the PasswordHasher class
+
+        Args:
+            algorithm (str, optional): scrypt or pbkdf2_sha256.
+                Defaults to scrypt.
+            n (int, optional): scrypt CPU/memory cost. Defaults to 2 ** 14.
+            r (int, optional): scrypt block size. Defaults to 8.
+            p (int, optional): scrypt parallelism. Defaults to 1.
+            iterations (int, optional): pbkdf2 iterations. Defaults to 600000.
+            workers (int, optional): size of the pool. Defaults to the
+                number of CPUs.
+            use_processes (bool, optional): use a process pool instead of a
+                thread pool. Defaults to False.
+            executor (Executor, optional): executor to use instead of
+                creating a pool.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {', '.join(ALGORITHMS)}")
+
+        self.__algorithm = algorithm
+        self.__params = {"n": n, "r": r, "p": p, "iterations": iterations}
+        self.__owns_executor = executor is None
+        if executor is None:
+            workers = workers or os.cpu_count() or 1
+            if use_processes:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers,
+                                              thread_name_prefix="password-hasher")
+        self.__executor = executor
+
+    def hash_async(self, password: str) -> Future:
+        """Hash a password on the executor
+
+        Args:
+            password (str): password to hash
+
+        Returns:
+            Future: future resolving to the hash
+        """
+        return self.__executor.submit(hash_password, password,
+                                      self.__algorithm, **self.__params)
+
+    def verify_async(self, stored: str, password: str) -> Future:
+        """Verify a password on the executor
+
+        Args:
+            stored (str): stored password
+            password (str): password to check
+
+        Returns:
+            Future: future resolving to True or False
+        """
+        return self.__executor.submit(verify_password, stored, password)
+
+    def hash(self, password: str) -> str:
+        """Hash a password, waiting for the executor"""
+        return self.hash_async(password).result()
+
+    def verify(self, stored: str, password: str) -> bool:
+        """Verify a password, waiting for the executor"""
+        return self.verify_async(stored, password).result()
+
+    def needs_rehash(self, stored: str) -> bool:
+        """Check if a stored password should be hashed again with the
+        current algorithm and parameters
+
+        Args:
+            stored (str): stored password
+
+        Returns:
+            bool: True for plaintext passwords and outdated hashes
+        """
+        if not is_password_hash(stored):
+            return True
+        parts = stored.split("$")
+        if parts[0] != self.__algorithm:
+            return True
+        if parts[0] == SCRYPT:
+            return [int(value) for value in parts[1:4]] != [
+                self.__params["n"], self.__params["r"], self.__params["p"]]
+        return int(parts[1]) != self.__params["iterations"]
+
+    def close(self) -> None:
+        """Shut down the executor if the hasher created it"""
+        if self.__owns_executor:
+            self.__executor.shutdown(wait=True)
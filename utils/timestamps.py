@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+
+LEGACY = "legacy"
+ISO = "iso"
+EPOCH = "epoch"
+FORMATS = (LEGACY, ISO, EPOCH)
+
+LEGACY_FORMAT = "%d %B %Y : %H:%M:%S"
+
+_MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+            "August", "September", "October", "November", "December"]
+_MONTH_NUMBERS = {name: number for number, name in enumerate(_MONTHS, start=1)}
+
+
+def parse_timestamp(value: str | int) -> datetime:
+    """Parse a stored timestamp in any supported format
+
+    ISO-8601 strings are parsed with `datetime.fromisoformat`, epoch
+    seconds with integer arithmetic and legacy "%d %B %Y : %H:%M:%S"
+    strings with a fixed English month table, so no format is run
+    through the slow, locale-dependent `strptime`.
+
+    Args:
+        value (str | int): timestamp to parse
+
+    Raises:
+        ValueError: If the value is not a supported timestamp
+
+    Returns:
+        datetime: the timestamp. Epoch and ISO values with an offset are
+            timezone aware; legacy values are naive.
+    """
+    if isinstance(value, int):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"{value} is not a timestamp")
+
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), tz=timezone.utc)
+
+    if value[0].isdigit() and value[1:2].isdigit() and value[4:5] == "-":
+        return datetime.fromisoformat(value)
+
+    try:
+        date, time = value.split(" : ")
+        day, month, year = date.split(" ")
+        hour, minute, second = time.split(":")
+        return datetime(int(year), _MONTH_NUMBERS[month], int(day),
+                        int(hour), int(minute), int(second))
+    except (KeyError, ValueError):
+        raise ValueError(f"{value} is not a timestamp")
+
+
+def format_timestamp(value: datetime, timestamp_format: str = LEGACY) -> str:
+    """Format a timestamp for storage
+
+    Args:
+        value (datetime): timestamp to format. Naive values are taken to be
+            UTC when an ISO or epoch timestamp is written.
+        timestamp_format (str, optional): one of legacy, iso or epoch.
+            Defaults to legacy.
+
+    Raises:
+        ValueError: If the format is unknown
+
+    Returns:
+        str: the formatted timestamp
+    """
+    if timestamp_format == LEGACY:
+        return f"{value.day:02d} {_MONTHS[value.month - 1]} {value.year} : " \
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d}"
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    elif value.tzinfo is not timezone.utc:
+        value = value.astimezone(timezone.utc)
+
+    if timestamp_format == ISO:
+        return f"{value.year:04d}-{value.month:02d}-{value.day:02d}T" \
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d}+00:00"
+
+    if timestamp_format == EPOCH:
+        return str(int(value.timestamp()))
+
+    raise ValueError(f"timestamp_format must be one of {', '.join(FORMATS)}")
+
+
+def detect_format(value: str) -> str:
+    """Work out which format a stored timestamp is in
+
+    Args:
+        value (str): stored timestamp
+
+    Returns:
+        str: legacy, iso or epoch, or None if the value is empty
+    """
+    if not value:
+        return None
+    if value.isdigit():
+        return EPOCH
+    if value[0].isdigit() and value[1:2].isdigit() and value[4:5] == "-":
+        return ISO
+    return LEGACY
+
+
+def convert_timestamp(value: str, timestamp_format: str) -> str:
+    """Rewrite a stored timestamp in another format
+
+    Args:
+        value (str): stored timestamp in any supported format
+        timestamp_format (str): format to convert to
+
+    Returns:
+        str: the converted timestamp, or the value itself if it is empty
+    """
+    if not value:
+        return value
+    return format_timestamp(parse_timestamp(value), timestamp_format)
+
+
+def timestamp_key(value: str | datetime) -> int:
+    """Turn a timestamp into epoch seconds, so timestamps stored in
+    different formats sort together
+
+    Args:
+        value (str | datetime): stored timestamp in any supported format or
+            a datetime. Naive values are taken to be UTC.
+
+    Returns:
+        int: seconds since the epoch
+    """
+    if not isinstance(value, datetime):
+        value = parse_timestamp(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
@@ -1,4 +1,17 @@
 import re
+import string
+from typing import Iterable
+
+_EMAIL_PATTERN = re.compile(r"^[a-z][a-zA-Z0-9_.]+@[a-z]+\.[a-z]+")
+_DIGITS = frozenset(string.digits)
+_UPPERCASE = frozenset(string.ascii_uppercase)
+_LOWERCASE = frozenset(string.ascii_lowercase)
+
+INVALID_EMAIL = "Invalid email address!"
+PASSWORD_TOO_SHORT = "Password must be at least 8 characters long!"
+PASSWORD_NEEDS_DIGIT = "Password must contain at least one digit!"
+PASSWORD_NEEDS_UPPERCASE = "Password must contain at least one uppercase letter!"
+PASSWORD_NEEDS_LOWERCASE = "Password must contain at least one lowercase letter!"
 
 
 def email_validator(email: str) -> str:
@@ -10,9 +23,35 @@ def email_validator(email: str) -> str:
     Returns:
         bool: True if email is valid, False otherwise
     """
-    if re.match(r"^[a-z][a-zA-Z0-9_.]+@[a-z]+\.[a-z]+", email):
+    if _EMAIL_PATTERN.match(email):
         return email
-    raise ValueError("Invalid email address!")
+    raise ValueError(INVALID_EMAIL)
+
+
+def _password_error(password: str) -> str | None:
+    """Check a password in one pass over its characters
+
+    The characters are collected into a set once and the set is tested
+    against each required class, instead of searching the password once
+    per class.
+
+    Args:
+        password (str): Password to check
+
+    Returns:
+        str | None: why the password is invalid, or None if it is valid
+    """
+    if len(password) < 8:
+        return PASSWORD_TOO_SHORT
+    characters = set(password)
+    if characters.isdisjoint(_DIGITS) \
+            and not any(character.isdecimal() for character in characters):
+        return PASSWORD_NEEDS_DIGIT
+    if characters.isdisjoint(_UPPERCASE):
+        return PASSWORD_NEEDS_UPPERCASE
+    if characters.isdisjoint(_LOWERCASE):
+        return PASSWORD_NEEDS_LOWERCASE
+    return None
 
 
 def password_validator(password: str) -> str:
@@ -24,12 +63,36 @@ def password_validator(password: str) -> str:
     Returns:
         bool: True if password is valid, False otherwise
     """
-    if len(password) < 8:
-        raise ValueError("Password must be at least 8 characters long!")
-    if not re.search(r'\d', password):
-        raise ValueError("Password must contain at least one digit!")
-    if not re.search(r'[A-Z]', password):
-        raise ValueError("Password must contain at least one uppercase letter!")
-    if not re.search(r'[a-z]', password):
-        raise ValueError("Password must contain at least one lowercase letter!")
+    error = _password_error(password)
+    if error is not None:
+        raise ValueError(error)
     return password
+
+
+def validate_emails(emails: Iterable[str]) -> list[str | None]:
+    """Validate many email addresses
+
+    Args:
+        emails (Iterable[str]): Email addresses to validate
+
+    Returns:
+        list[str | None]: for every email, in order, None if it is valid
+            or the reason it is not
+    """
+    match = _EMAIL_PATTERN.match
+    return [None if isinstance(email, str) and match(email) else INVALID_EMAIL
+            for email in emails]
+
+
+def validate_passwords(passwords: Iterable[str]) -> list[str | None]:
+    """Validate many passwords
+
+    Args:
+        passwords (Iterable[str]): Passwords to validate
+
+    Returns:
+        list[str | None]: for every password, in order, None if it is
+            valid or the reason it is not
+    """
+    return [_password_error(password) if isinstance(password, str)
+            else "Password must be a string!" for password in passwords]